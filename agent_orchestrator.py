@@ -1,19 +1,39 @@
 import os
+import hashlib
 import logging
 import random
+from typing import Any, Callable, Iterator
 
-from langchain_openai import ChatOpenAI
+from agents.checkpointing import delete_run, resume_state, thread_config
+from agents.routing import route_model, validate_routes
 from agents.story_agent import StoryAgent
 from agents.screenplay_agent import ScreenplayAgent
+from agents.pre_critic import PreCritic
+from agents.streaming import StreamEvent
 from utils import (
     SynthesiaClient,
     CreateVideoRequest,
     CreateVideoInput,
     TemplateData,
     CreateVideoFromTemplateRequest,
+    LLMCache,
+    CachedLLM,
+    MetricsRegistry,
+    PipelineStage,
+    StagedPipeline,
 )
 from sqlalchemy.orm import Session
-from db import store_video_metadata
+from db import (
+    BufferedVideoWriter,
+    find_videos_by_proverb,
+    store_video_metadata,
+    store_videos_bulk,
+)
+from db.models import Video
+
+# Worker threads per stage for pipelined batches. LLM stages are slow and
+# I/O-bound; the Synthesia and DB stages are quick in comparison.
+DEFAULT_STAGE_WORKERS = {"story": 4, "screenplay": 4, "video": 2, "db": 1}
 
 
 class AgentOrchestrator:
@@ -24,9 +44,49 @@ class AgentOrchestrator:
         model_name: str = "gpt-4o",
         temperature: float = 0.0,
         prompts_dir: str = "data/prompts",
+        llm_cache: LLMCache | None = None,
+        cache_sampled: bool = False,
+        story_pre_critic: PreCritic | None = None,
+        screenplay_pre_critic: PreCritic | None = None,
+        metrics: MetricsRegistry | None = None,
+        checkpointer: Any = None,
+        llm: Any = None,
+        synthesia_client: SynthesiaClient | None = None,
+        model_routes: dict[str, str] | None = None,
+        llm_factory: Callable[[str], Any] | None = None,
+        drafts: int = 1,
     ):
-        """Initialize the orchestrator and its agents."""
-        self.llm = ChatOpenAI(model_name=model_name, temperature=temperature)
+        """Initialize the orchestrator and its agents.
+
+        When ``llm_cache`` is given, LLM responses are served from it keyed on
+        the rendered prompt, model, temperature and prompt template version.
+        Only temperature-0 calls are cached unless ``cache_sampled`` is set.
+        The optional pre-critics run before each agent's LLM critique step.
+        Every LLM and Synthesia call is recorded in ``metrics`` (a fresh
+        :class:`MetricsRegistry` by default). With a LangGraph ``checkpointer``
+        (see :func:`agents.checkpointing.make_checkpointer`) the story and
+        screenplay steps of a run given a ``run_id`` are checkpointed after
+        every node, so rerunning that ``run_id`` skips the LLM work that
+        already succeeded.
+
+        ``model_routes`` picks the model of each agent node by role (see
+        :mod:`agents.routing`), e.g. ``{"critique": "gpt-4o-mini"}``; nodes
+        without a route use ``model_name``. One client is built per distinct
+        model, by ``llm_factory(name)`` if given.
+
+        With ``drafts`` above 1 both agents write that many drafts at once
+        and keep the first one a critique accepts (see
+        :mod:`agents.speculative`), trading extra tokens for tail latency.
+
+        ``llm`` and ``synthesia_client`` replace the default ``ChatOpenAI``
+        model (the one for ``model_name``) and Synthesia client, e.g. with
+        fakes for offline benchmarks.
+        """
+        self.model_name = model_name
+        self.temperature = temperature
+        self.model_routes = validate_routes(dict(model_routes or {}))
+        self.llm_factory = llm_factory
+        self._models: dict[str, Any] = {}
         self.prompts_dir = prompts_dir
 
         story_template_path = os.path.join(self.prompts_dir, "story_generation.txt")
@@ -51,26 +111,170 @@ class AgentOrchestrator:
                 f"Prompt template not found: {screenplay_critique_path}"
             )
 
+        self.metrics = metrics or MetricsRegistry()
+        self.checkpointer = checkpointer
+        self.llm_cache = llm_cache
+        self.cache_sampled = cache_sampled
+        self.template_version = self._template_version(
+            story_template_path,
+            screenplay_template_path,
+            story_critique_path,
+            screenplay_critique_path,
+        )
+        if llm is not None:
+            self._models[model_name] = self._with_cache(llm)
+        self.llm = self.model(model_name)
+
         self.story_agent = StoryAgent(
-            llm=self.llm,
+            llm=self._routed("story", "generation"),
+            critique_llm=self._routed("story", "critique"),
+            edit_llm=self._routed("story", "edit"),
+            drafts=drafts,
             prompt_file=story_template_path,
             critique_prompt_file=story_critique_path,
+            pre_critic=story_pre_critic,
+            metrics=self.metrics,
+            checkpointer=checkpointer,
         )
         self.screenplay_agent = ScreenplayAgent(
-            llm=self.llm,
+            llm=self._routed("screenplay", "generation"),
+            critique_llm=self._routed("screenplay", "critique"),
+            edit_llm=self._routed("screenplay", "edit"),
+            drafts=drafts,
             prompt_file=screenplay_template_path,
             critique_prompt_file=screenplay_critique_path,
+            pre_critic=screenplay_pre_critic,
+            metrics=self.metrics,
+            checkpointer=checkpointer,
+        )
+        self.synthesia_client = synthesia_client or SynthesiaClient(
+            api_key=None, metrics=self.metrics
         )
-        self.synthesia_client = SynthesiaClient(api_key=None)
         self.logger = logging.getLogger(__name__)
 
-    def generate_story(self, proverb: str) -> str:
+    def model(self, name: str) -> Any:
+        """The chat model called ``name``, created on first use and then shared."""
+        if name not in self._models:
+            if self.llm_factory is not None:
+                llm = self.llm_factory(name)
+            else:
+                # Imported here: langchain_openai pulls in the whole OpenAI SDK.
+                from langchain_openai import ChatOpenAI
+
+                # stream_usage keeps token counts (including cached prompt
+                # tokens) on responses produced while a graph is being streamed.
+                llm = ChatOpenAI(model_name=name, temperature=self.temperature, stream_usage=True)
+            self._models[name] = self._with_cache(llm)
+        return self._models[name]
+
+    def _with_cache(self, llm: Any) -> Any:
+        if self.llm_cache is None:
+            return llm
+        return CachedLLM(
+            llm,
+            self.llm_cache,
+            template_version=self.template_version,
+            cache_sampled=self.cache_sampled,
+        )
+
+    def _routed(self, agent: str, role: str) -> Any:
+        return self.model(route_model(self.model_routes, agent, role, self.model_name))
+
+    @staticmethod
+    def _template_version(*paths: str) -> str:
+        """Short digest of the prompt templates, used to key the LLM cache."""
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, "rb") as fh:
+                digest.update(fh.read())
+        return digest.hexdigest()[:16]
+
+    def generate_story(self, proverb: str, run_id: str | None = None) -> str:
         """Generate a short story based on the given proverb."""
-        return self.story_agent.run(proverb)
+        return self.story_agent.run(proverb, run_id=run_id)
 
-    def generate_screenplay(self, story: str, proverb: str) -> str:
+    def generate_screenplay(
+        self, story: str, proverb: str, run_id: str | None = None
+    ) -> str:
         """Generate a short screenplay based on the given story."""
-        return self.screenplay_agent.run(story, proverb)
+        return self.screenplay_agent.run(story, proverb, run_id=run_id)
+
+    def stream_story(self, proverb: str, run_id: str | None = None) -> Iterator[StreamEvent]:
+        """Generate a story, yielding tokens from each agent node as they arrive."""
+        return self.story_agent.run_stream(proverb, run_id=run_id)
+
+    def stream_screenplay(
+        self, story: str, proverb: str, run_id: str | None = None
+    ) -> Iterator[StreamEvent]:
+        """Generate a screenplay, yielding tokens as they arrive."""
+        return self.screenplay_agent.run_stream(story, proverb, run_id=run_id)
+
+    def checkpointed_proverb(self, run_id: str) -> str | None:
+        """The proverb a checkpointed run was started with, if it exists."""
+        if self.checkpointer is None:
+            return None
+        _, values = resume_state(
+            self.story_agent.compiled_graph, thread_config(run_id, "story")
+        )
+        return values.get("proverb")
+
+    def discard_run(self, run_id: str | None) -> None:
+        """Drop the checkpoints of a finished run so the checkpoint store stays small.
+
+        Call once the run's video is stored; a failed run keeps its
+        checkpoints so it can be resumed.
+        """
+        delete_run(self.checkpointer, run_id)
+
+    def existing_videos(self, session: Session, proverbs: list[str]) -> dict[str, Video]:
+        """Map each proverb that already has a (non-failed) video to that video.
+
+        Proverbs are compared after normalisation (case, punctuation and
+        spacing), in one indexed lookup for the whole batch.
+        """
+        return find_videos_by_proverb(session, proverbs)
+
+    def pre_critic_stats(self) -> dict:
+        """Verdict counts and estimated LLM calls/seconds saved per agent."""
+        stats = {}
+        for name, agent in (("story", self.story_agent), ("screenplay", self.screenplay_agent)):
+            if agent.pre_critic is not None:
+                stats[name] = agent.pre_critic.stats()
+        return stats
+
+    def speculation_stats(self) -> dict:
+        """How speculative drafting rounds ended, per agent."""
+        return {
+            "story": self.story_agent.speculation.summary(),
+            "screenplay": self.screenplay_agent.speculation.summary(),
+        }
+
+    def stream_metrics(self) -> dict:
+        """Time-to-first-token and tokens/sec per agent node and model."""
+        return {
+            "story": self.story_agent.stream_metrics.summary(),
+            "screenplay": self.screenplay_agent.stream_metrics.summary(),
+        }
+
+    def usage_report(self) -> dict:
+        """Calls and input/cached/output token totals per agent node."""
+        return {
+            "story": self.story_agent.usage.summary(),
+            "screenplay": self.screenplay_agent.usage.summary(),
+        }
+
+    def format_usage_report(self) -> str:
+        lines = [
+            f"{'node':<28}{'calls':>6}{'input':>9}{'cached':>9}{'uncached':>10}{'output':>9}{'hit %':>7}"
+        ]
+        for agent, nodes in self.usage_report().items():
+            for node, row in nodes.items():
+                lines.append(
+                    f"{agent + '/' + node:<28}{row['calls']:>6}{row['input_tokens']:>9}"
+                    f"{row['cached_tokens']:>9}{row['uncached_tokens']:>10}"
+                    f"{row['output_tokens']:>9}{row['cache_hit_rate'] * 100:>7.1f}"
+                )
+        return "\n".join(lines)
 
     def generate_video(
         self,
@@ -116,18 +320,15 @@ class AgentOrchestrator:
         store_video_metadata(session, proverb, story, screenplay, response)
         return response
 
-    def generate_video_from_template(
+    def submit_video_from_template(
         self,
         screenplay: str,
         title: str,
         description: str,
-        proverb: str,
-        story: str,
-        session: Session,
         visibility: str = "private",
         test: bool = True,
     ) -> dict:
-        """Create a Synthesia video using a template and store metadata."""
+        """Submit a Synthesia template video without storing any metadata."""
 
         template_options = [
             "f3fcb06b-416c-48aa-98f8-f32dd9573cdd",
@@ -147,6 +348,157 @@ class AgentOrchestrator:
             description=description,
         )
 
-        response = self.synthesia_client.create_video_from_template(payload)
-        store_video_metadata(session, proverb, story, screenplay, response)
+        return self.synthesia_client.create_video_from_template(payload)
+
+    def generate_video_from_template(
+        self,
+        screenplay: str,
+        title: str,
+        description: str,
+        proverb: str,
+        story: str,
+        session: Session | None = None,
+        visibility: str = "private",
+        test: bool = True,
+        writer: BufferedVideoWriter | None = None,
+        on_submitted: Callable[[dict], None] | None = None,
+    ) -> dict:
+        """Create a Synthesia video using a template and store metadata.
+
+        With a ``writer`` the metadata goes through its next bulk insert
+        (this call still waits for the commit) and ``session`` is unused.
+        ``on_submitted`` is called with Synthesia's response before the
+        metadata is written, e.g. to journal the video ID so that a failed
+        write is retried with :meth:`store_video` rather than a second render.
+        """
+
+        response = self.submit_video_from_template(
+            screenplay=screenplay,
+            title=title,
+            description=description,
+            visibility=visibility,
+            test=test,
+        )
+        if on_submitted is not None:
+            on_submitted(response)
+        if writer is not None:
+            writer.add(proverb, story, screenplay, response).result()
+        else:
+            store_video_metadata(session, proverb, story, screenplay, response)
         return response
+
+    def store_video(
+        self,
+        proverb: str,
+        story: str,
+        screenplay: str,
+        video: dict,
+        session: Session | None = None,
+        writer: BufferedVideoWriter | None = None,
+    ) -> dict:
+        """Store the metadata of a video that was already submitted.
+
+        An upsert, since an earlier attempt's write may have gone through
+        before it failed. With a ``writer`` ``session`` is unused.
+        """
+        record = (proverb, story, screenplay, video)
+        if writer is not None:
+            writer.add(*record).result()
+        else:
+            store_videos_bulk(session, [record])
+        return video
+
+    def build_pipeline(
+        self,
+        session_factory: Callable[[], Session],
+        workers: dict[str, int] | None = None,
+        queue_size: int = 8,
+        test: bool = True,
+        run_id_for: Callable[[str], str] | None = None,
+        writer: BufferedVideoWriter | None = None,
+        on_submitted: Callable[[dict], None] | None = None,
+        submitted: dict[str, dict] | None = None,
+    ) -> StagedPipeline:
+        """Build a staged pipeline that overlaps the stages of many proverbs.
+
+        The stages are ``story``, ``screenplay``, ``video`` (Synthesia
+        submission) and ``db`` (metadata insert). Each has its own worker
+        count, taken from ``workers`` and defaulting to
+        :data:`DEFAULT_STAGE_WORKERS`, and a queue of at most ``queue_size``
+        waiting items. Each item flows through the stages as a dict that
+        accumulates ``proverb``, ``story``, ``screenplay`` and ``video``.
+        ``run_id_for`` maps a proverb to the run ID its LLM steps are
+        checkpointed under. With a ``writer`` the ``db`` stage hands rows to
+        its bulk inserts and, unless set in ``workers``, gets one worker per
+        row of a full flush so a flush can fill before its timer runs out.
+
+        ``on_submitted`` is called with each item once Synthesia has accepted
+        its video, before the ``db`` stage, e.g. to journal the video ID.
+        ``submitted`` maps proverbs to such earlier submissions (dicts with
+        ``story``, ``screenplay`` and ``video``); those items skip straight to
+        the ``db`` stage, which upserts, instead of rendering again.
+        """
+        unknown = set(workers or {}) - set(DEFAULT_STAGE_WORKERS)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown))}")
+        counts = {**DEFAULT_STAGE_WORKERS, **(workers or {})}
+        if writer is not None and "db" not in (workers or {}):
+            counts["db"] = writer.max_rows
+
+        def story_stage(proverb: str) -> dict:
+            run_id = run_id_for(proverb) if run_id_for else None
+            earlier = (submitted or {}).get(proverb)
+            if earlier is not None:
+                return {
+                    "proverb": proverb,
+                    "run_id": run_id,
+                    "story": earlier["story"],
+                    "screenplay": earlier["screenplay"],
+                    "video": earlier["video"],
+                }
+            story = self.generate_story(proverb, run_id=run_id)["story"]
+            return {"proverb": proverb, "run_id": run_id, "story": story}
+
+        def screenplay_stage(item: dict) -> dict:
+            if "screenplay" in item:
+                return item
+            result = self.generate_screenplay(
+                story=item["story"], proverb=item["proverb"], run_id=item["run_id"]
+            )
+            return {**item, "screenplay": result["screenplay"]}
+
+        def video_stage(item: dict) -> dict:
+            if "video" in item:
+                return item
+            video = self.submit_video_from_template(
+                screenplay=item["screenplay"],
+                title=item["proverb"].replace(" ", "_"),
+                description=item["proverb"],
+                test=test,
+            )
+            item = {**item, "video": video}
+            if on_submitted is not None:
+                on_submitted(item)
+            return item
+
+        def db_stage(item: dict) -> dict:
+            record = (item["proverb"], item["story"], item["screenplay"], item["video"])
+            if writer is not None:
+                self.store_video(*record, writer=writer)
+            else:
+                session = session_factory()
+                try:
+                    self.store_video(*record, session=session)
+                finally:
+                    session.close()
+            self.discard_run(item["run_id"])
+            return item
+
+        return StagedPipeline(
+            [
+                PipelineStage("story", story_stage, counts["story"], queue_size),
+                PipelineStage("screenplay", screenplay_stage, counts["screenplay"], queue_size),
+                PipelineStage("video", video_stage, counts["video"], queue_size),
+                PipelineStage("db", db_stage, counts["db"], queue_size),
+            ]
+        )
@@ -0,0 +1,114 @@
+"""Durable LangGraph checkpoints so an interrupted run can pick up where it stopped.
+
+Checkpoints are only worth keeping until a run's output is stored: callers
+delete a run's threads with :func:`delete_run` once its video is saved, so
+the checkpoint database holds just the runs that failed or are in flight.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sqlite3
+from typing import Any, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DB = ".checkpoints.sqlite"
+
+# One checkpoint thread per agent graph within a run.
+RUN_AGENTS = ("story", "screenplay")
+
+
+def make_checkpointer(url: str | None = None) -> Any:
+    """Open a persistent checkpointer for ``url``.
+
+    ``postgresql://...`` URLs (SQLAlchemy-style ``+driver`` suffixes are
+    accepted) use ``PostgresSaver``; anything else is treated as a SQLite
+    file path, optionally prefixed with ``sqlite:///``. Defaults to the
+    ``CHECKPOINT_DB`` environment variable, then :data:`DEFAULT_CHECKPOINT_DB`.
+    """
+    url = url or os.environ.get("CHECKPOINT_DB") or DEFAULT_CHECKPOINT_DB
+    if url.startswith(("postgres://", "postgresql")):
+        from langgraph.checkpoint.postgres import PostgresSaver
+        from psycopg import Connection
+        from psycopg.rows import dict_row
+
+        conn = Connection.connect(
+            re.sub(r"^postgres(ql)?(\+\w+)?://", "postgresql://", url),
+            autocommit=True,
+            prepare_threshold=0,
+            row_factory=dict_row,
+        )
+        saver = PostgresSaver(conn)
+    else:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+
+        path = url.removeprefix("sqlite:///")
+        saver = SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    saver.setup()
+    logger.info("Using LangGraph checkpoints at %s", url.split("@")[-1])
+    return saver
+
+
+def thread_config(run_id: str, agent: str) -> dict:
+    """Checkpoint config for one agent's graph within run ``run_id``."""
+    return {"configurable": {"thread_id": f"{run_id}/{agent}"}}
+
+
+def delete_run(checkpointer: Any, run_id: str) -> None:
+    """Delete every checkpoint of run ``run_id``; a no-op without a checkpointer."""
+    if checkpointer is None or not run_id:
+        return
+    for agent in RUN_AGENTS:
+        checkpointer.delete_thread(thread_config(run_id, agent)["configurable"]["thread_id"])
+
+
+def resume_state(graph: Any, config: dict | None) -> tuple[str, dict]:
+    """Where a thread stands: ``("new" | "partial" | "done", checkpointed values)``.
+
+    ``"partial"`` means a node raised (or the process died) before the graph
+    reached its end; invoking with ``None`` input continues from that node.
+    """
+    if config is None or graph.checkpointer is None:
+        return "new", {}
+    snapshot = graph.get_state(config)
+    if not snapshot.values:
+        return "new", {}
+    return ("partial" if snapshot.next else "done"), dict(snapshot.values)
+
+
+def invoke_resumable(
+    graph: Any, inputs: dict, output_keys: Sequence[str], config: dict | None = None
+) -> dict:
+    """Invoke ``graph``, continuing from its last checkpoint for ``config``.
+
+    A thread that already finished returns its stored output without running
+    any node; one that stopped part-way resumes at the node that failed; a
+    new thread starts from ``inputs``. Without a checkpointer or config this
+    is a plain ``invoke``.
+    """
+    status, values = resume_state(graph, config)
+    if status == "done":
+        return {key: values.get(key) for key in output_keys}
+    if status == "partial":
+        logger.info("Resuming %s", config["configurable"]["thread_id"])
+        return graph.invoke(None, config)
+    return graph.invoke(inputs, config)
+
+
+def stream_kwargs(graph: Any, inputs: dict, config: dict | None) -> dict | None:
+    """``inputs``/``initial``/``config`` for :func:`stream_graph` on a thread.
+
+    Returns None when the thread already finished, so there is nothing to
+    stream.
+    """
+    status, values = resume_state(graph, config)
+    if status == "done":
+        return None
+    return {
+        "inputs": None if status == "partial" else inputs,
+        "initial": values or None,
+        "config": config,
+    }
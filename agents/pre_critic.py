@@ -0,0 +1,116 @@
+"""Cheap rule-based review that runs before the LLM critique step."""
+
+from __future__ import annotations
+
+import re
+import threading
+from typing import Literal
+
+Verdict = Literal["accept", "reject", "defer"]
+
+
+def _normalise(text: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace for matching."""
+    text = re.sub(r"[^\w\s]", "", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class PreCritic:
+    """Local checks that settle obvious cases without an LLM round trip.
+
+    ``review`` returns ``"reject"`` with a synthesized ``revise:`` critique
+    when a draft breaks a hard rule (empty, outside the word budget, missing a
+    required phrase). A draft that passes every rule is accepted outright if
+    ``accept_when_clean`` is set, and otherwise deferred to the LLM critic.
+    ``required_phrases`` may contain ``{proverb}``.
+
+    Every accept or reject saves one LLM critique call; the time saved is
+    estimated from the average latency of the LLM critiques that did run,
+    falling back to ``default_critique_seconds``.
+    """
+
+    def __init__(
+        self,
+        min_words: int = 1,
+        max_words: int | None = None,
+        required_phrases: tuple[str, ...] = (),
+        accept_when_clean: bool = False,
+        default_critique_seconds: float = 5.0,
+    ):
+        self.min_words = min_words
+        self.max_words = max_words
+        self.required_phrases = required_phrases
+        self.accept_when_clean = accept_when_clean
+        self.default_critique_seconds = default_critique_seconds
+        self._lock = threading.Lock()
+        self.counts = {"accept": 0, "reject": 0, "defer": 0}
+        self._critique_seconds = 0.0
+        self._critique_calls = 0
+
+    def review(self, text: str, proverb: str) -> tuple[Verdict, str]:
+        """Return the verdict and, for rejections, the critique to act on."""
+        verdict, critique = self._check(text or "", proverb)
+        with self._lock:
+            self.counts[verdict] += 1
+        return verdict, critique
+
+    def _check(self, text: str, proverb: str) -> tuple[Verdict, str]:
+        words = len(text.split())
+        if words == 0:
+            return "reject", "revise: The draft is empty. Write the full piece."
+        if words < self.min_words:
+            return "reject", (
+                f"revise: The draft is only {words} words; "
+                f"expand it to at least {self.min_words} words."
+            )
+        if self.max_words is not None and words > self.max_words:
+            return "reject", (
+                f"revise: The draft is {words} words; "
+                f"shorten it to at most {self.max_words} words."
+            )
+        normalised = _normalise(text)
+        for phrase in self.required_phrases:
+            expected = phrase.replace("{proverb}", proverb)
+            if _normalise(expected) not in normalised:
+                return "reject", f'revise: The draft must include "{expected}".'
+        if self.accept_when_clean:
+            return "accept", "accept"
+        return "defer", ""
+
+    def record_llm_critique(self, seconds: float) -> None:
+        """Feed the latency of an LLM critique that ran, for savings estimates."""
+        with self._lock:
+            self._critique_seconds += seconds
+            self._critique_calls += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            saved = self.counts["accept"] + self.counts["reject"]
+            avg = (
+                self._critique_seconds / self._critique_calls
+                if self._critique_calls
+                else self.default_critique_seconds
+            )
+            return {
+                **self.counts,
+                "llm_calls_saved": saved,
+                "seconds_saved": saved * avg,
+            }
+
+
+def story_pre_critic(accept_when_clean: bool = False) -> PreCritic:
+    """Rules matching ``story_generation.txt`` (a 300–600 word story)."""
+    return PreCritic(min_words=200, max_words=800, accept_when_clean=accept_when_clean)
+
+
+def screenplay_pre_critic(accept_when_clean: bool = False) -> PreCritic:
+    """Rules matching the closing lines ``screenplay_generation.txt`` demands."""
+    return PreCritic(
+        min_words=50,
+        max_words=700,
+        required_phrases=(
+            "The moral of the story is: {proverb}",
+            "If you like such fun stories, subscribe to Proverb Panda.",
+        ),
+        accept_when_clean=accept_when_clean,
+    )
@@ -0,0 +1,59 @@
+"""Render prompt templates as a stable prefix followed by the variable part.
+
+Provider-side prompt caching matches on the longest identical prefix of a
+request. Templates keep their fixed instructions first and their
+``{placeholder}`` values last; :func:`render_prompt` sends the fixed part as
+its own system message so every call for that template shares it verbatim.
+"""
+
+from __future__ import annotations
+
+import re
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def split_template(template: str) -> tuple[str, str]:
+    """Split ``template`` at the start of the line holding its first placeholder.
+
+    Returns ``(static, variable)``; ``static + variable == template``.
+    """
+    match = _PLACEHOLDER.search(template)
+    if match is None:
+        return template, ""
+    cut = template.rfind("\n", 0, match.start()) + 1
+    return template[:cut], template[cut:]
+
+
+def render_prompt(template: str, values: dict[str, str]) -> list[BaseMessage]:
+    """Render ``template`` as ``[SystemMessage(static), HumanMessage(variable)]``.
+
+    Placeholders are filled with plain string replacement, as before, so the
+    message contents concatenate to the fully rendered template. Either
+    message is left out when its part is empty.
+    """
+    static, variable = split_template(template)
+    for name, value in values.items():
+        variable = variable.replace("{" + name + "}", value)
+    messages: list[BaseMessage] = []
+    if static:
+        messages.append(SystemMessage(content=static))
+    if variable:
+        messages.append(HumanMessage(content=variable))
+    return messages
+
+
+def revision_messages(
+    template: str, values: dict[str, str], draft: str, critique: str
+) -> list[BaseMessage]:
+    """Messages asking for a revised draft.
+
+    Starts with the same messages as the original generation call, so the
+    revision reuses its cached prefix, then adds the draft and the critique.
+    """
+    return render_prompt(template, values) + [
+        AIMessage(content=draft),
+        HumanMessage(content=critique),
+    ]
@@ -0,0 +1,52 @@
+"""Choose the chat model each agent node runs on.
+
+Routes map a node role (``generation``, ``critique`` or ``edit``), optionally
+qualified by agent (``story.critique``, ``screenplay.edit``), to a model
+name. The most specific route wins; nodes without one use the default model.
+
+    critique=gpt-4o-mini,screenplay.edit=gpt-4o
+"""
+
+from __future__ import annotations
+
+import json
+
+AGENTS = ("story", "screenplay")
+ROLES = ("generation", "critique", "edit")
+
+
+def validate_routes(routes: dict[str, str]) -> dict[str, str]:
+    """Return ``routes`` after checking every key names a known role."""
+    for key, model in routes.items():
+        agent, _, role = key.rpartition(".")
+        if role not in ROLES or (agent and agent not in AGENTS):
+            raise ValueError(
+                f"unknown model route {key!r}: expected one of {', '.join(ROLES)}, "
+                f"optionally prefixed with {' or '.join(a + '.' for a in AGENTS)}"
+            )
+        if not isinstance(model, str) or not model:
+            raise ValueError(f"model route {key!r} needs a model name")
+    return routes
+
+
+def parse_model_routes(value: str) -> dict[str, str]:
+    """Parse ``critique=gpt-4o-mini,story.edit=gpt-4o`` into a routes dict."""
+    routes = {}
+    for part in value.split(","):
+        key, _, model = part.partition("=")
+        routes[key.strip()] = model.strip()
+    return validate_routes(routes)
+
+
+def load_model_routes(path: str) -> dict[str, str]:
+    """Read routes from a JSON object with the same keys as the flag."""
+    with open(path, encoding="utf-8") as fh:
+        routes = json.load(fh)
+    if not isinstance(routes, dict):
+        raise ValueError(f"{path} must hold a JSON object of model routes")
+    return validate_routes(routes)
+
+
+def route_model(routes: dict[str, str], agent: str, role: str, default: str) -> str:
+    """Model for ``agent``'s ``role`` node: the agent's route, the role's, or ``default``."""
+    return routes.get(f"{agent}.{role}") or routes.get(role) or default
@@ -1,8 +1,26 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterator
+
 from typing_extensions import TypedDict
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage
 from langgraph.graph import StateGraph, START, END
 
+from .checkpointing import invoke_resumable, stream_kwargs, thread_config
+from .pre_critic import PreCritic
+from .prompts import render_prompt, revision_messages
+from .speculative import Review, SpeculationStats, speculate
+from .streaming import StreamEvent, StreamMetrics, astream_graph, stream_graph
+from .usage import UsageLedger, response_model
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+    from utils.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
 
 class ScreenplayInput(TypedDict):
     """Schema for the agent's input."""
@@ -21,60 +39,202 @@ class ScreenplayState(ScreenplayInput, ScreenplayOutput):
     """Combined schema for internal state."""
 
     critique_comments: str
+    pre_critic_verdict: str
 
 
 class ScreenplayAgent:
-    def __init__(self, llm: ChatOpenAI, prompt_file: str, critique_prompt_file: str):
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        prompt_file: str,
+        critique_prompt_file: str,
+        pre_critic: PreCritic | None = None,
+        metrics: MetricsRegistry | None = None,
+        checkpointer: Any = None,
+        critique_llm: ChatOpenAI | None = None,
+        edit_llm: ChatOpenAI | None = None,
+        drafts: int = 1,
+        draft_temperature: float = 0.8,
+    ):
+        # Generation, critique and edit nodes may each run on their own
+        # model; critique and edit default to the generation model.
         self.llm = llm
+        self.critique_llm = critique_llm or llm
+        self.edit_llm = edit_llm or llm
+        if drafts < 1:
+            raise ValueError("drafts must be at least 1")
+        # With more than one draft, drafting and critique race speculatively
+        # (see agents.speculative); extra drafts sample at draft_temperature.
+        self.drafts = drafts
+        self.draft_temperature = draft_temperature
+        self.speculation = SpeculationStats()
+        self.pre_critic = pre_critic
         self.template = open(prompt_file, encoding="utf-8").read()
         self.critique_template = open(critique_prompt_file, encoding="utf-8").read()
+        self.stream_metrics = StreamMetrics()
+        self.usage = UsageLedger(metrics, agent="screenplay")
 
         # Build the StateGraph with explicit input/output filtering
         builder = StateGraph(
             ScreenplayState, input=ScreenplayInput, output=ScreenplayOutput
         )
-        builder.add_node("screenplay_node", self.screenplay_node)
-        builder.add_node("critique_node", self.critique_node)
         builder.add_node("edit_node", self.edit_node)
-
-        builder.add_edge(START, "screenplay_node")
-        builder.add_edge("screenplay_node", "critique_node")
-        builder.add_conditional_edges(
-            "critique_node",
-            self._should_revise,
-            path_map={"revise": "edit_node", "accept": END},
-        )
+        if drafts > 1:
+            builder.add_node("speculative_node", self.speculative_node)
+            builder.add_edge(START, "speculative_node")
+            builder.add_conditional_edges(
+                "speculative_node",
+                self._should_revise,
+                path_map={"revise": "edit_node", "accept": END},
+            )
+        else:
+            builder.add_node("screenplay_node", self.screenplay_node)
+            builder.add_node("critique_node", self.critique_node)
+            builder.add_edge(START, "screenplay_node")
+            if pre_critic is None:
+                builder.add_edge("screenplay_node", "critique_node")
+            else:
+                builder.add_node("pre_critique_node", self.pre_critique_node)
+                builder.add_edge("screenplay_node", "pre_critique_node")
+                builder.add_conditional_edges(
+                    "pre_critique_node",
+                    self._pre_critic_route,
+                    path_map={"accept": END, "reject": "edit_node", "defer": "critique_node"},
+                )
+            builder.add_conditional_edges(
+                "critique_node",
+                self._should_revise,
+                path_map={"revise": "edit_node", "accept": END},
+            )
         builder.add_edge("edit_node", END)
-        self.compiled_graph = builder.compile()
+        self.compiled_graph = builder.compile(checkpointer=checkpointer)
+        # Runs without a run_id are not checkpointed.
+        self._unchecked_graph = (
+            self.compiled_graph.copy({"checkpointer": None})
+            if checkpointer is not None
+            else self.compiled_graph
+        )
 
     def screenplay_node(self, state: ScreenplayInput) -> ScreenplayState:
         """Generate a screenplay from the story."""
-        prompt = self.template.replace("{story}", state["story"]).replace(
-            "{proverb}", state["proverb"]
+        messages = render_prompt(
+            self.template, {"story": state["story"], "proverb": state["proverb"]}
         )
-        response = self.llm.invoke([SystemMessage(content=prompt)])
+        response = self.usage.invoke(self.llm, "screenplay_node", messages)
         return {"story": state["story"], "proverb": state["proverb"], "screenplay": response.content}
 
+    def speculative_node(self, state: ScreenplayInput) -> ScreenplayState:
+        """Race ``drafts`` screenplays through critique and keep the first accepted."""
+        inputs = {"story": state["story"], "proverb": state["proverb"]}
+        messages = render_prompt(self.template, inputs)
+        result = speculate(
+            self.drafts,
+            lambda index: self._draft(messages, index),
+            lambda draft: self._review({**inputs, "screenplay": draft}),
+            self.speculation,
+        )
+        return {**inputs, "screenplay": result.draft, "critique_comments": result.critique}
+
+    def _draft(self, messages: list, index: int) -> str:
+        # Draft 0 is the one the sequential graph would write; the others are
+        # sampled so the race has different drafts to choose from.
+        kwargs = {} if index == 0 else {"temperature": self.draft_temperature, "seed": index}
+        return self.usage.invoke(self.llm, "screenplay_node", messages, **kwargs).content
+
+    def _review(self, state: ScreenplayState) -> tuple[Review, str]:
+        """Pre-critic verdict if it settles the draft, else the LLM critique's."""
+        if self.pre_critic is not None:
+            verdict, critique = self.pre_critic.review(state["screenplay"], state["proverb"])
+            if verdict != "defer":
+                return ("accept" if verdict == "accept" else "reject"), critique
+        critique = self.critique_node(state)["critique_comments"]
+        accepted = self.accepts(critique)
+        return ("accept" if accepted else "revise"), critique
+
+    def pre_critique_node(self, state: ScreenplayState) -> ScreenplayState:
+        """Run the local rule-based checks before paying for an LLM critique."""
+        verdict, critique = self.pre_critic.review(state["screenplay"], state["proverb"])
+        return {**state, "critique_comments": critique, "pre_critic_verdict": verdict}
+
+    def _pre_critic_route(self, state: ScreenplayState) -> str:
+        return state["pre_critic_verdict"]
+
     def critique_node(self, state: ScreenplayState) -> ScreenplayState:
         """Critique the screenplay and decide if it needs revision."""
-        prompt = self.critique_template.replace("{screenplay}", state["screenplay"])
-        resp = self.llm.invoke([SystemMessage(content=prompt)])
-        print(f"Critique:{resp.content}")
+        messages = render_prompt(self.critique_template, {"screenplay": state["screenplay"]})
+        started = time.perf_counter()
+        resp = self.usage.invoke(self.critique_llm, "critique_node", messages)
+        if self.pre_critic is not None:
+            self.pre_critic.record_llm_critique(time.perf_counter() - started)
+        accepted = self.accepts(resp.content)
+        self.usage.observe_verdict(response_model(self.critique_llm, resp), accepted)
+        logger.debug("Critique: %s", resp.content)
         return {**state, "critique_comments": resp.content}
 
+    def accepts(self, critique: str) -> bool:
+        """Whether a critique accepts the screenplay as it stands."""
+        content = critique.strip().lower()
+        return not content or content.startswith("accept")
+
     def _should_revise(self, state: ScreenplayState) -> str:
-        content = state.get("critique_comments", "").strip().lower()
-        if not content or content.startswith("accept"):
-            return "accept"
-        return "revise"
+        return "accept" if self.accepts(state.get("critique_comments", "")) else "revise"
 
     def edit_node(self, state: ScreenplayState) -> ScreenplayState:
         """Apply the revision suggested by the critique step."""
-        prompt = (
-            self.template.replace("{story}", state["story"]).replace("{proverb}", state["proverb"]) + "\n" + state["critique_comments"]
+        messages = revision_messages(
+            self.template,
+            {"story": state["story"], "proverb": state["proverb"]},
+            state["screenplay"],
+            state["critique_comments"],
         )
-        resp = self.llm.invoke([SystemMessage(content=prompt)])
+        resp = self.usage.invoke(self.edit_llm, "edit_node", messages)
         return {**state, "screenplay": resp.content}
 
-    def run(self, story: str, proverb: str) -> ScreenplayOutput:
-        return self.compiled_graph.invoke({"story": story, "proverb": proverb})
+    def run(
+        self, story: str, proverb: str, run_id: str | None = None
+    ) -> ScreenplayOutput:
+        """Run the graph; with a checkpointer, ``run_id`` makes the run resumable."""
+        return invoke_resumable(
+            self._graph(run_id),
+            {"story": story, "proverb": proverb},
+            ("screenplay",),
+            self._config(run_id),
+        )
+
+    def _graph(self, run_id: str | None):
+        return self.compiled_graph if run_id else self._unchecked_graph
+
+    def _config(self, run_id: str | None) -> dict | None:
+        return thread_config(run_id, "screenplay") if run_id else None
+
+    def run_stream(
+        self, story: str, proverb: str, run_id: str | None = None
+    ) -> Iterator[StreamEvent]:
+        """Run the graph, yielding each node's tokens as they are generated."""
+        inputs = {"story": story, "proverb": proverb}
+        stream_args = stream_kwargs(self._graph(run_id), inputs, self._config(run_id))
+        if stream_args is None:
+            return iter([{"type": "done", "output": self.run(story, proverb, run_id)}])
+        return stream_graph(
+            self._graph(run_id),
+            output_keys=("screenplay",),
+            metrics=self.stream_metrics,
+            model_name=getattr(self.llm, "model_name", None) or "unknown",
+            **stream_args,
+        )
+
+    def astream(self, story: str, proverb: str) -> AsyncIterator[StreamEvent]:
+        """Async variant of :meth:`run_stream`, without checkpoints.
+
+        The checkpointers from :func:`~agents.checkpointing.make_checkpointer`
+        are synchronous (``SqliteSaver``/``PostgresSaver``), so async runs take
+        no ``run_id`` and always start from the beginning; use :meth:`run` or
+        :meth:`run_stream` with a ``run_id`` for a resumable run.
+        """
+        return astream_graph(
+            self._unchecked_graph,
+            {"story": story, "proverb": proverb},
+            ("screenplay",),
+            self.stream_metrics,
+            getattr(self.llm, "model_name", None) or "unknown",
+        )
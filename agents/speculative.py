@@ -0,0 +1,144 @@
+"""Speculative drafting: race several drafts through critique, keep the first accepted.
+
+The plain graph is strictly sequential, so a rejected draft costs a draft,
+a critique and an edit round trip back to back. With ``drafts=K`` an agent
+instead starts K drafts at once, critiques each as soon as it is written and
+returns the first one a critique accepts. All K attempts start together, so
+once there is a winner the others are already in flight: drafts still being
+written are not critiqued, but a call cannot be recalled, so their tokens are
+still spent (and counted as ``wasted``). If no draft is accepted the agent
+edits the best one, as it would have edited its single draft.
+
+Attempts run in a copy of the caller's ``contextvars`` context, so LangGraph
+stream callbacks (``--stream``) see draft and critique tokens as they would
+in the sequential graph. Every LLM call an attempt makes carries its draft
+index in the run metadata under :data:`DRAFT_METADATA_KEY`, so the K
+interleaved token streams can be told apart.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Literal
+
+from langchain_core.runnables.config import var_child_runnable_config
+
+# "reject" is a draft the pre-critic turned down on a hard rule; it ranks
+# below drafts an LLM critique asked to revise.
+Review = Literal["accept", "revise", "reject"]
+
+# Run metadata key holding the index of the draft an LLM call belongs to.
+DRAFT_METADATA_KEY = "speculative_draft"
+
+
+@dataclass
+class Speculation:
+    """The draft a speculative round settled on, with the critique it got."""
+
+    draft: str
+    verdict: Review
+    critique: str
+    index: int
+
+
+class SpeculationStats:
+    """Thread-safe counts of how speculative rounds ended.
+
+    ``wasted`` drafts finished after the round already had a winner and
+    were thrown away unreviewed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {
+            "rounds": 0,
+            "accepted": 0,
+            "edited": 0,
+            "drafts": 0,
+            "critiques": 0,
+            "wasted": 0,
+        }
+
+    def add(self, key: str, count: int = 1) -> None:
+        with self._lock:
+            self.counts[key] += count
+
+    def summary(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        rounds = counts["rounds"]
+        return {
+            **counts,
+            "drafts_per_round": counts["drafts"] / rounds if rounds else 0.0,
+            "accept_rate": counts["accepted"] / rounds if rounds else 0.0,
+        }
+
+
+def _rank(result: Speculation) -> tuple:
+    # Without an accepted draft, edit the one with the shortest revision
+    # request, preferring LLM critiques over pre-critic rejections.
+    return (result.verdict == "reject", len(result.critique.split()), result.index)
+
+
+def speculate(
+    drafts: int,
+    make_draft: Callable[[int], str],
+    review: Callable[[str], tuple[Review, str]],
+    stats: SpeculationStats | None = None,
+) -> Speculation:
+    """Run ``drafts`` draft-then-review attempts concurrently.
+
+    ``make_draft(i)`` writes draft ``i``; ``review(draft)`` returns its
+    verdict and critique. Returns the first accepted draft as soon as it is
+    known, without waiting for the others, or else the best-ranked reviewed
+    draft. Attempts that raise are ignored unless every attempt does.
+    """
+    stats = stats or SpeculationStats()
+    won = threading.Event()
+
+    def attempt(index: int) -> Speculation | None:
+        # Runs in its own context copy, so this only tags this attempt's calls.
+        config = var_child_runnable_config.get() or {}
+        metadata = {**config.get("metadata", {}), DRAFT_METADATA_KEY: index}
+        var_child_runnable_config.set({**config, "metadata": metadata})
+        stats.add("drafts")
+        draft = make_draft(index)
+        if won.is_set():
+            stats.add("wasted")
+            return None
+        stats.add("critiques")
+        verdict, critique = review(draft)
+        return Speculation(draft, verdict, critique, index)
+
+    stats.add("rounds")
+    pool = ThreadPoolExecutor(max_workers=drafts, thread_name_prefix="draft")
+    # One context copy per attempt: a Context can't be entered by two threads.
+    futures = [
+        pool.submit(contextvars.copy_context().run, attempt, index) for index in range(drafts)
+    ]
+    reviewed: list[Speculation] = []
+    errors: list[Exception] = []
+    try:
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as exc:  # one failed draft doesn't sink the round
+                errors.append(exc)
+                continue
+            if result is None:
+                continue
+            if result.verdict == "accept":
+                won.set()
+                stats.add("accepted")
+                return result
+            reviewed.append(result)
+    finally:
+        # Stragglers finish in the background.
+        pool.shutdown(wait=False)
+    if not reviewed:
+        raise errors[0]
+    stats.add("edited")
+    return min(reviewed, key=_rank)
@@ -0,0 +1,153 @@
+"""Token streaming for the agent graphs, with time-to-first-token metrics."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, Literal
+
+from typing_extensions import TypedDict
+
+from agents.speculative import DRAFT_METADATA_KEY
+
+STREAM_MODES = ["messages", "updates"]
+
+
+class StreamEvent(TypedDict, total=False):
+    """One item yielded by ``run_stream``/``astream``.
+
+    ``token`` events carry a chunk of generated text for ``node``, and
+    ``draft`` when it comes from one of several speculative drafts (see
+    :mod:`agents.speculative`); ``node_end`` events carry the state update a
+    node returned; the final ``done`` event carries the agent's output.
+    """
+
+    type: Literal["token", "node_end", "done"]
+    node: str
+    content: str
+    draft: int
+    update: dict
+    output: dict
+
+
+class StreamMetrics:
+    """Time-to-first-token and tokens/sec per (node, model)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: dict[tuple[str, str], list[dict]] = {}
+
+    def record(self, node: str, model: str, ttft: float, tokens: int, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault((node, model), []).append(
+                {"ttft": ttft, "tokens": tokens, "seconds": seconds}
+            )
+
+    def summary(self) -> dict:
+        out = {}
+        with self._lock:
+            for (node, model), runs in self.samples.items():
+                tokens = sum(r["tokens"] for r in runs)
+                seconds = sum(r["seconds"] for r in runs)
+                out[f"{node}/{model}"] = {
+                    "calls": len(runs),
+                    "avg_ttft": sum(r["ttft"] for r in runs) / len(runs),
+                    "tokens_per_sec": tokens / seconds if seconds else 0.0,
+                }
+        return out
+
+
+class _NodeTimer:
+    """Track token timings for the node currently generating."""
+
+    def __init__(self, metrics: StreamMetrics | None, default_model: str):
+        self.metrics = metrics
+        self.default_model = default_model
+        self.node_started = time.perf_counter()
+        self.first_token: float | None = None
+        self.tokens = 0
+        self.model = default_model
+
+    def token(self, metadata: dict) -> None:
+        now = time.perf_counter()
+        if self.first_token is None:
+            self.first_token = now
+            self.model = metadata.get("ls_model_name") or self.default_model
+        self.tokens += 1
+
+    def node_end(self, node: str) -> None:
+        now = time.perf_counter()
+        if self.metrics is not None and self.first_token is not None:
+            self.metrics.record(
+                node,
+                self.model,
+                ttft=self.first_token - self.node_started,
+                tokens=self.tokens,
+                seconds=max(now - self.first_token, 1e-9),
+            )
+        self.node_started = now
+        self.first_token = None
+        self.tokens = 0
+        self.model = self.default_model
+
+
+def _handle(
+    mode: str, chunk: Any, state: dict, timer: _NodeTimer
+) -> Iterator[StreamEvent]:
+    if mode == "messages":
+        message, metadata = chunk
+        if message.content:
+            timer.token(metadata)
+            event: StreamEvent = {
+                "type": "token",
+                "node": metadata.get("langgraph_node", ""),
+                "content": message.content,
+            }
+            if DRAFT_METADATA_KEY in metadata:
+                event["draft"] = metadata[DRAFT_METADATA_KEY]
+            yield event
+    elif mode == "updates":
+        for node, update in chunk.items():
+            timer.node_end(node)
+            if update:
+                state.update(update)
+            yield {"type": "node_end", "node": node, "update": update or {}}
+
+
+def stream_graph(
+    graph: Any,
+    inputs: dict | None,
+    output_keys: tuple[str, ...],
+    metrics: StreamMetrics | None = None,
+    model_name: str = "unknown",
+    config: dict | None = None,
+    initial: dict | None = None,
+) -> Iterator[StreamEvent]:
+    """Stream tokens and node updates from a compiled graph.
+
+    ``inputs`` may be ``None`` to continue a checkpointed thread, in which
+    case ``initial`` seeds the state the final output is read from.
+    """
+    state = dict(initial if initial is not None else inputs)
+    timer = _NodeTimer(metrics, model_name)
+    for mode, chunk in graph.stream(inputs, config=config, stream_mode=STREAM_MODES):
+        yield from _handle(mode, chunk, state, timer)
+    yield {"type": "done", "output": {key: state.get(key) for key in output_keys}}
+
+
+async def astream_graph(
+    graph: Any,
+    inputs: dict | None,
+    output_keys: tuple[str, ...],
+    metrics: StreamMetrics | None = None,
+    model_name: str = "unknown",
+    config: dict | None = None,
+    initial: dict | None = None,
+) -> AsyncIterator[StreamEvent]:
+    """Async variant of :func:`stream_graph`."""
+    state = dict(initial if initial is not None else inputs)
+    timer = _NodeTimer(metrics, model_name)
+    async for mode, chunk in graph.astream(inputs, config=config, stream_mode=STREAM_MODES):
+        for event in _handle(mode, chunk, state, timer):
+            yield event
+    yield {"type": "done", "output": {key: state.get(key) for key in output_keys}}
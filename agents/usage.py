@@ -0,0 +1,144 @@
+"""Per-node token accounting, including prompt-cache hits."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Sequence
+
+from utils.metrics import count_message_tokens, count_tokens
+
+if TYPE_CHECKING:
+    from utils.metrics import MetricsRegistry
+
+
+def extract_usage(response: Any) -> dict[str, int]:
+    """Read input, cached-input and output token counts from an LLM response.
+
+    Uses LangChain's ``usage_metadata`` when present and falls back to the raw
+    OpenAI ``token_usage`` block. Responses without usage (stubs, cache hits)
+    count as zero.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        details = usage.get("input_token_details") or {}
+        return {
+            "input_tokens": int(usage.get("input_tokens") or 0),
+            "cached_tokens": int(details.get("cache_read") or 0),
+            "output_tokens": int(usage.get("output_tokens") or 0),
+        }
+    metadata = getattr(response, "response_metadata", None) or {}
+    return usage_from_openai(metadata.get("token_usage") or {})
+
+
+def usage_from_openai(raw: dict) -> dict[str, int]:
+    """Token counts from an OpenAI ``usage`` block (chat and batch responses)."""
+    details = raw.get("prompt_tokens_details") or {}
+    return {
+        "input_tokens": int(raw.get("prompt_tokens") or 0),
+        "cached_tokens": int(details.get("cached_tokens") or 0),
+        "output_tokens": int(raw.get("completion_tokens") or 0),
+    }
+
+
+def response_model(llm: Any, response: Any) -> str:
+    """Name of the model that produced ``response``, as reported by the provider."""
+    metadata = getattr(response, "response_metadata", None) or {}
+    return metadata.get("model_name") or getattr(llm, "model_name", None) or "unknown"
+
+
+class UsageLedger:
+    """Thread-safe running totals of LLM calls and tokens per agent node.
+
+    When ``metrics`` is given, every call is also reported to it under
+    ``agent``, together with the model name and an estimated cost. Responses
+    without usage data are counted with tiktoken instead; responses served
+    from the local LLM cache count as free.
+    """
+
+    def __init__(self, metrics: MetricsRegistry | None = None, agent: str = ""):
+        self._lock = threading.Lock()
+        self.nodes: dict[str, dict[str, float]] = {}
+        self.verdicts: dict[str, dict[str, int]] = {}
+        self.metrics = metrics
+        self.agent = agent
+
+    def invoke(self, llm: Any, node: str, messages: Sequence[Any], **kwargs) -> Any:
+        """Call ``llm.invoke(messages, **kwargs)`` and record its usage under ``node``."""
+        messages = list(messages)
+        started = time.perf_counter()
+        response = llm.invoke(messages, **kwargs)
+        seconds = time.perf_counter() - started
+
+        metadata = getattr(response, "response_metadata", None) or {}
+        model = response_model(llm, response)
+        usage = extract_usage(response)
+        estimated = False
+        missing = not usage["input_tokens"] and not usage["output_tokens"]
+        if missing and not metadata.get("cache_hit"):
+            content = getattr(response, "content", "")
+            usage["input_tokens"] = count_message_tokens(messages, model)
+            usage["output_tokens"] = count_tokens(content if isinstance(content, str) else "", model)
+            estimated = True
+
+        self.observe(node, model, usage, seconds, estimated=estimated)
+        return response
+
+    def observe(
+        self,
+        node: str,
+        model: str,
+        usage: dict[str, int],
+        seconds: float,
+        estimated: bool = False,
+        batch: bool = False,
+    ) -> None:
+        """Record a call made outside :meth:`invoke`, e.g. one served by a batch.
+
+        ``batch`` prices the call at the provider's batch discount.
+        """
+        self.record(node, usage, seconds)
+        if self.metrics is not None:
+            self.metrics.observe_llm(
+                self.agent,
+                node,
+                model,
+                seconds,
+                usage["input_tokens"],
+                usage["output_tokens"],
+                usage["cached_tokens"],
+                estimated=estimated,
+                batch=batch,
+            )
+
+    def observe_verdict(self, model: str, accepted: bool) -> None:
+        """Record whether an LLM critique by ``model`` accepted the draft."""
+        with self._lock:
+            counts = self.verdicts.setdefault(model, {"accept": 0, "revise": 0})
+            counts["accept" if accepted else "revise"] += 1
+        if self.metrics is not None:
+            self.metrics.observe_verdict(self.agent, model, accepted)
+
+    def record(self, node: str, usage: dict[str, int], seconds: float = 0.0) -> None:
+        with self._lock:
+            totals = self.nodes.setdefault(
+                node,
+                {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "seconds": 0.0},
+            )
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+            for key in ("input_tokens", "cached_tokens", "output_tokens"):
+                totals[key] += usage.get(key, 0)
+
+    def summary(self) -> dict:
+        """Totals per node, with uncached input tokens and the cache hit rate."""
+        out = {}
+        with self._lock:
+            for node, totals in self.nodes.items():
+                inputs = totals["input_tokens"]
+                out[node] = {
+                    **totals,
+                    "uncached_tokens": inputs - totals["cached_tokens"],
+                    "cache_hit_rate": totals["cached_tokens"] / inputs if inputs else 0.0,
+                }
+        return out
@@ -3,6 +3,8 @@ from __future__ import annotations
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# For migration_helpers, shared by the revision scripts.
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
 from logging.config import fileConfig
 
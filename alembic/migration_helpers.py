@@ -0,0 +1,25 @@
+"""Helpers shared by migration scripts.
+
+Kept apart from the application packages so that a revision's behaviour
+never changes after it ships. ``env.py`` puts this directory on
+``sys.path``.
+"""
+
+BACKFILL_BATCH = 1000
+
+
+def pages(bind, query, key, batch_size=BACKFILL_BATCH):
+    """Yield pages of ``query`` rows in ``key`` order, keyset-paginated.
+
+    ``key`` must be the first selected column.
+    """
+    last = None
+    while True:
+        page_query = query.order_by(key).limit(batch_size)
+        if last is not None:
+            page_query = page_query.where(key > last)
+        rows = bind.execute(page_query).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
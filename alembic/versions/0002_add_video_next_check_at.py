@@ -0,0 +1,26 @@
+"""add next_check_at to videos for adaptive polling
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-06-01 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('next_check_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_videos_status_next_check_at', 'videos', ['status', 'next_check_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_videos_status_next_check_at', table_name='videos')
+    op.drop_column('videos', 'next_check_at')
@@ -0,0 +1,23 @@
+"""index videos on status and created_at
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-06-15 00:00:00
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_videos_status_created_at', 'videos', ['status', 'created_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_videos_status_created_at', table_name='videos')
@@ -0,0 +1,61 @@
+"""add proverb_hash to videos for batch deduplication
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-07-01 00:00:00
+"""
+
+import hashlib
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+from migration_helpers import pages
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+videos = sa.table(
+    'videos',
+    sa.column('id', sa.String),
+    sa.column('proverb', sa.String),
+    sa.column('proverb_hash', sa.String),
+)
+
+
+# Frozen copy of db.utils.proverb_hash as of this revision, so a later change
+# to the live normalisation can't change what this migration writes.
+def _proverb_hash(proverb: str) -> str:
+    text = unicodedata.normalize('NFKC', proverb).casefold()
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('proverb_hash', sa.String(length=64), nullable=True))
+
+    bind = op.get_bind()
+    update = (
+        sa.update(videos)
+        .where(videos.c.id == sa.bindparam('video_id'))
+        .values(proverb_hash=sa.bindparam('digest'))
+    )
+    query = sa.select(videos.c.id, videos.c.proverb)
+    for rows in pages(bind, query, videos.c.id):
+        bind.execute(
+            update,
+            [{'video_id': row.id, 'digest': _proverb_hash(row.proverb)} for row in rows],
+        )
+
+    op.create_index('ix_videos_proverb_hash', 'videos', ['proverb_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_videos_proverb_hash', table_name='videos')
+    op.drop_column('videos', 'proverb_hash')
@@ -0,0 +1,45 @@
+"""create jobs table for the distributed worker queue
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-07-15 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('proverb', sa.String(), nullable=False),
+        sa.Column('proverb_hash', sa.String(length=64), nullable=False),
+        sa.Column('test', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('status', sa.String(), nullable=False, server_default='queued'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='5'),
+        sa.Column('available_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('locked_by', sa.String(), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('video_id', sa.String(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_jobs_status_available_at', 'jobs', ['status', 'available_at'])
+    op.create_index('ix_jobs_status_lease_expires_at', 'jobs', ['status', 'lease_expires_at'])
+    op.create_index('ix_jobs_proverb_hash', 'jobs', ['proverb_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_proverb_hash', table_name='jobs')
+    op.drop_index('ix_jobs_status_lease_expires_at', table_name='jobs')
+    op.drop_index('ix_jobs_status_available_at', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,113 @@
+"""move story and screenplay to a compressed video_content table
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-08-01 00:00:00
+
+On PostgreSQL the space of the dropped columns is only returned to the
+operating system by ``VACUUM FULL videos`` (or pg_repack); plain VACUUM
+makes it reusable for new rows.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+import zstandard
+
+from migration_helpers import pages
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+videos = sa.table(
+    'videos',
+    sa.column('id', sa.String),
+    sa.column('story', sa.Text),
+    sa.column('screenplay', sa.Text),
+)
+
+content = sa.table(
+    'video_content',
+    sa.column('video_id', sa.String),
+    sa.column('story', sa.LargeBinary),
+    sa.column('screenplay', sa.LargeBinary),
+)
+
+
+# Frozen copy of the db.types codec as of this revision, so a later change to
+# the live codec or its framing can't change what this migration writes.
+def _compress(value):
+    if value is None:
+        return None
+    return zstandard.compress(value.encode('utf-8'), 3)
+
+
+def _decompress(value):
+    if value is None:
+        return None
+    return zstandard.decompress(bytes(value)).decode('utf-8')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'video_content',
+        sa.Column(
+            'video_id',
+            sa.String(),
+            sa.ForeignKey('videos.id', ondelete='CASCADE'),
+            primary_key=True,
+        ),
+        sa.Column('story', sa.LargeBinary(), nullable=True),
+        sa.Column('screenplay', sa.LargeBinary(), nullable=True),
+    )
+
+    bind = op.get_bind()
+    query = sa.select(videos.c.id, videos.c.story, videos.c.screenplay).where(
+        sa.or_(videos.c.story.isnot(None), videos.c.screenplay.isnot(None))
+    )
+    for rows in pages(bind, query, videos.c.id):
+        bind.execute(
+            content.insert(),
+            [
+                {
+                    'video_id': row.id,
+                    'story': _compress(row.story),
+                    'screenplay': _compress(row.screenplay),
+                }
+                for row in rows
+            ],
+        )
+
+    with op.batch_alter_table('videos') as batch:
+        batch.drop_column('story')
+        batch.drop_column('screenplay')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('videos') as batch:
+        batch.add_column(sa.Column('story', sa.Text(), nullable=True))
+        batch.add_column(sa.Column('screenplay', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    update = (
+        sa.update(videos)
+        .where(videos.c.id == sa.bindparam('video_id'))
+        .values(story=sa.bindparam('story_text'), screenplay=sa.bindparam('screenplay_text'))
+    )
+    query = sa.select(content.c.video_id, content.c.story, content.c.screenplay)
+    for rows in pages(bind, query, content.c.video_id):
+        bind.execute(
+            update,
+            [
+                {
+                    'video_id': row.video_id,
+                    'story_text': _decompress(row.story),
+                    'screenplay_text': _decompress(row.screenplay),
+                }
+                for row in rows
+            ],
+        )
+
+    op.drop_table('video_content')
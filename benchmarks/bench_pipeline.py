@@ -0,0 +1,267 @@
+"""End-to-end pipeline throughput benchmark, fully offline.
+
+Drives :class:`AgentOrchestrator` through the batch runner with a
+deterministic fake chat model (configurable latency and output length), the
+local Synthesia simulator (reached through the real ``SynthesiaClient``) and a
+throwaway database. It sweeps quote count, concurrency and batch mode, and
+reports quotes/sec, per-stage latency percentiles and peak RSS for each run.
+
+    python -m benchmarks.bench_pipeline --quotes 20,100 --concurrency 1,4,16
+    python -m benchmarks.bench_pipeline --modes pipeline --llm-latency 0.2 \\
+        --json bench_pipeline.json
+
+Results carry the git commit so JSON files from different commits can be
+compared. A ``--database-url`` database is dropped and recreated, so never
+point this at a database holding real data.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.fakes import FakeChatModel
+from db import Base, BufferedVideoWriter
+from jobs.batch_runner import ProgressJournal, run_batch, run_batch_pipelined
+from utils import MetricsRegistry, SimulatorConfig, SynthesiaClient, SynthesiaSimulator
+
+MODES = ("threads", "pipeline")
+
+
+class RssSampler:
+    """Track the peak resident set size of this process during a block."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    @staticmethod
+    def current_bytes() -> int:
+        try:
+            with open("/proc/self/status", encoding="ascii") as fh:
+                for line in fh:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        # No procfs (e.g. macOS): fall back to the lifetime peak.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, self.current_bytes())
+
+    def __enter__(self) -> "RssSampler":
+        self.peak_bytes = self.current_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self.current_bytes())
+
+
+def git_commit() -> dict:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {
+            "commit": git("rev-parse", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        }
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "unknown", "dirty": None}
+
+
+def make_orchestrator(args: argparse.Namespace, base_url: str):
+    from agent_orchestrator import AgentOrchestrator
+
+    llm = FakeChatModel(
+        latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        revise_rate=args.revise_rate,
+        seed=args.seed,
+    )
+    metrics = MetricsRegistry()
+    client = SynthesiaClient(
+        api_key="offline-benchmark", base_url=base_url, max_retries=10, metrics=metrics
+    )
+    return AgentOrchestrator(
+        prompts_dir=args.prompts_dir, llm=llm, synthesia_client=client, metrics=metrics
+    )
+
+
+def simulator_config(args: argparse.Namespace) -> SimulatorConfig:
+    return SimulatorConfig(
+        latency=args.synthesia_latency,
+        rate_limit=args.synthesia_rate_limit,
+        error_burst_rate=args.synthesia_error_rate,
+        error_burst_seconds=0.5,
+        seed=args.seed,
+    )
+
+
+def run_once(
+    args: argparse.Namespace,
+    engine,
+    Session,
+    workdir: str,
+    quotes: int,
+    concurrency: int,
+    mode: str,
+) -> dict:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    journal_path = os.path.join(workdir, f"journal-{mode}-{quotes}-{concurrency}.jsonl")
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+    journal = ProgressJournal(journal_path)
+    batch = [f"Benchmark proverb number {i}" for i in range(quotes)]
+
+    writer = None
+    if args.db_batch_size > 0:
+        size = args.db_batch_size if mode == "pipeline" else min(args.db_batch_size, concurrency)
+        writer = BufferedVideoWriter(Session, max_rows=size)
+
+    with SynthesiaSimulator(simulator_config(args)) as simulator, RssSampler() as rss:
+        orchestrator = make_orchestrator(args, simulator.base_url)
+        if mode == "pipeline":
+            workers = {
+                "story": concurrency,
+                "screenplay": concurrency,
+                "video": max(1, concurrency // 2),
+            }
+            if writer is None:
+                workers["db"] = 1
+            stats, stages = run_batch_pipelined(
+                orchestrator,
+                batch,
+                journal,
+                Session,
+                workers=workers,
+                queue_size=args.queue_size,
+                writer=writer,
+            )
+        else:
+            stats = run_batch(
+                orchestrator, batch, journal, Session, concurrency=concurrency, writer=writer
+            )
+            stages = {}
+        if writer is not None:
+            writer.close()
+
+    summary = stats.summary()
+    return {
+        "mode": mode,
+        "quotes": quotes,
+        "concurrency": concurrency,
+        "succeeded": summary["succeeded"],
+        "failed": summary["failed"],
+        "elapsed_seconds": summary["elapsed_seconds"],
+        "quotes_per_second": summary["succeeded"] / summary["elapsed_seconds"]
+        if summary["elapsed_seconds"]
+        else 0.0,
+        "stages": summary["stages"],
+        "pipeline": stages,
+        "llm_calls": orchestrator.llm.calls,
+        "peak_rss_mib": rss.peak_bytes / 2**20,
+        "metrics": orchestrator.metrics.snapshot(),
+        "synthesia": {**simulator.stats(), "client": orchestrator.synthesia_client.stats()},
+        "db_writes": writer.stats() if writer is not None else None,
+    }
+
+
+def parse_ints(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quotes", type=parse_ints, default=[20, 100])
+    parser.add_argument("--concurrency", type=parse_ints, default=[1, 4, 16])
+    parser.add_argument("--modes", type=lambda v: v.split(","), default=list(MODES))
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--output-tokens", type=int, default=400)
+    parser.add_argument("--revise-rate", type=float, default=0.3)
+    parser.add_argument("--synthesia-latency", type=float, default=0.02)
+    parser.add_argument("--synthesia-rate-limit", type=float, default=None)
+    parser.add_argument("--synthesia-error-rate", type=float, default=0.0)
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument(
+        "--db-batch-size", type=int, default=50, help="Videos per bulk insert; 0 commits each."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prompts-dir", default="data/prompts")
+    parser.add_argument(
+        "--database-url", default=None, help="Default: a SQLite file in a temporary directory."
+    )
+    parser.add_argument("--json", type=str, default=None, help="Write results to this file.")
+    args = parser.parse_args()
+
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as workdir:
+        url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        engine = create_engine(url)
+        Session = sessionmaker(bind=engine)
+        runs = []
+        print(
+            f"{'mode':<10}{'quotes':>7}{'conc':>6}{'q/s':>10}"
+            f"{'story p95':>10}{'video p95':>10}{'RSS MiB':>10}"
+        )
+        for mode in args.modes:
+            for quotes in args.quotes:
+                for concurrency in args.concurrency:
+                    runs.append(
+                        run_once(args, engine, Session, workdir, quotes, concurrency, mode)
+                    )
+                    row = runs[-1]
+                    print(
+                        f"{mode:<10}{quotes:>7}{concurrency:>6}{row['quotes_per_second']:>10.2f}"
+                        f"{row['stages']['story']['p95']:>10.3f}"
+                        f"{row['stages']['video']['p95']:>10.3f}{row['peak_rss_mib']:>10.1f}",
+                        flush=True,
+                    )
+        engine.dispose()
+
+    results = {
+        **git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "settings": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in {"json", "database_url"}
+        },
+        "runs": runs,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
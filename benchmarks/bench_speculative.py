@@ -0,0 +1,139 @@
+"""Latency against token cost of speculative drafting, fully offline.
+
+Runs the story and screenplay agents for a set of quotes once per draft
+count K, on the deterministic fake chat model, and reports per-quote latency
+percentiles next to tokens and estimated cost per quote. K=1 is the plain
+sequential graph; with K>1 each agent races K drafts through critique (see
+:mod:`agents.speculative`).
+
+    python -m benchmarks.bench_speculative --drafts 1,2,3,4 --quotes 200
+    python -m benchmarks.bench_speculative --revise-rate 0.5 --json bench_speculative.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_orchestrator import AgentOrchestrator
+from benchmarks.bench_pipeline import git_commit, parse_ints
+from benchmarks.fakes import FakeChatModel
+from utils.metrics import percentile
+
+
+def wait_for_stragglers(timeout: float = 60.0) -> None:
+    """Let drafts that lost a race finish, so their tokens are counted."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not any(t.name.startswith("draft") for t in threading.enumerate()):
+            return
+        time.sleep(0.01)
+
+
+def run_once(args: argparse.Namespace, drafts: int) -> dict:
+    llm = FakeChatModel(
+        latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        revise_rate=args.revise_rate,
+        jitter=args.jitter,
+        model_name=args.model,
+        seed=args.seed,
+    )
+    orchestrator = AgentOrchestrator(
+        llm=llm,
+        model_name=args.model,
+        prompts_dir=args.prompts_dir,
+        drafts=drafts,
+        synthesia_client=object(),
+    )
+
+    def produce(quote: str) -> float:
+        started = time.perf_counter()
+        story = orchestrator.generate_story(quote)["story"]
+        orchestrator.generate_screenplay(story, quote)
+        return time.perf_counter() - started
+
+    quotes = [f"benchmark proverb {i}" for i in range(args.quotes)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(produce, quotes))
+    elapsed = time.perf_counter() - started
+    wait_for_stragglers()
+
+    tokens = sum(
+        row["input_tokens"] + row["output_tokens"]
+        for nodes in orchestrator.usage_report().values()
+        for row in nodes.values()
+    )
+    speculation = orchestrator.speculation_stats()
+    rounds = sum(row["rounds"] for row in speculation.values())
+    return {
+        "drafts": drafts,
+        "quotes": args.quotes,
+        "elapsed_seconds": elapsed,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_max": max(latencies),
+        "tokens_per_quote": tokens / args.quotes,
+        "cost_per_quote_usd": orchestrator.metrics.snapshot()["total_cost_usd"] / args.quotes,
+        "llm_calls": llm.calls,
+        "accept_rate": (
+            sum(row["accepted"] for row in speculation.values()) / rounds if rounds else None
+        ),
+        "wasted_drafts": sum(row["wasted"] for row in speculation.values()),
+        "speculation": speculation,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drafts", type=parse_ints, default=[1, 2, 3, 4])
+    parser.add_argument("--quotes", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--output-tokens", type=int, default=400)
+    parser.add_argument("--revise-rate", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--model", default="gpt-4o", help="Model name used for pricing.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prompts-dir", default="data/prompts")
+    parser.add_argument("--json", type=str, default=None, help="Write results to this file.")
+    args = parser.parse_args()
+
+    runs = []
+    print(
+        f"{'K':>3}{'p50 s':>9}{'p95 s':>9}{'max s':>9}{'tokens/q':>10}"
+        f"{'$/q':>9}{'calls':>7}{'accept %':>10}{'wasted':>8}"
+    )
+    for drafts in args.drafts:
+        row = run_once(args, drafts)
+        runs.append(row)
+        accept = f"{row['accept_rate'] * 100:.1f}" if row["accept_rate"] is not None else "-"
+        print(
+            f"{drafts:>3}{row['latency_p50']:>9.3f}{row['latency_p95']:>9.3f}"
+            f"{row['latency_max']:>9.3f}{row['tokens_per_quote']:>10.0f}"
+            f"{row['cost_per_quote_usd']:>9.4f}{row['llm_calls']:>7}{accept:>10}"
+            f"{row['wasted_drafts']:>8}",
+            flush=True,
+        )
+
+    if args.json:
+        results = {
+            **git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "settings": {key: value for key, value in vars(args).items() if key != "json"},
+            "runs": runs,
+        }
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
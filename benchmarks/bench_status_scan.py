@@ -0,0 +1,135 @@
+"""Benchmark the status poller's scan of the ``videos`` table.
+
+Compares the original full-ORM scan (``query(Video).filter(...).all()``)
+with the paged id/status scan used by :func:`iter_due_videos`, with and
+without the ``(status, created_at)`` index, reporting wall time and peak
+Python memory for each.
+
+    python -m benchmarks.bench_status_scan --rows 1000000
+    python -m benchmarks.bench_status_scan --rows 1000000 \\
+        --database-url postgresql://ai:ai@localhost:5432/aiinfluencer_bench
+
+The target database is dropped and recreated, so never point this at a
+database holding real data.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from db import Base, models
+from jobs.video_status_updater import iter_due_videos
+
+INDEXES = ("ix_videos_status_created_at", "ix_videos_status_next_check_at")
+
+
+def populate(engine, rows: int, in_progress_ratio: float, text_bytes: int) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    story = "s" * text_bytes
+    screenplay = "c" * (text_bytes // 2)
+    every = max(1, round(1 / in_progress_ratio)) if in_progress_ratio else 0
+    start = datetime(2024, 1, 1)
+    batch, contents = [], []
+    with engine.begin() as conn:
+        for i in range(rows):
+            batch.append(
+                {
+                    "id": f"v{i:09d}",
+                    "proverb": f"proverb {i}",
+                    "status": "in_progress" if every and i % every == 0 else "complete",
+                    "created_at": start + timedelta(seconds=i),
+                }
+            )
+            contents.append({"video_id": f"v{i:09d}", "story": story, "screenplay": screenplay})
+            if len(batch) == 10_000:
+                conn.execute(insert(models.Video), batch)
+                conn.execute(insert(models.VideoContent), contents)
+                batch, contents = [], []
+        if batch:
+            conn.execute(insert(models.Video), batch)
+            conn.execute(insert(models.VideoContent), contents)
+
+
+def measure(fn) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - started
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"rows": count, "seconds": elapsed, "peak_mib": peak / 2**20}
+
+
+def legacy_scan(Session) -> int:
+    session = Session()
+    try:
+        videos = session.query(models.Video).filter(models.Video.status == "in_progress").all()
+        return len(videos)
+    finally:
+        session.close()
+
+
+def paged_scan(Session, page_size: int) -> int:
+    session = Session()
+    try:
+        return sum(len(page) for page in iter_due_videos(session, datetime.max, page_size))
+    finally:
+        session.close()
+
+
+def set_indexes(engine, present: bool) -> None:
+    with engine.begin() as conn:
+        for name in INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    if present:
+        for index in models.Video.__table__.indexes:
+            if index.name in INDEXES:
+                index.create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite:///bench_status_scan.db")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--in-progress-ratio", type=float, default=0.01)
+    parser.add_argument("--text-bytes", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--skip-populate", action="store_true")
+    parser.add_argument("--json", type=str, default=None, help="Write results to this file.")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Session = sessionmaker(bind=engine)
+    if not args.skip_populate:
+        started = time.perf_counter()
+        populate(engine, args.rows, args.in_progress_ratio, args.text_bytes)
+        print(f"Populated {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+    results = {"database": engine.dialect.name, "rows": args.rows}
+    for indexed in (False, True):
+        set_indexes(engine, indexed)
+        label = "indexed" if indexed else "no_index"
+        results[f"legacy_{label}"] = measure(lambda: legacy_scan(Session))
+        results[f"paged_{label}"] = measure(lambda: paged_scan(Session, args.page_size))
+
+    print(f"{'scan':<20}{'rows':>10}{'seconds':>10}{'peak MiB':>10}")
+    for name, row in results.items():
+        if isinstance(row, dict):
+            print(f"{name:<20}{row['rows']:>10}{row['seconds']:>10.3f}{row['peak_mib']:>10.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Compare inline and compressed, split-out storage of story and screenplay.
+
+Builds the ``videos`` table twice with the same rows: once in the old layout
+(story and screenplay as plain ``Text`` columns of ``videos``) and once in
+the current one (compressed in ``video_content``). For each it reports the
+size of the tables and the time of three reads: a full scan of ``videos``
+(as any unindexed filter or aggregate does), the status job's paged
+due-video scan, and loading every in-progress ``videos`` row.
+
+    python -m benchmarks.bench_storage --rows 200000
+    python -m benchmarks.bench_storage --rows 200000 \\
+        --database-url postgresql://ai:ai@localhost:5432/aiinfluencer_bench
+
+The target database is dropped and recreated, so never point this at a
+database holding real data.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    MetaData,
+    String,
+    Table,
+    Text,
+    create_engine,
+    func,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.orm import sessionmaker
+
+from db import Base, models
+from jobs.video_status_updater import iter_due_videos
+
+_WORDS = (
+    "the a fox river lantern quiet morning village clock baker small brave learned "
+    "kept waited promise friend garden mountain listened gently and said to her his "
+    "was were old young bright dark rain harvest patience stitch time saves nine"
+).split()
+
+legacy_metadata = MetaData()
+legacy_videos = Table(
+    "videos",
+    legacy_metadata,
+    Column("id", String, primary_key=True),
+    Column("proverb", String, nullable=False),
+    Column("proverb_hash", String(64)),
+    Column("story", Text),
+    Column("screenplay", Text),
+    Column("status", String, nullable=False),
+    Column("created_at", DateTime),
+    Column("next_check_at", DateTime),
+)
+
+
+def prose(rng: random.Random, chars: int) -> str:
+    # About five characters per word and separator on average.
+    return " ".join(rng.choices(_WORDS, k=chars // 5 + 1))[:chars]
+
+
+def rows(count: int, in_progress_ratio: float, story_chars: int, seed: int):
+    rng = random.Random(seed)
+    every = max(1, round(1 / in_progress_ratio)) if in_progress_ratio else 0
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        yield {
+            "id": f"v{i:09d}",
+            "proverb": f"proverb {i}",
+            "story": prose(rng, story_chars),
+            "screenplay": prose(rng, story_chars * 2 // 3),
+            "status": "in_progress" if every and i % every == 0 else "complete",
+            "created_at": start + timedelta(seconds=i),
+        }
+
+
+def populate(engine, layout: str, args: argparse.Namespace) -> None:
+    legacy_metadata.drop_all(bind=engine)
+    Base.metadata.drop_all(bind=engine)
+    if layout == "inline":
+        legacy_metadata.create_all(bind=engine)
+        # Same indexes as the current videos table.
+        for index in models.Video.__table__.indexes:
+            with engine.begin() as conn:
+                conn.execute(
+                    text(
+                        f"CREATE INDEX {index.name} ON videos "
+                        f"({', '.join(column.name for column in index.columns)})"
+                    )
+                )
+    else:
+        Base.metadata.create_all(bind=engine)
+
+    def flush(conn, batch):
+        if layout == "inline":
+            conn.execute(insert(legacy_videos), batch)
+            return
+        conn.execute(
+            insert(models.Video),
+            [{k: v for k, v in row.items() if k not in ("story", "screenplay")} for row in batch],
+        )
+        conn.execute(
+            insert(models.VideoContent),
+            [
+                {"video_id": row["id"], "story": row["story"], "screenplay": row["screenplay"]}
+                for row in batch
+            ],
+        )
+
+    with engine.begin() as conn:
+        batch = []
+        for row in rows(args.rows, args.in_progress_ratio, args.story_chars, args.seed):
+            batch.append(row)
+            if len(batch) == 5_000:
+                flush(conn, batch)
+                batch = []
+        if batch:
+            flush(conn, batch)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE" if engine.dialect.name == "postgresql" else "ANALYZE"))
+
+
+def table_sizes(engine) -> dict[str, int]:
+    """Bytes used by each table, including its indexes and out-of-line data."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            names = conn.execute(
+                text("SELECT tablename FROM pg_tables WHERE schemaname = current_schema()")
+            ).scalars()
+            return {
+                name: conn.execute(
+                    text("SELECT pg_total_relation_size(:name)"), {"name": name}
+                ).scalar()
+                for name in names
+                if name in ("videos", "video_content")
+            }
+        sizes = conn.execute(
+            text(
+                "SELECT coalesce(m.tbl_name, d.name) AS tbl, SUM(d.pgsize) FROM dbstat d "
+                "LEFT JOIN sqlite_master m ON m.name = d.name GROUP BY tbl"
+            )
+        ).all()
+        return {name: size for name, size in sizes if name in ("videos", "video_content")}
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure(engine, layout: str, args: argparse.Namespace) -> dict:
+    Session = sessionmaker(bind=engine)
+    table = legacy_videos if layout == "inline" else models.Video.__table__
+
+    def full_scan():
+        with engine.connect() as conn:
+            conn.execute(select(func.max(func.length(table.c.proverb)))).all()
+
+    def due_scan():
+        session = Session()
+        try:
+            return sum(len(page) for page in iter_due_videos(session, datetime.max))
+        finally:
+            session.close()
+
+    def load_in_progress():
+        # Every column of the videos row: what an ORM load of Video fetches.
+        with engine.connect() as conn:
+            conn.execute(select(table).where(table.c.status == "in_progress")).all()
+
+    sizes = table_sizes(engine)
+    return {
+        "layout": layout,
+        "table_bytes": sizes,
+        "total_bytes": sum(sizes.values()),
+        "full_scan_seconds": timed(full_scan, args.repeat),
+        "due_scan_seconds": timed(due_scan, args.repeat),
+        "load_in_progress_seconds": timed(load_in_progress, args.repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="Default: a temporary SQLite file.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--in-progress-ratio", type=float, default=0.01)
+    parser.add_argument("--story-chars", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=str, default=None, help="Write results to this file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_storage_") as workdir:
+        url = args.database_url or f"sqlite:///{os.path.join(workdir, 'storage.db')}"
+        results = []
+        for layout in ("inline", "split"):
+            engine = create_engine(url)
+            started = time.perf_counter()
+            populate(engine, layout, args)
+            print(f"{layout}: populated {args.rows} rows in {time.perf_counter() - started:.1f}s")
+            results.append(measure(engine, layout, args))
+            engine.dispose()
+
+    print(
+        f"{'layout':<8}{'videos MiB':>12}{'content MiB':>12}{'total MiB':>11}"
+        f"{'scan s':>9}{'due s':>9}{'load s':>9}"
+    )
+    for row in results:
+        sizes = row["table_bytes"]
+        print(
+            f"{row['layout']:<8}{sizes.get('videos', 0) / 2**20:>12.1f}"
+            f"{sizes.get('video_content', 0) / 2**20:>12.1f}{row['total_bytes'] / 2**20:>11.1f}"
+            f"{row['full_scan_seconds']:>9.3f}{row['due_scan_seconds']:>9.3f}"
+            f"{row['load_in_progress_seconds']:>9.3f}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"database": engine.dialect.name, "rows": args.rows, "runs": results}, fh, indent=2
+            )
+
+
+if __name__ == "__main__":
+    main()
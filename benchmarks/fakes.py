@@ -0,0 +1,99 @@
+"""Deterministic chat model stand-in used by benchmarks.
+
+Synthesia is stood in for by :mod:`utils.synthesia_simulator`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+import threading
+import time
+from typing import Any, Sequence
+
+from langchain_core.messages import AIMessage
+
+_WORDS = (
+    "the fox river lantern quiet morning village clock baker small brave "
+    "learned kept waited promise friend garden mountain listened gently"
+).split()
+
+
+class FakeChatModel:
+    """Chat model with configurable latency, output length and critique verdicts.
+
+    Responses are derived from a hash of the prompt, so the same run produces
+    the same drafts and verdicts every time. A call whose first message
+    contains one of ``critique_markers`` is treated as a critique and answers
+    ``accept`` or, with probability ``revise_rate``, a ``revise:`` note.
+    ``latency`` is the time to the first token; each output token then takes
+    ``1 / tokens_per_second``. A ``seed`` passed to :meth:`invoke` gives a
+    different, equally deterministic response, like a sampled draft.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        tokens_per_second: float = 0.0,
+        output_tokens: int = 400,
+        critique_tokens: int = 20,
+        revise_rate: float = 0.3,
+        jitter: float = 0.2,
+        model_name: str = "fake-gpt",
+        critique_markers: Sequence[str] = ("critique", "critical"),
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.critique_tokens = critique_tokens
+        self.revise_rate = revise_rate
+        self.jitter = jitter
+        self.model_name = model_name
+        self.temperature = 0.0
+        self.critique_markers = tuple(m.lower() for m in critique_markers)
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _rng(self, messages: Sequence[Any], seed: int | None = None) -> random.Random:
+        digest = hashlib.sha256(str(self.seed).encode())
+        if seed is not None:
+            digest.update(f"/{seed}".encode())
+        for message in messages:
+            digest.update(str(getattr(message, "content", message)).encode("utf-8"))
+        return random.Random(digest.digest())
+
+    def invoke(self, messages: Sequence[Any], *args, **kwargs) -> AIMessage:
+        with self._lock:
+            self.calls += 1
+        rng = self._rng(messages, kwargs.get("seed"))
+        first = str(getattr(messages[0], "content", "")).lower() if messages else ""
+        critique = any(marker in first for marker in self.critique_markers)
+
+        if critique:
+            revise = rng.random() < self.revise_rate
+            tokens = self.critique_tokens
+            words = [rng.choice(_WORDS) for _ in range(max(0, tokens - 1))]
+            content = ("revise: " if revise else "accept ") + " ".join(words)
+        else:
+            tokens = self.output_tokens
+            content = " ".join(rng.choice(_WORDS) for _ in range(tokens))
+
+        delay = self.latency * (1 + rng.uniform(-self.jitter, self.jitter))
+        if self.tokens_per_second:
+            delay += tokens / self.tokens_per_second
+        time.sleep(max(0.0, delay))
+
+        input_tokens = sum(
+            len(str(getattr(m, "content", m)).split()) for m in messages
+        )
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": tokens,
+                "total_tokens": input_tokens + tokens,
+            },
+            response_metadata={"model_name": self.model_name},
+        )
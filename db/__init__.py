@@ -1,8 +1,50 @@
 """Database utilities and models."""
 
-from .database import SessionLocal, engine
+from .database import (
+    AsyncSessionLocal,
+    SessionLocal,
+    dispose_async_engine,
+    get_async_engine,
+    get_engine,
+)
 from . import models, schemas
 from .base import Base
-from .utils import store_video_metadata
+from .utils import (
+    astore_video_metadata,
+    astore_videos_bulk,
+    find_videos_by_proverb,
+    normalize_proverb,
+    proverb_hash,
+    store_video_metadata,
+    store_videos_bulk,
+    utcnow,
+)
+from .writer import BufferedVideoWriter
 
-__all__ = ["SessionLocal", "engine", "models", "schemas", "Base", "store_video_metadata"]
+__all__ = [
+    "SessionLocal",
+    "AsyncSessionLocal",
+    "engine",
+    "get_engine",
+    "get_async_engine",
+    "dispose_async_engine",
+    "models",
+    "schemas",
+    "Base",
+    "store_video_metadata",
+    "store_videos_bulk",
+    "astore_video_metadata",
+    "astore_videos_bulk",
+    "BufferedVideoWriter",
+    "find_videos_by_proverb",
+    "normalize_proverb",
+    "proverb_hash",
+    "utcnow",
+]
+
+
+def __getattr__(name: str):
+    # The engine is created lazily on first access.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,160 @@
 from __future__ import annotations
 
+import logging
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+from typing import TYPE_CHECKING
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
 
-print(f"Creating DB Engine with url {DATABASE_URL}")
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+logger = logging.getLogger(__name__)
 
+DEFAULT_DATABASE_URL = "sqlite:///./app.db"
+
+# Async driver for each backend; the sync URL in DATABASE_URL is rewritten to
+# use it unless ASYNC_DATABASE_URL is set.
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+_engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def _env_flag(name: str, default: str = "0") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def engine_options(url: str) -> dict:
+    """``create_engine`` keyword arguments from the environment.
+
+    ``DB_POOL_SIZE``, ``DB_MAX_OVERFLOW`` and ``DB_POOL_RECYCLE`` size the
+    connection pool of server databases; ``DB_POOL_PRE_PING`` (default on)
+    tests each connection before use so ones dropped by the server are
+    replaced instead of failing a query.
+    """
+    options: dict = {"pool_pre_ping": _env_flag("DB_POOL_PRE_PING", "1")}
+    if make_url(url).get_backend_name() != "sqlite":
+        options["pool_size"] = int(os.getenv("DB_POOL_SIZE", "5"))
+        options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+        recycle = os.getenv("DB_POOL_RECYCLE")
+        if recycle:
+            options["pool_recycle"] = int(recycle)
+    return options
+
+
+def _configure_sqlite(engine: Engine) -> None:
+    """With ``SQLITE_WAL`` set, put SQLite in WAL mode on every connection.
+
+    WAL lets readers (the status job, dedup lookups) proceed while a batch is
+    writing, and ``synchronous=NORMAL`` drops the fsync per commit that WAL
+    makes safe to skip.
+    """
+    if engine.dialect.name != "sqlite" or not _env_flag("SQLITE_WAL"):
+        return
+    busy_timeout = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout}")
+        cursor.close()
+
+
+def database_url() -> str:
+    return os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+
+def async_database_url() -> str:
+    """``ASYNC_DATABASE_URL``, or ``DATABASE_URL`` switched to its async driver."""
+    explicit = os.getenv("ASYNC_DATABASE_URL")
+    if explicit:
+        return explicit
+    url = make_url(database_url())
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend!r} databases")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+def get_engine() -> Engine:
+    """Return the process-wide engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = database_url()
+                logger.info("Creating DB Engine with url %s", url)
+                engine = create_engine(url, **engine_options(url))
+                _configure_sqlite(engine)
+                _engine = engine
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return the process-wide async engine, creating it on first use.
+
+    Uses asyncpg for PostgreSQL and aiosqlite for SQLite, with the same
+    pool and SQLite settings as :func:`get_engine`. Pooled connections belong
+    to the event loop that opened them; call :func:`dispose_async_engine`
+    before that loop closes.
+    """
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                # Imported here: the async extension pulls in greenlet.
+                from sqlalchemy.ext.asyncio import create_async_engine
+
+                url = async_database_url()
+                logger.info("Creating async DB Engine with url %s", url)
+                engine = create_async_engine(url, **engine_options(url))
+                _configure_sqlite(engine.sync_engine)
+                _async_engine = engine
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """Close the async engine's connections and forget it."""
+    global _async_engine
+    engine, _async_engine = _async_engine, None
+    if engine is not None:
+        await engine.dispose()
+
+
+class _LazySessionmaker(sessionmaker):
+    """A ``sessionmaker`` that binds to :func:`get_engine` on first call."""
+
+    def __call__(self, **local_kw) -> Session:
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker()
+
+
+def AsyncSessionLocal(**kw) -> AsyncSession:
+    """Open an ``AsyncSession`` on :func:`get_async_engine`.
+
+    Objects are not expired on commit, since an expired attribute cannot be
+    reloaded implicitly under asyncio.
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    return AsyncSession(bind=get_async_engine(), expire_on_commit=False, **kw)
+
+
+def __getattr__(name: str):
+    # ``engine`` used to be created at import time; keep it importable.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import String, Text, DateTime, func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.ext.associationproxy import AssociationProxy, association_proxy
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
+from .types import CompressedText
 
 class Video(Base):
     """SQLAlchemy model for generated videos."""
@@ -14,8 +16,70 @@ class Video(Base):
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     proverb: Mapped[str] = mapped_column(String, nullable=False)
-    story: Mapped[str | None] = mapped_column(Text, nullable=True)
-    screenplay: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # sha256 of the normalised proverb (see db.utils.proverb_hash), for dedup.
+    proverb_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     status: Mapped[str] = mapped_column(String, default="pending", nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    next_check_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
+    # The story and screenplay live in video_content, loaded only when read,
+    # so polling and listing videos never pull the text.
+    content: Mapped[VideoContent | None] = relationship(
+        back_populates="video", cascade="all, delete-orphan", passive_deletes=True
+    )
+    story: AssociationProxy[str | None] = association_proxy(
+        "content", "story", creator=lambda story: VideoContent(story=story)
+    )
+    screenplay: AssociationProxy[str | None] = association_proxy(
+        "content", "screenplay", creator=lambda screenplay: VideoContent(screenplay=screenplay)
+    )
+
+    __table_args__ = (
+        Index("ix_videos_status_created_at", "status", "created_at"),
+        Index("ix_videos_status_next_check_at", "status", "next_check_at"),
+        Index("ix_videos_proverb_hash", "proverb_hash"),
+    )
+
+
+
+class VideoContent(Base):
+    """Story and screenplay text of a video, zstd-compressed."""
+
+    __tablename__ = "video_content"
+
+    video_id: Mapped[str] = mapped_column(
+        ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True
+    )
+    story: Mapped[str | None] = mapped_column(CompressedText, nullable=True)
+    screenplay: Mapped[str | None] = mapped_column(CompressedText, nullable=True)
+
+    video: Mapped[Video] = relationship(back_populates="content")
+
+
+class Job(Base):
+    """A proverb waiting to be, or being, produced by a worker (jobs.worker)."""
+
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    proverb: Mapped[str] = mapped_column(String, nullable=False)
+    proverb_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    test: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # queued -> running -> done | failed; a failed attempt goes back to queued
+    # until max_attempts is reached.
+    status: Mapped[str] = mapped_column(String, default="queued", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5, nullable=False)
+    available_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    locked_by: Mapped[str | None] = mapped_column(String, nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    video_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_available_at", "status", "available_at"),
+        Index("ix_jobs_status_lease_expires_at", "status", "lease_expires_at"),
+        Index("ix_jobs_proverb_hash", "proverb_hash"),
+    )
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import zstandard
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+# zstd level for stored text: level 3 (zstd's default) compresses story and
+# screenplay text about as well as level 9 here at several times the speed.
+COMPRESSION_LEVEL = 3
+
+
+def compress_text(value: str | None, level: int = COMPRESSION_LEVEL) -> bytes | None:
+    if value is None:
+        return None
+    return zstandard.compress(value.encode("utf-8"), level)
+
+
+def decompress_text(value: bytes | None) -> str | None:
+    if value is None:
+        return None
+    return zstandard.decompress(bytes(value)).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored as a zstandard-compressed blob.
+
+    Values are compressed on the way in and decompressed on the way out, so
+    the ORM and Core statements read and write plain ``str``. Compressed
+    values can't be filtered or compared in SQL.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
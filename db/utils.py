@@ -1,14 +1,119 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
+import hashlib
 import logging
+import re
+import unicodedata
+from typing import TYPE_CHECKING, Iterable
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from .models import Video
+from .models import Video, VideoContent
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
+# Keeps the IN (...) list of a dedup lookup under SQLite's parameter limit.
+LOOKUP_CHUNK_SIZE = 500
+
+# Rows per INSERT in store_videos_bulk: 6 columns x 100 rows stays under the
+# 999 bound parameters older SQLite builds allow per statement.
+BULK_CHUNK_SIZE = 100
+
+# Columns refreshed when a stored Synthesia ID is written again. Status and
+# created_at are left alone so a replayed write never rolls back a status the
+# status job has already advanced.
+_UPSERT_COLUMNS = ("proverb", "proverb_hash")
+_CONTENT_COLUMNS = ("story", "screenplay")
+
+# Preference when several videos exist for one proverb.
+_STATUS_RANK = {"complete": 0, "in_progress": 1, "pending": 2}
+
+
+def utcnow() -> datetime:
+    """Current time as naive UTC, the clock every ``DateTime`` column uses.
+
+    The columns are timezone-naive and ``server_default=func.now()`` fills
+    them in UTC, so Python-side timestamps compared against them must be
+    naive UTC as well, never local time.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def normalize_proverb(proverb: str) -> str:
+    """Canonical form of a proverb: case, punctuation and spacing removed."""
+    text = unicodedata.normalize("NFKC", proverb).casefold()
+    text = re.sub(r"[^\w\s]", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def proverb_hash(proverb: str) -> str:
+    """SHA-256 hex digest of :func:`normalize_proverb`, stored on ``Video``."""
+    return hashlib.sha256(normalize_proverb(proverb).encode("utf-8")).hexdigest()
+
+
+def find_videos_by_proverb(session: Session, proverbs: Iterable[str]) -> dict[str, Video]:
+    """Return an existing video for each proverb that already has one.
+
+    Proverbs are matched on :func:`proverb_hash`, one indexed ``IN`` query
+    per :data:`LOOKUP_CHUNK_SIZE` proverbs. The result maps each matching
+    input proverb to its video, preferring completed renders, then the most
+    recent. Failed videos are ignored, so their proverbs are produced again.
+    """
+    by_hash: dict[str, list[str]] = {}
+    for proverb in proverbs:
+        by_hash.setdefault(proverb_hash(proverb), []).append(proverb)
+
+    best: dict[str, Video] = {}
+    hashes = list(by_hash)
+    for start in range(0, len(hashes), LOOKUP_CHUNK_SIZE):
+        chunk = hashes[start : start + LOOKUP_CHUNK_SIZE]
+        rows = session.scalars(
+            select(Video).where(Video.proverb_hash.in_(chunk), Video.status != "failed")
+        )
+        for video in rows:
+            current = best.get(video.proverb_hash)
+            if current is None or _preference(video) < _preference(current):
+                best[video.proverb_hash] = video
+
+    return {
+        proverb: best[digest]
+        for digest, matches in by_hash.items()
+        if digest in best
+        for proverb in matches
+    }
+
+
+def _preference(video: Video) -> tuple:
+    created = video.created_at.timestamp() if video.created_at else 0.0
+    return (_STATUS_RANK.get(video.status, len(_STATUS_RANK)), -created)
+
+
+def video_row(
+    proverb: str, story: str | None, screenplay: str | None, video_response: dict
+) -> dict:
+    """Column values of the ``Video`` row for one Synthesia response."""
+    created_ts = video_response.get("createdAt")
+    created_at = (
+        datetime.fromtimestamp(created_ts, timezone.utc).replace(tzinfo=None)
+        if isinstance(created_ts, (int, float))
+        else utcnow()
+    )
+    return {
+        "id": video_response.get("id"),
+        "proverb": proverb,
+        "proverb_hash": proverb_hash(proverb),
+        "story": story,
+        "screenplay": screenplay,
+        "status": video_response.get("status", "unknown"),
+        "created_at": created_at,
+    }
+
 
 def store_video_metadata(
     session: Session,
@@ -38,21 +143,8 @@ def store_video_metadata(
         The auto-generated database ID of the inserted ``Video`` row.
     """
 
-    created_ts = video_response.get("createdAt")
-    created_at = (
-        datetime.fromtimestamp(created_ts) if isinstance(created_ts, (int, float)) else datetime.utcnow()
-    )
-    status = video_response.get("status", "unknown")
-    synthesia_id = video_response.get("id")
-
-    video = Video(
-        id = synthesia_id,
-        proverb=proverb,
-        story=story,
-        screenplay=screenplay,
-        status=status,
-        created_at=created_at,
-    )
+    video = Video(**video_row(proverb, story, screenplay, video_response))
+    synthesia_id = video.id
 
     try:
         session.add(video)
@@ -63,3 +155,142 @@ def store_video_metadata(
 
     logger.info("Stored Synthesia video %s as DB record %s", synthesia_id, video.id)
     return video.id
+
+
+def _bulk_rows(
+    records: Iterable[tuple[str, str | None, str | None, dict]],
+) -> dict[str, dict]:
+    rows: dict[str, dict] = {}
+    for proverb, story, screenplay, video_response in records:
+        row = video_row(proverb, story, screenplay, video_response)
+        if row["id"] is None:
+            raise ValueError(f"Synthesia response for {proverb!r} has no video id")
+        rows[row["id"]] = row
+    return rows
+
+
+def _split_row(row: dict) -> tuple[dict, dict]:
+    """Split a :func:`video_row` into ``videos`` and ``video_content`` values."""
+    video = {key: value for key, value in row.items() if key not in _CONTENT_COLUMNS}
+    content = {"video_id": row["id"], **{key: row[key] for key in _CONTENT_COLUMNS}}
+    return video, content
+
+
+def _upsert_statements(dialect: str, values: list[dict], chunk_size: int) -> list | None:
+    """Multi-row upserts of videos and their content per chunk.
+
+    Returns ``None`` if ``dialect`` has no ``ON CONFLICT`` support.
+    """
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+
+    def upsert(model, key, rows, columns):
+        stmt = insert(model).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[key], set_={column: stmt.excluded[column] for column in columns}
+        )
+
+    statements = []
+    for start in range(0, len(values), chunk_size):
+        videos, contents = zip(*(_split_row(row) for row in values[start : start + chunk_size]))
+        statements.append(upsert(Video, Video.id, list(videos), _UPSERT_COLUMNS))
+        statements.append(
+            upsert(VideoContent, VideoContent.video_id, list(contents), _CONTENT_COLUMNS)
+        )
+    return statements
+
+
+def _merge_objects(values: list[dict]) -> list:
+    objects: list = []
+    for row in values:
+        video, content = _split_row(row)
+        objects += [Video(**video), VideoContent(**content)]
+    return objects
+
+
+def store_videos_bulk(
+    session: Session,
+    records: Iterable[tuple[str, str | None, str | None, dict]],
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> int:
+    """Persist many ``(proverb, story, screenplay, video_response)`` records.
+
+    Rows are written with one multi-row ``INSERT ... ON CONFLICT (id) DO
+    UPDATE`` per ``chunk_size`` records on PostgreSQL and SQLite (other
+    databases fall back to a merge per row), all in a single transaction, so
+    a batch pays for one commit instead of one per video. A Synthesia ID that
+    is already stored, or repeated within ``records``, keeps one row with the
+    latest text. Returns the number of records written.
+    """
+    rows = _bulk_rows(records)
+    if not rows:
+        return 0
+
+    values = list(rows.values())
+    try:
+        statements = _upsert_statements(session.get_bind().dialect.name, values, chunk_size)
+        if statements is None:
+            for obj in _merge_objects(values):
+                session.merge(obj)
+        else:
+            for stmt in statements:
+                session.execute(stmt)
+        session.commit()
+    except SQLAlchemyError as exc:
+        session.rollback()
+        raise RuntimeError("Failed to store video metadata") from exc
+
+    logger.info("Stored %d Synthesia videos in bulk", len(values))
+    return len(values)
+
+
+async def astore_video_metadata(
+    session: AsyncSession,
+    proverb: str,
+    story: str | None,
+    screenplay: str | None,
+    video_response: dict,
+) -> str:
+    """Async :func:`store_video_metadata` for an ``AsyncSession``."""
+    video = Video(**video_row(proverb, story, screenplay, video_response))
+    try:
+        session.add(video)
+        await session.commit()
+    except SQLAlchemyError as exc:
+        await session.rollback()
+        raise RuntimeError("Failed to store video metadata") from exc
+
+    logger.info("Stored Synthesia video %s", video.id)
+    return video.id
+
+
+async def astore_videos_bulk(
+    session: AsyncSession,
+    records: Iterable[tuple[str, str | None, str | None, dict]],
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> int:
+    """Async :func:`store_videos_bulk` for an ``AsyncSession``."""
+    rows = _bulk_rows(records)
+    if not rows:
+        return 0
+
+    values = list(rows.values())
+    try:
+        statements = _upsert_statements(session.bind.dialect.name, values, chunk_size)
+        if statements is None:
+            for obj in _merge_objects(values):
+                await session.merge(obj)
+        else:
+            for stmt in statements:
+                await session.execute(stmt)
+        await session.commit()
+    except SQLAlchemyError as exc:
+        await session.rollback()
+        raise RuntimeError("Failed to store video metadata") from exc
+
+    logger.info("Stored %d Synthesia videos in bulk", len(values))
+    return len(values)
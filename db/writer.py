@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from .utils import BULK_CHUNK_SIZE, store_videos_bulk
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedVideoWriter:
+    """Group video metadata writes from many threads into bulk inserts.
+
+    :meth:`add` queues a record and returns a ``Future`` that resolves to the
+    video ID once the record is committed (or carries the database error). A
+    background thread writes the buffer with :func:`store_videos_bulk` when
+    ``max_rows`` records are waiting or ``max_delay`` seconds after the
+    oldest one arrived, whichever comes first. Callers that wait on the
+    future still only report success for stored rows, but concurrent callers
+    share one commit.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_rows: int = 50,
+        max_delay: float = 0.05,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ):
+        if max_rows < 1:
+            raise ValueError("max_rows must be at least 1")
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.chunk_size = chunk_size
+        self._cond = threading.Condition()
+        self._buffer: list[tuple[tuple, Future]] = []
+        self._oldest = 0.0
+        self._flush_requested = False
+        self._closed = False
+        self.flushes = 0
+        self.rows_written = 0
+        self._thread = threading.Thread(target=self._run, name="video-writer", daemon=True)
+        self._thread.start()
+
+    def add(
+        self, proverb: str, story: str | None, screenplay: str | None, video_response: dict
+    ) -> Future:
+        if video_response.get("id") is None:
+            # Rejected here so one bad record cannot fail a whole flush.
+            raise ValueError(f"Synthesia response for {proverb!r} has no video id")
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BufferedVideoWriter is closed")
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(((proverb, story, screenplay, video_response), future))
+            if len(self._buffer) == 1 or len(self._buffer) >= self.max_rows:
+                self._cond.notify()
+        return future
+
+    def flush(self) -> None:
+        """Write everything buffered now and wait until it is committed."""
+        with self._cond:
+            futures = [future for _, future in self._buffer]
+            self._flush_requested = True
+            self._cond.notify()
+        for future in futures:
+            future.exception()
+
+    def close(self) -> None:
+        """Write what is buffered and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def __enter__(self) -> "BufferedVideoWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def stats(self) -> dict:
+        return {
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "rows_per_flush": self.rows_written / self.flushes if self.flushes else 0.0,
+        }
+
+    def _next_batch(self) -> list[tuple[tuple, Future]] | None:
+        with self._cond:
+            while True:
+                if not self._buffer:
+                    if self._closed:
+                        return None
+                    self._cond.wait()
+                    continue
+                remaining = self._oldest + self.max_delay - time.monotonic()
+                if (
+                    remaining <= 0
+                    or len(self._buffer) >= self.max_rows
+                    or self._flush_requested
+                    or self._closed
+                ):
+                    batch, self._buffer = self._buffer, []
+                    self._flush_requested = False
+                    return batch
+                self._cond.wait(remaining)
+
+    def _run(self) -> None:
+        while (batch := self._next_batch()) is not None:
+            session = self.session_factory()
+            try:
+                store_videos_bulk(session, [record for record, _ in batch], self.chunk_size)
+            except Exception as exc:  # hand the failure to every waiting caller
+                logger.error("Failed to write %d videos: %s", len(batch), exc)
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            finally:
+                session.close()
+            self.flushes += 1
+            self.rows_written += len(batch)
+            for record, future in batch:
+                future.set_result(record[3].get("id"))
@@ -0,0 +1,480 @@
+"""Run the story → screenplay → video pipeline for many quotes in one process."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+
+from db.utils import normalize_proverb
+from utils.metrics import percentile
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+    from db.writer import BufferedVideoWriter
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("story", "screenplay", "video")
+
+# What to do with a quote that already has a video: produce it anyway,
+# leave it out of the batch, or mark it done with the existing video.
+DEDUP_POLICIES = ("off", "skip", "reuse")
+
+
+def read_quotes(path: str) -> list[str]:
+    """Return the non-empty lines of ``path`` in file order."""
+    with open(path, encoding="utf-8") as fh:
+        return [line.strip() for line in fh if line.strip()]
+
+
+class ProgressJournal:
+    """Append-only JSONL log of finished quotes so a crashed batch can resume.
+
+    Each processed quote appends one line with its outcome. Lines are flushed
+    and fsynced as they are written, so at most the quotes that were in flight
+    when the process died are repeated on the next run.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._terminate_torn_line()
+
+    def _terminate_torn_line(self) -> None:
+        """Start new entries on a fresh line if the last write was cut short."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb+") as fh:
+            fh.seek(-1, os.SEEK_END)
+            if fh.read(1) != b"\n":
+                fh.write(b"\n")
+
+    def _entries(self) -> Iterator[dict]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write; ignore it.
+                    continue
+
+    def completed(self) -> set[str]:
+        """Return the quotes that already finished successfully."""
+        return {entry["quote"] for entry in self._entries() if entry.get("status") == "done"}
+
+    def submitted(self) -> dict[str, dict]:
+        """Return the ``submitted`` entry of each quote that is not done yet.
+
+        Those quotes have a video Synthesia accepted but whose metadata was
+        never stored; the entry holds the response, story and screenplay so a
+        retry can store that video instead of rendering it again.
+        """
+        pending: dict[str, dict] = {}
+        for entry in self._entries():
+            if entry.get("status") == "submitted":
+                pending[entry["quote"]] = entry
+            elif entry.get("status") == "done":
+                pending.pop(entry["quote"], None)
+        return pending
+
+    def record_submission(self, quote: str, video: dict, story: str, screenplay: str) -> None:
+        """Journal an accepted video before its metadata is written."""
+        self.record(
+            quote,
+            "submitted",
+            video_id=video.get("id"),
+            video=video,
+            story=story,
+            screenplay=screenplay,
+        )
+
+    def run_id(self, quote: str) -> str:
+        """Stable checkpoint run ID for ``quote`` within this journal's batch.
+
+        A quote that failed part-way is retried under the same ID on the next
+        run, so its checkpointed story and screenplay steps are not redone.
+        """
+        key = f"{os.path.abspath(self.path)}\n{quote}".encode("utf-8")
+        return "batch-" + hashlib.sha256(key).hexdigest()[:16]
+
+    def record(self, quote: str, status: str, **fields) -> None:
+        entry = {"quote": quote, "status": status, "ts": time.time(), **fields}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line)
+                fh.flush()
+                os.fsync(fh.fileno())
+
+
+class BatchStats:
+    """Thread-safe collector of per-stage timings for a batch run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds: dict[str, list[float]] = {stage: [] for stage in STAGES}
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.deduplicated = 0
+        self.started_at = time.perf_counter()
+        self.finished_at: float | None = None
+
+    def record_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stage_seconds.setdefault(stage, []).append(seconds)
+
+    def record_result(self, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def finish(self) -> None:
+        self.finished_at = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    def summary(self) -> dict:
+        elapsed = self.elapsed
+        processed = self.succeeded + self.failed
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "deduplicated": self.deduplicated,
+            "elapsed_seconds": elapsed,
+            "quotes_per_minute": (self.succeeded / elapsed * 60) if elapsed > 0 else 0.0,
+            "processed": processed,
+            "stages": {
+                stage: {
+                    "count": len(samples),
+                    "p50": percentile(samples, 50),
+                    "p95": percentile(samples, 95),
+                }
+                for stage, samples in self.stage_seconds.items()
+            },
+        }
+
+    def format_summary(self) -> str:
+        data = self.summary()
+        lines = [
+            f"Processed {data['processed']} quotes "
+            f"({data['succeeded']} ok, {data['failed']} failed, "
+            f"{data['skipped']} skipped) in {data['elapsed_seconds']:.1f}s",
+            f"Throughput: {data['quotes_per_minute']:.2f} quotes/min",
+            f"Duplicate submissions avoided: {data['deduplicated']}",
+            f"{'stage':<12}{'count':>8}{'p50 (s)':>10}{'p95 (s)':>10}",
+        ]
+        for stage, row in data["stages"].items():
+            lines.append(
+                f"{stage:<12}{row['count']:>8}{row['p50']:>10.2f}{row['p95']:>10.2f}"
+            )
+        return "\n".join(lines)
+
+
+def process_quote(
+    orchestrator,
+    quote: str,
+    session_factory: Callable[[], Session],
+    stats: BatchStats,
+    test: bool = True,
+    run_id: str | None = None,
+    writer: BufferedVideoWriter | None = None,
+    journal: ProgressJournal | None = None,
+    submitted: dict | None = None,
+) -> dict:
+    """Run one quote through the full pipeline, timing each stage.
+
+    ``run_id`` names the checkpoint run for the LLM steps, if the
+    orchestrator has a checkpointer; its checkpoints are deleted once the
+    video is stored. With a ``writer`` the video metadata is
+    stored in a bulk insert shared with other quotes in flight. With a
+    ``journal`` the accepted video is journalled before its metadata is
+    written; passing that entry back as ``submitted`` on a retry only
+    stores the video again.
+    """
+
+    if submitted is not None:
+        logger.info("Quote %r resumes with submitted video %s", quote, submitted["video_id"])
+        start = time.perf_counter()
+        video = store_submitted(orchestrator, submitted, session_factory, writer=writer)
+        stats.record_stage("video", time.perf_counter() - start)
+        orchestrator.discard_run(run_id)
+        return video
+
+    start = time.perf_counter()
+    story = orchestrator.generate_story(proverb=quote, run_id=run_id)
+    stats.record_stage("story", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    screenplay = orchestrator.generate_screenplay(
+        story=story["story"], proverb=quote, run_id=run_id
+    )
+    stats.record_stage("screenplay", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    video = create_video(
+        orchestrator,
+        quote,
+        story["story"],
+        screenplay["screenplay"],
+        session_factory,
+        test=test,
+        writer=writer,
+        journal=journal,
+    )
+    stats.record_stage("video", time.perf_counter() - start)
+    orchestrator.discard_run(run_id)
+    return video
+
+
+def create_video(
+    orchestrator,
+    quote: str,
+    story: str,
+    screenplay: str,
+    session_factory: Callable[[], Session],
+    test: bool = True,
+    writer: BufferedVideoWriter | None = None,
+    journal: ProgressJournal | None = None,
+) -> dict:
+    """Submit the video for a finished screenplay and store its metadata."""
+    video_args = dict(
+        screenplay=screenplay,
+        title=quote.replace(" ", "_"),
+        description=quote,
+        proverb=quote,
+        story=story,
+        test=test,
+    )
+    if journal is not None:
+        video_args["on_submitted"] = lambda video: journal.record_submission(
+            quote, video, story, screenplay
+        )
+    if writer is not None:
+        return orchestrator.generate_video_from_template(**video_args, writer=writer)
+    session = session_factory()
+    try:
+        return orchestrator.generate_video_from_template(**video_args, session=session)
+    finally:
+        session.close()
+
+
+def store_submitted(
+    orchestrator,
+    entry: dict,
+    session_factory: Callable[[], Session],
+    writer: BufferedVideoWriter | None = None,
+) -> dict:
+    """Store the video of a journalled ``submitted`` entry without resubmitting it."""
+    record = (entry["quote"], entry["story"], entry["screenplay"], entry["video"])
+    if writer is not None:
+        return orchestrator.store_video(*record, writer=writer)
+    session = session_factory()
+    try:
+        return orchestrator.store_video(*record, session=session)
+    finally:
+        session.close()
+
+
+def pending_quotes(
+    quotes: Iterable[str], journal: ProgressJournal, stats: BatchStats
+) -> list[str]:
+    """Drop quotes the journal marks done and repeats within the batch.
+
+    Repeats are detected on the normalised quote, so differences in case,
+    punctuation or spacing do not make a second copy.
+    """
+    done = journal.completed()
+    pending: list[str] = []
+    seen: set[str] = set()
+    for quote in quotes:
+        key = normalize_proverb(quote)
+        if quote in done or key in seen:
+            stats.skipped += 1
+            continue
+        seen.add(key)
+        pending.append(quote)
+    return pending
+
+
+def deduplicate_quotes(
+    orchestrator,
+    pending: list[str],
+    journal: ProgressJournal,
+    session_factory: Callable[[], Session],
+    stats: BatchStats,
+    policy: str,
+) -> list[str]:
+    """Apply the dedup ``policy`` to quotes that already have a video.
+
+    The whole batch is checked with one lookup. Under ``"skip"`` such quotes
+    are journalled as ``duplicate`` and left for a later run; under
+    ``"reuse"`` they are journalled as done with the existing video's ID.
+    """
+    if policy not in DEDUP_POLICIES:
+        raise ValueError(f"dedup policy must be one of {', '.join(DEDUP_POLICIES)}")
+    if policy == "off" or not pending:
+        return pending
+
+    session = session_factory()
+    try:
+        existing = orchestrator.existing_videos(session, pending)
+    finally:
+        session.close()
+
+    remaining: list[str] = []
+    for quote in pending:
+        video = existing.get(quote)
+        if video is None:
+            remaining.append(quote)
+            continue
+        stats.deduplicated += 1
+        if policy == "reuse":
+            journal.record(quote, "done", video_id=video.id, reused=True)
+        else:
+            journal.record(quote, "duplicate", video_id=video.id)
+    if stats.deduplicated:
+        logger.info("Avoided %d duplicate submissions (%s)", stats.deduplicated, policy)
+    return remaining
+
+
+def run_batch(
+    orchestrator,
+    quotes: Iterable[str],
+    journal: ProgressJournal,
+    session_factory: Callable[[], Session],
+    concurrency: int = 4,
+    test: bool = True,
+    dedup: str = "off",
+    writer: BufferedVideoWriter | None = None,
+) -> BatchStats:
+    """Process ``quotes`` with at most ``concurrency`` quotes in flight.
+
+    Quotes already marked done in ``journal`` are skipped, as are repeats of a
+    quote earlier in the same batch. Quotes that already have a video in the
+    database are handled according to ``dedup`` (see :data:`DEDUP_POLICIES`).
+    A failing quote is logged and recorded in the journal without stopping
+    the rest of the batch; it is retried on the next run, reusing its video
+    if Synthesia had already accepted it. With a ``writer`` video metadata is
+    stored in bulk inserts rather than one commit per quote.
+    """
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    stats = BatchStats()
+    pending = pending_quotes(quotes, journal, stats)
+    pending = deduplicate_quotes(orchestrator, pending, journal, session_factory, stats, dedup)
+    submitted = journal.submitted()
+
+    logger.info(
+        "Starting batch: %d quotes pending, %d skipped, concurrency %d",
+        len(pending),
+        stats.skipped,
+        concurrency,
+    )
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(
+                process_quote,
+                orchestrator,
+                quote,
+                session_factory,
+                stats,
+                test,
+                journal.run_id(quote),
+                writer,
+                journal,
+                submitted.get(quote),
+            ): quote
+            for quote in pending
+        }
+        for future in as_completed(futures):
+            quote = futures[future]
+            try:
+                video = future.result()
+            except Exception as exc:  # keep the batch going on per-quote failures
+                logger.error("Failed to process quote %r: %s", quote, exc)
+                journal.record(quote, "failed", error=str(exc))
+                stats.record_result(False)
+            else:
+                video_id = video.get("id") if isinstance(video, dict) else None
+                journal.record(quote, "done", video_id=video_id)
+                stats.record_result(True)
+
+    stats.finish()
+    return stats
+
+
+def run_batch_pipelined(
+    orchestrator,
+    quotes: Iterable[str],
+    journal: ProgressJournal,
+    session_factory: Callable[[], Session],
+    workers: dict[str, int] | None = None,
+    queue_size: int = 8,
+    test: bool = True,
+    dedup: str = "off",
+    writer: BufferedVideoWriter | None = None,
+) -> tuple[BatchStats, dict]:
+    """Like :func:`run_batch`, but overlap stages across quotes.
+
+    Uses :meth:`AgentOrchestrator.build_pipeline`, so each stage has its own
+    worker count and bounded queue. Accepted videos are journalled before the
+    ``db`` stage, so a quote that failed there only redoes the write. Returns
+    the batch stats together with the pipeline's per-stage utilisation and
+    queue-depth summary.
+    """
+
+    stats = BatchStats()
+    pending = pending_quotes(quotes, journal, stats)
+    pending = deduplicate_quotes(orchestrator, pending, journal, session_factory, stats, dedup)
+    pipeline = orchestrator.build_pipeline(
+        session_factory,
+        workers=workers,
+        queue_size=queue_size,
+        test=test,
+        run_id_for=journal.run_id,
+        writer=writer,
+        on_submitted=lambda item: journal.record_submission(
+            item["proverb"], item["video"], item["story"], item["screenplay"]
+        ),
+        submitted=journal.submitted(),
+    )
+
+    def on_result(result) -> None:
+        if result.ok:
+            journal.record(result.item, "done", video_id=result.result["video"].get("id"))
+        else:
+            journal.record(
+                result.item, "failed", stage=result.failed_stage, error=str(result.error)
+            )
+        stats.record_result(result.ok)
+
+    logger.info(
+        "Starting pipelined batch: %d quotes pending, %d skipped",
+        len(pending),
+        stats.skipped,
+    )
+    pipeline.run(pending, on_result=on_result)
+    for name, metrics in pipeline.metrics.items():
+        for seconds in metrics.latencies:
+            stats.record_stage(name, seconds)
+    stats.finish()
+    return stats, pipeline.summary()
@@ -0,0 +1,543 @@
+"""Generate stories and screenplays for a whole batch through a provider batch API.
+
+Instead of one chat request per agent node, every prompt of a phase is
+written to a JSONL file of batch requests, submitted in one go and read back
+once the provider has worked through it. Batch requests cost half as much as
+interactive ones and don't count against the per-minute rate limits; the
+price is latency (OpenAI promises results within 24 hours). The phases mirror
+the agents' graphs:
+
+    story -> story_critique -> story_edit
+          -> screenplay -> screenplay_critique -> screenplay_edit
+
+A phase only holds the requests that need it: drafts the pre-critic settles
+(if there is one) skip the critique batch, and only drafts whose critique
+asks for a revision are edited. Request, batch ID and result files are kept
+in a work directory, so an interrupted run continues where it stood: finished
+phases are read back from disk and submitted batches are polled rather than
+resubmitted.
+
+    python main.py --batch quotes.txt --llm-batch openai
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Sequence
+
+from agents.prompts import render_prompt, revision_messages
+from agents.usage import extract_usage, usage_from_openai
+from jobs.batch_runner import (
+    BatchStats,
+    ProgressJournal,
+    create_video,
+    deduplicate_quotes,
+    pending_quotes,
+    store_submitted,
+)
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+    from db.writer import BufferedVideoWriter
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# OpenAI accepts at most 50,000 requests per batch; larger phases are split.
+MAX_BATCH_REQUESTS = 50_000
+
+# Batch states after which no more results arrive. Expired and cancelled
+# batches still return the requests that finished in time.
+TERMINAL_STATUSES = ("completed", "expired", "cancelled", "failed")
+
+
+@dataclass
+class BatchResult:
+    """One request's outcome: the reply text, or the error it failed with."""
+
+    content: str | None = None
+    model: str = "unknown"
+    usage: dict[str, int] = field(default_factory=dict)
+    error: str | None = None
+
+
+def quote_key(quote: str) -> str:
+    """Stable request ID for ``quote``, the same in every phase and run."""
+    return hashlib.sha256(quote.encode("utf-8")).hexdigest()[:16]
+
+
+def batch_request(
+    custom_id: str, messages: Sequence[Any], model: str, temperature: float | None = None
+) -> dict:
+    """One line of a batch input file: a chat completion for ``messages``."""
+    from langchain_core.messages import convert_to_openai_messages
+
+    body: dict = {"model": model, "messages": convert_to_openai_messages(list(messages))}
+    if temperature is not None:
+        body["temperature"] = temperature
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+
+def parse_result(entry: dict) -> tuple[str, BatchResult]:
+    """Read one line of a batch output (or error) file."""
+    response = entry.get("response") or {}
+    body = response.get("body") or {}
+    if entry.get("error") or response.get("status_code") != 200:
+        error = entry.get("error") or body.get("error") or {}
+        message = error.get("message") or f"status {response.get('status_code')}"
+        return entry["custom_id"], BatchResult(error=message)
+    return entry["custom_id"], BatchResult(
+        content=body["choices"][0]["message"]["content"],
+        model=body.get("model") or "unknown",
+        usage=usage_from_openai(body.get("usage") or {}),
+    )
+
+
+def read_results(path: str) -> dict[str, BatchResult]:
+    results = {}
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                custom_id, result = parse_result(json.loads(line))
+                results[custom_id] = result
+    return results
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp_path, path)
+
+
+class OpenAIBatchBackend:
+    """Runs batch files on the OpenAI Batch API.
+
+    Credentials come from the environment, as for ``ChatOpenAI``.
+    """
+
+    def __init__(self, client: Any = None, completion_window: str = "24h"):
+        if client is None:
+            # Imported here: the OpenAI SDK is slow to import.
+            from openai import OpenAI
+
+            client = OpenAI()
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, requests_path: str) -> str:
+        with open(requests_path, "rb") as fh:
+            upload = self.client.files.create(file=fh, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def download(self, batch_id: str, results_path: str) -> None:
+        """Write a finished batch's successful and failed requests to ``results_path``."""
+        batch = self.client.batches.retrieve(batch_id)
+        parts = [
+            self.client.files.content(file_id).text
+            for file_id in (batch.output_file_id, batch.error_file_id)
+            if file_id
+        ]
+        _write_atomic(results_path, "".join(part.rstrip("\n") + "\n" for part in parts if part))
+
+
+class LocalBatchBackend:
+    """Runs batch files through a chat model in this process.
+
+    A stand-in for the provider's endpoint in tests and dry runs: each batch
+    is worked through by ``workers`` threads as it is submitted and is
+    ``completed`` by the time :meth:`submit` returns. Results use the OpenAI
+    output format; a request whose call raises gets an error line. Results
+    are held in memory, so a batch submitted by an earlier process reports
+    ``failed`` and is submitted again.
+
+    Each request runs on ``models(body["model"])`` when ``models`` is given
+    (``AgentOrchestrator.model`` resolves the routed names), otherwise on
+    ``llm``, with the request's ``temperature`` passed per call.
+    """
+
+    def __init__(
+        self, llm: Any = None, workers: int = 4, models: Callable[[str], Any] | None = None
+    ):
+        if llm is None and models is None:
+            raise ValueError("LocalBatchBackend needs an llm or a models lookup")
+        self.llm = llm
+        self.models = models
+        self.workers = workers
+        self.submitted: list[str] = []
+        self._results: dict[str, list[dict]] = {}
+
+    def submit(self, requests_path: str) -> str:
+        with open(requests_path, encoding="utf-8") as fh:
+            requests = [json.loads(line) for line in fh if line.strip()]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            lines = list(pool.map(self._run, requests))
+        batch_id = f"local-batch-{uuid.uuid4().hex[:12]}"
+        self._results[batch_id] = lines
+        self.submitted.append(requests_path)
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return "completed" if batch_id in self._results else "failed"
+
+    def download(self, batch_id: str, results_path: str) -> None:
+        lines = self._results[batch_id]
+        _write_atomic(results_path, "".join(json.dumps(line) + "\n" for line in lines))
+
+    def _run(self, request: dict) -> dict:
+        from langchain_core.messages import convert_to_messages
+
+        body = request["body"]
+        entry = {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"]}
+        kwargs = {"temperature": body["temperature"]} if "temperature" in body else {}
+        try:
+            llm = self.models(body["model"]) if self.models is not None else self.llm
+            response = llm.invoke(convert_to_messages(body["messages"]), **kwargs)
+        except Exception as exc:  # reported per request, like the real endpoint
+            return {**entry, "response": None, "error": {"code": "error", "message": str(exc)}}
+        usage = extract_usage(response)
+        metadata = getattr(response, "response_metadata", None) or {}
+        model = metadata.get("model_name") or getattr(llm, "model_name", None) or "unknown"
+        return {
+            **entry,
+            "response": {
+                "status_code": 200,
+                "body": {
+                    "object": "chat.completion",
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": response.content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": usage["input_tokens"],
+                        "completion_tokens": usage["output_tokens"],
+                        "total_tokens": usage["input_tokens"] + usage["output_tokens"],
+                        "prompt_tokens_details": {"cached_tokens": usage["cached_tokens"]},
+                    },
+                },
+            },
+            "error": None,
+        }
+
+
+class LLMBatchRunner:
+    """Run the story and screenplay agents' LLM steps as provider batches.
+
+    The orchestrator's agents supply the prompt templates, pre-critics,
+    accept rule and usage ledgers, so batch runs send the same prompts and
+    show up in the same usage reports as interactive ones (priced at the
+    batch discount). ``backend`` is an :class:`OpenAIBatchBackend`, a
+    :class:`LocalBatchBackend` or anything with the same ``submit``,
+    ``status`` and ``download`` methods. Each phase's requests name the model
+    its agent routes that node to. Pending batches are polled every
+    ``poll_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        orchestrator,
+        backend: Any,
+        workdir: str,
+        poll_interval: float = 60.0,
+        max_requests: int = MAX_BATCH_REQUESTS,
+    ):
+        self.orchestrator = orchestrator
+        self.backend = backend
+        self.workdir = workdir
+        self.poll_interval = poll_interval
+        self.max_requests = max_requests
+        self.phase_seconds: dict[str, float] = {}
+        self.phase_requests: dict[str, int] = {}
+        os.makedirs(workdir, exist_ok=True)
+
+    def run(self, quotes: Iterable[str]) -> tuple[dict[str, dict], dict[str, str]]:
+        """Story and screenplay for every quote.
+
+        Returns ``(outputs, errors)``: ``outputs`` maps each quote that got
+        through every phase to ``{"story": ..., "screenplay": ...}`` and
+        ``errors`` maps the others to the error of their failed request. A
+        failed request is sent again on the next run.
+        """
+        keys = {quote_key(quote): quote for quote in quotes}
+        stories, errors = self._run_agent(
+            "story",
+            self.orchestrator.story_agent,
+            {key: {"proverb": quote} for key, quote in keys.items()},
+        )
+        screenplays, screenplay_errors = self._run_agent(
+            "screenplay",
+            self.orchestrator.screenplay_agent,
+            {key: {"story": story, "proverb": keys[key]} for key, story in stories.items()},
+        )
+        errors.update(screenplay_errors)
+        outputs = {
+            keys[key]: {"story": stories[key], "screenplay": screenplay}
+            for key, screenplay in screenplays.items()
+        }
+        return outputs, {keys[key]: error for key, error in errors.items()}
+
+    def _run_agent(
+        self, name: str, agent, inputs: dict[str, dict[str, str]]
+    ) -> tuple[dict[str, str], dict[str, str]]:
+        """Draft, critique and, where asked, revise for every key of ``inputs``."""
+        errors: dict[str, str] = {}
+        drafts = self._collect(
+            self._phase(
+                name,
+                agent,
+                f"{name}_node",
+                {key: render_prompt(agent.template, values) for key, values in inputs.items()},
+            ),
+            errors,
+        )
+
+        critiques: dict[str, str] = {}
+        deferred = {}
+        for key, draft in drafts.items():
+            verdict, critique = "defer", ""
+            if agent.pre_critic is not None:
+                verdict, critique = agent.pre_critic.review(draft, inputs[key]["proverb"])
+            if verdict == "reject":
+                critiques[key] = critique
+            elif verdict == "defer":
+                deferred[key] = render_prompt(agent.critique_template, {name: draft})
+        critiques.update(
+            self._collect(self._phase(f"{name}_critique", agent, "critique_node", deferred), errors)
+        )
+
+        revisions = {
+            key: revision_messages(agent.template, inputs[key], drafts[key], critique)
+            for key, critique in critiques.items()
+            if key not in errors
+            and not agent.accepts(critique)
+        }
+        drafts.update(
+            self._collect(self._phase(f"{name}_edit", agent, "edit_node", revisions), errors)
+        )
+        return {key: draft for key, draft in drafts.items() if key not in errors}, errors
+
+    @staticmethod
+    def _collect(results: dict[str, BatchResult], errors: dict[str, str]) -> dict[str, str]:
+        """Reply text per key; failed keys are added to ``errors`` instead."""
+        contents = {}
+        for key, result in results.items():
+            if result.error is not None:
+                errors[key] = result.error
+            else:
+                contents[key] = result.content
+        return contents
+
+    def _path(self, phase: str, part: int, suffix: str) -> str:
+        return os.path.join(self.workdir, f"{phase}.{part:03d}.{suffix}")
+
+    def _parts(self, phase: str) -> list[int]:
+        prefix, suffix = f"{phase}.", ".requests.jsonl"
+        return sorted(
+            int(name[len(prefix) : -len(suffix)])
+            for name in os.listdir(self.workdir)
+            if name.startswith(prefix)
+            and name.endswith(suffix)
+            and name[len(prefix) : -len(suffix)].isdigit()
+        )
+
+    def _phase(
+        self, phase: str, agent, node: str, prompts: dict[str, list]
+    ) -> dict[str, BatchResult]:
+        """Results of ``prompts`` (messages per key), batching those not yet answered.
+
+        Every request file of the phase is a numbered part. Keys that an
+        earlier part answered successfully, or that sit in a part still
+        running, are not sent again; the rest go into new parts.
+        """
+        started = time.perf_counter()
+        parts = self._parts(phase)
+        results: dict[str, BatchResult] = {}
+        covered: set[str] = set()
+        for part in parts:
+            if os.path.exists(self._path(phase, part, "results.jsonl")):
+                part_results = read_results(self._path(phase, part, "results.jsonl"))
+                results.update(part_results)
+                covered.update(key for key, r in part_results.items() if r.error is None)
+            else:
+                with open(self._path(phase, part, "requests.jsonl"), encoding="utf-8") as fh:
+                    covered.update(json.loads(line)["custom_id"] for line in fh if line.strip())
+
+        llms = {"critique_node": agent.critique_llm, "edit_node": agent.edit_llm}
+        llm = llms.get(node, agent.llm)
+        model = getattr(llm, "model_name", None) or "unknown"
+        temperature = getattr(llm, "temperature", None)
+        missing = [key for key in prompts if key not in covered]
+        next_part = parts[-1] + 1 if parts else 0
+        for offset in range(0, len(missing), self.max_requests):
+            lines = [
+                json.dumps(batch_request(key, prompts[key], model, temperature), ensure_ascii=False)
+                for key in missing[offset : offset + self.max_requests]
+            ]
+            _write_atomic(self._path(phase, next_part, "requests.jsonl"), "\n".join(lines) + "\n")
+            parts.append(next_part)
+            next_part += 1
+
+        unfinished = [
+            part for part in parts if not os.path.exists(self._path(phase, part, "results.jsonl"))
+        ]
+        fresh = self._wait(phase, unfinished)
+        results.update(fresh)
+
+        seconds = time.perf_counter() - started
+        for key, result in fresh.items():
+            if result.error is None:
+                # Latency of a batch call is the phase's turnaround.
+                agent.usage.observe(node, result.model, result.usage, seconds, batch=True)
+                if node == "critique_node":
+                    agent.usage.observe_verdict(result.model, agent.accepts(result.content))
+        if prompts:
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+            self.phase_requests[phase] = len(prompts)
+        return {
+            key: results.get(key) or BatchResult(error="no result returned by the batch")
+            for key in prompts
+        }
+
+    def _wait(self, phase: str, parts: list[int]) -> dict[str, BatchResult]:
+        """Submit the parts that have no batch yet and collect every part's results."""
+        pending: dict[int, str] = {}
+        for part in parts:
+            id_path = self._path(phase, part, "batch_id")
+            if os.path.exists(id_path):
+                with open(id_path, encoding="utf-8") as fh:
+                    pending[part] = fh.read().strip()
+                continue
+            pending[part] = self.backend.submit(self._path(phase, part, "requests.jsonl"))
+            _write_atomic(id_path, pending[part])
+            logger.info("Submitted %s part %d as batch %s", phase, part, pending[part])
+
+        results: dict[str, BatchResult] = {}
+        while pending:
+            for part, batch_id in list(pending.items()):
+                status = self.backend.status(batch_id)
+                if status not in TERMINAL_STATUSES:
+                    continue
+                if status == "failed":
+                    # Forget the batch so the next run submits the part again;
+                    # this run reports its requests as failed and goes on.
+                    os.remove(self._path(phase, part, "batch_id"))
+                    logger.error("Batch %s for %s part %d failed", batch_id, phase, part)
+                    failed = BatchResult(error=f"batch {batch_id} failed")
+                    with open(self._path(phase, part, "requests.jsonl"), encoding="utf-8") as fh:
+                        results.update(
+                            (json.loads(line)["custom_id"], failed) for line in fh if line.strip()
+                        )
+                    del pending[part]
+                    continue
+                results_path = self._path(phase, part, "results.jsonl")
+                self.backend.download(batch_id, results_path)
+                results.update(read_results(results_path))
+                logger.info("Batch %s for %s part %d %s", batch_id, phase, part, status)
+                del pending[part]
+            if pending:
+                logger.info("Waiting for %d %s batches", len(pending), phase)
+                time.sleep(self.poll_interval)
+        return results
+
+
+def run_llm_batch(
+    orchestrator,
+    quotes: Iterable[str],
+    journal: ProgressJournal,
+    session_factory: Callable[[], Session],
+    backend: Any,
+    workdir: str,
+    concurrency: int = 4,
+    test: bool = True,
+    dedup: str = "off",
+    writer: BufferedVideoWriter | None = None,
+    poll_interval: float = 60.0,
+) -> tuple[BatchStats, LLMBatchRunner]:
+    """Like :func:`jobs.batch_runner.run_batch`, with the LLM steps batched.
+
+    Stories and screenplays for all pending quotes are produced phase by
+    phase with an :class:`LLMBatchRunner` on ``backend``; the videos are then
+    submitted with at most ``concurrency`` in flight. The journal, dedup
+    policy, ``writer`` and reuse of already accepted videos work as in
+    ``run_batch``. The LLM phases' wall
+    times are reported as stages of the returned stats.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    stats = BatchStats()
+    pending = pending_quotes(quotes, journal, stats)
+    pending = deduplicate_quotes(orchestrator, pending, journal, session_factory, stats, dedup)
+    logger.info(
+        "Starting LLM batch run: %d quotes pending, %d skipped", len(pending), stats.skipped
+    )
+
+    # Quotes whose video was accepted last time only need their metadata stored.
+    submitted = {quote: entry for quote, entry in journal.submitted().items() if quote in pending}
+    runner = LLMBatchRunner(orchestrator, backend, workdir, poll_interval=poll_interval)
+    outputs, errors = runner.run([quote for quote in pending if quote not in submitted])
+    for phase, seconds in runner.phase_seconds.items():
+        stats.record_stage(phase, seconds)
+    for quote, error in errors.items():
+        logger.error("LLM batch failed for quote %r: %s", quote, error)
+        journal.record(quote, "failed", error=error)
+        stats.record_result(False)
+
+    def submit(quote: str, output: dict) -> dict:
+        start = time.perf_counter()
+        if quote in submitted:
+            video = store_submitted(orchestrator, output, session_factory, writer=writer)
+        else:
+            video = create_video(
+                orchestrator,
+                quote,
+                output["story"],
+                output["screenplay"],
+                session_factory,
+                test=test,
+                writer=writer,
+                journal=journal,
+            )
+        stats.record_stage("video", time.perf_counter() - start)
+        return video
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(submit, quote, output): quote
+            for quote, output in {**outputs, **submitted}.items()
+        }
+        for future in as_completed(futures):
+            quote = futures[future]
+            try:
+                video = future.result()
+            except Exception as exc:  # keep the batch going on per-quote failures
+                logger.error("Failed to submit video for quote %r: %s", quote, exc)
+                journal.record(quote, "failed", error=str(exc))
+                stats.record_result(False)
+            else:
+                journal.record(quote, "done", video_id=video.get("id"), llm_batch=True)
+                stats.record_result(True)
+
+    stats.finish()
+    return stats, runner
@@ -1,45 +1,465 @@
+from __future__ import annotations
+
+import asyncio
 import os
 import time
 import logging
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, AsyncIterator, Iterator
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from db import SessionLocal, models
+from db import AsyncSessionLocal, SessionLocal, dispose_async_engine, models, utcnow
 from utils import SynthesiaClient
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from utils import AsyncSynthesiaClient
+
 logger = logging.getLogger(__name__)
 
-def check_pending_videos(session: Session, client: SynthesiaClient) -> int:
-    """Check videos marked as in_progress and update their status."""
-    updated = 0
-    videos = session.query(models.Video).filter(models.Video.status == "in_progress").all()
-    for video in videos:
+DEFAULT_WORKERS = 16
+DEFAULT_CHUNK_SIZE = 500
+
+
+class PollSchedule:
+    """Decide when an in-progress video should next be checked.
+
+    Polling is sparse until the render is halfway to its expected duration,
+    dense (every ``min_interval``) around the expected completion time, and
+    backs off exponentially for renders that run long: once overdue, the next
+    check happens after as long again as the video has been overdue.
+    """
+
+    def __init__(
+        self,
+        expected_render: float = 300.0,
+        min_interval: float = 15.0,
+        max_interval: float = 1800.0,
+    ):
+        self.expected_render = expected_render
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+    @classmethod
+    def from_env(cls) -> "PollSchedule":
+        return cls(
+            expected_render=float(os.getenv("VIDEO_EXPECTED_RENDER_SECONDS", "300")),
+            min_interval=float(os.getenv("VIDEO_POLL_MIN_INTERVAL", "15")),
+            max_interval=float(os.getenv("VIDEO_POLL_MAX_INTERVAL", "1800")),
+        )
+
+    def next_delay(self, age: float) -> float:
+        """Seconds until the next check for a video submitted ``age`` seconds ago."""
+        window_start = self.expected_render * 0.5
+        window_end = self.expected_render * 1.5
+        if age < window_start:
+            delay = window_start - age
+        elif age < window_end:
+            delay = self.min_interval
+        else:
+            delay = age - window_end
+        return min(self.max_interval, max(self.min_interval, delay))
+
+    @property
+    def first_delay(self) -> float:
+        """Seconds from submission to the first check of a video."""
+        return self.next_delay(0.0)
+
+    def first_check_cutoff(self, now: datetime) -> datetime:
+        """Videos never checked are due once created at or before this time."""
+        return now - timedelta(seconds=self.first_delay)
+
+
+def _update_chunks(column: str, values: dict[str, object], chunk_size: int):
+    """Yield ``(chunk, UPDATE statement)`` pairs setting ``column`` per video id."""
+    items = list(values.items())
+    for start in range(0, len(items), chunk_size):
+        chunk = dict(items[start:start + chunk_size])
+        yield chunk, (
+            update(models.Video)
+            .where(models.Video.id.in_(chunk))
+            .values({column: case(chunk, value=models.Video.id)})
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _bulk_update(
+    session: Session,
+    column: str,
+    values: dict[str, object],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Set ``column`` per video id with one UPDATE statement per chunk."""
+    applied = 0
+    for chunk, stmt in _update_chunks(column, values, chunk_size):
         try:
-            status_model = client.get_video_status(video.id)
-            status = status_model.status
-            if status and status != video.status:
-                video.status = status
-                session.commit()
-                updated += 1
-                logger.info("Updated video %s status to %s", video.id, status)
-        except requests.RequestException as exc:
+            session.execute(stmt)
+            session.commit()
+        except SQLAlchemyError as exc:
             session.rollback()
-            logger.error("Failed to fetch status for %s: %s", video.id, exc)
+            logger.error("Failed to update %s for %d videos: %s", column, len(chunk), exc)
+            continue
+        applied += len(chunk)
+    return applied
+
+
+def apply_status_changes(
+    session: Session, changes: dict[str, str], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Write ``{video_id: status}`` changes with one UPDATE statement per chunk."""
+    return _bulk_update(session, "status", changes, chunk_size)
+
+
+def _due_page(now: datetime, first_cutoff: datetime, last_id: str | None, page_size: int):
+    video = models.Video
+    query = select(video.id, video.status, video.created_at).where(
+        video.status == "in_progress",
+        or_(
+            video.next_check_at <= now,
+            # Never checked: due one first interval after submission.
+            and_(
+                video.next_check_at.is_(None),
+                or_(video.created_at.is_(None), video.created_at <= first_cutoff),
+            ),
+        ),
+    )
+    if last_id is not None:
+        query = query.where(models.Video.id > last_id)
+    return query.order_by(models.Video.id).limit(page_size)
+
+
+def iter_due_videos(
+    session: Session,
+    now: datetime,
+    page_size: int = DEFAULT_CHUNK_SIZE,
+    schedule: PollSchedule | None = None,
+) -> Iterator[list]:
+    """Yield pages of ``(id, status, created_at)`` rows for due videos.
+
+    A video is due when its ``next_check_at`` has passed or, if it has never
+    been checked, when ``schedule``'s first interval since ``created_at`` has.
+
+    Only the columns the poller needs are loaded, never the story and
+    screenplay text. The status filter is served by the
+    ``ix_videos_status_*`` indexes and pages are fetched with keyset
+    pagination on the primary key, so memory stays flat however many videos
+    are in flight. The read transaction is closed after every page.
+    """
+    first_cutoff = (schedule or PollSchedule()).first_check_cutoff(now)
+    last_id: str | None = None
+    while True:
+        rows = session.execute(_due_page(now, first_cutoff, last_id, page_size)).all()
+        # Don't hold the read transaction open while waiting on the network.
+        session.commit()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1].id
+
+
+def _plan_update(
+    row,
+    status_model,
+    now: datetime,
+    schedule: PollSchedule,
+    changes: dict[str, str],
+    next_checks: dict[str, datetime],
+    metrics=None,
+) -> None:
+    """Record a status change for ``row``, or when to check it again."""
+    status = status_model.status
+    if status and status != row.status:
+        changes[row.id] = status
+        logger.info("Updating video %s status to %s", row.id, status)
+        if metrics is not None:
+            metrics.record_since("polling", status_model.lastUpdatedAt)
+    else:
+        age = (now - (row.created_at or now)).total_seconds()
+        next_checks[row.id] = now + timedelta(seconds=schedule.next_delay(age))
+
+
+def check_pending_videos(
+    session: Session,
+    client: SynthesiaClient,
+    max_workers: int = DEFAULT_WORKERS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    metrics=None,
+    schedule: PollSchedule | None = None,
+    now: datetime | None = None,
+) -> int:
+    """Check in_progress videos that are due and update their status.
+
+    A video is due when its ``next_check_at`` is in the past or, before its
+    first check, once ``schedule.first_delay`` has passed since it was
+    created. Times are naive UTC (:func:`db.utcnow`). Due videos are
+    processed a page of ``chunk_size`` at a time: status fetches run on a
+    pool of ``max_workers`` threads, then the page's status changes and the
+    next check time of still-running videos are written in bulk.
+    When ``metrics`` (a ``DetectionMetrics``) is given, the delay between each
+    render finishing and this sweep noticing it is recorded as ``polling``.
+    """
+    started = time.perf_counter()
+    schedule = schedule or PollSchedule()
+    now = now or utcnow()
+    scanned = updated = failed = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for rows in iter_due_videos(session, now, chunk_size, schedule):
+            scanned += len(rows)
+            current = {row.id: row for row in rows}
+            changes: dict[str, str] = {}
+            next_checks: dict[str, datetime] = {}
+            futures = {
+                pool.submit(client.get_video_status, video_id): video_id
+                for video_id in current
+            }
+            for future in as_completed(futures):
+                video_id = futures[future]
+                try:
+                    status_model = future.result()
+                except Exception as exc:  # one bad video must not lose the page's updates
+                    failed += 1
+                    logger.error("Failed to fetch status for %s: %s", video_id, exc)
+                    next_checks[video_id] = now + timedelta(seconds=schedule.min_interval)
+                    continue
+                _plan_update(
+                    current[video_id], status_model, now, schedule, changes, next_checks, metrics
+                )
+
+            updated += apply_status_changes(session, changes, chunk_size)
+            _bulk_update(session, "next_check_at", next_checks, chunk_size)
+
+    logger.info(
+        "Status cycle took %.2fs: scanned %d, changed %d, fetch errors %d",
+        time.perf_counter() - started,
+        scanned,
+        updated,
+        failed,
+    )
     return updated
 
 
+async def _abulk_update(
+    session: AsyncSession,
+    column: str,
+    values: dict[str, object],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Async :func:`_bulk_update`."""
+    applied = 0
+    for chunk, stmt in _update_chunks(column, values, chunk_size):
+        try:
+            await session.execute(stmt)
+            await session.commit()
+        except SQLAlchemyError as exc:
+            await session.rollback()
+            logger.error("Failed to update %s for %d videos: %s", column, len(chunk), exc)
+            continue
+        applied += len(chunk)
+    return applied
+
+
+async def aapply_status_changes(
+    session: AsyncSession, changes: dict[str, str], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Async :func:`apply_status_changes`."""
+    return await _abulk_update(session, "status", changes, chunk_size)
+
+
+async def aiter_due_videos(
+    session: AsyncSession,
+    now: datetime,
+    page_size: int = DEFAULT_CHUNK_SIZE,
+    schedule: PollSchedule | None = None,
+) -> AsyncIterator[list]:
+    """Async :func:`iter_due_videos`."""
+    first_cutoff = (schedule or PollSchedule()).first_check_cutoff(now)
+    last_id: str | None = None
+    while True:
+        rows = (await session.execute(_due_page(now, first_cutoff, last_id, page_size))).all()
+        await session.commit()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1].id
+
+
+async def acheck_pending_videos(
+    session: AsyncSession,
+    client: AsyncSynthesiaClient,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    concurrency: int | None = None,
+    metrics=None,
+    schedule: PollSchedule | None = None,
+    now: datetime | None = None,
+) -> int:
+    """Async :func:`check_pending_videos` on one event loop.
+
+    Status fetches for a page go out through ``client.get_status_many`` with
+    at most ``concurrency`` in flight (the client's default if ``None``);
+    reads and bulk updates use the ``AsyncSession``, so no threads are needed.
+    """
+    started = time.perf_counter()
+    schedule = schedule or PollSchedule()
+    now = now or utcnow()
+    scanned = updated = failed = 0
+
+    async for rows in aiter_due_videos(session, now, chunk_size, schedule):
+        scanned += len(rows)
+        changes: dict[str, str] = {}
+        next_checks: dict[str, datetime] = {}
+        results = await client.get_status_many([row.id for row in rows], concurrency)
+        for row, result in zip(rows, results):
+            if not result.ok:
+                failed += 1
+                logger.error("Failed to fetch status for %s: %s", row.id, result.error)
+                next_checks[row.id] = now + timedelta(seconds=schedule.min_interval)
+                continue
+            _plan_update(row, result.result, now, schedule, changes, next_checks, metrics)
+
+        updated += await aapply_status_changes(session, changes, chunk_size)
+        await _abulk_update(session, "next_check_at", next_checks, chunk_size)
+
+    logger.info(
+        "Status cycle took %.2fs: scanned %d, changed %d, fetch errors %d",
+        time.perf_counter() - started,
+        scanned,
+        updated,
+        failed,
+    )
+    return updated
+
+
+def _earliest_checks():
+    in_progress = models.Video.status == "in_progress"
+    scheduled = select(func.min(models.Video.next_check_at)).where(in_progress)
+    unchecked = (
+        select(func.count(), func.min(models.Video.created_at))
+        .select_from(models.Video)
+        .where(in_progress, models.Video.next_check_at.is_(None))
+    )
+    return scheduled, unchecked
+
+
+def _seconds_until(
+    scheduled: datetime | None, unchecked, now: datetime, schedule: PollSchedule
+) -> float | None:
+    count, oldest = unchecked
+    candidates = [scheduled] if scheduled is not None else []
+    if count:
+        if oldest is None:
+            return 0.0
+        candidates.append(oldest + timedelta(seconds=schedule.first_delay))
+    if not candidates:
+        return None
+    return max(0.0, (min(candidates) - now).total_seconds())
+
+
+def seconds_until_next_check(
+    session: Session, now: datetime | None = None, schedule: PollSchedule | None = None
+) -> float | None:
+    """Seconds until the earliest scheduled check, or ``None`` if none pending."""
+    now = now or utcnow()
+    scheduled, unchecked = _earliest_checks()
+    result = session.execute(scheduled).scalar(), session.execute(unchecked).one()
+    session.commit()
+    return _seconds_until(*result, now, schedule or PollSchedule())
+
+
+async def aseconds_until_next_check(
+    session: AsyncSession, now: datetime | None = None, schedule: PollSchedule | None = None
+) -> float | None:
+    """Async :func:`seconds_until_next_check`."""
+    now = now or utcnow()
+    scheduled, unchecked = _earliest_checks()
+    result = (await session.execute(scheduled)).scalar(), (await session.execute(unchecked)).one()
+    await session.commit()
+    return _seconds_until(*result, now, schedule or PollSchedule())
+
+
+def _detection_metrics():
+    """Polling-side ``DetectionMetrics``, served like the webhook receiver's.
+
+    With ``VIDEO_STATUS_METRICS_PORT`` set, ``/metrics`` and ``/metrics.json``
+    expose the same series the receiver does, labelled ``source="polling"``.
+    """
+    # Imported here: the receiver module imports this one.
+    from jobs.webhook_receiver import DetectionMetrics
+    from utils.metrics import serve_metrics
+
+    metrics = DetectionMetrics()
+    port = os.getenv("VIDEO_STATUS_METRICS_PORT")
+    if port:
+        serve_metrics(metrics, port=int(port))
+    return metrics
+
+
+def _loop_settings() -> tuple[int, PollSchedule, bool, int]:
+    workers = int(os.getenv("VIDEO_STATUS_WORKERS", str(DEFAULT_WORKERS)))
+    webhooks = os.getenv("VIDEO_STATUS_WEBHOOKS", "").lower() in ("1", "true", "yes")
+    if webhooks:
+        # Callbacks deliver status changes; polling only reconciles misses.
+        max_sleep = int(os.getenv("VIDEO_STATUS_RECONCILE_INTERVAL", "900"))
+    else:
+        # Upper bound on the sleep so newly submitted videos are picked up.
+        max_sleep = int(os.getenv("VIDEO_STATUS_CHECK_INTERVAL", "60"))
+    return workers, PollSchedule.from_env(), webhooks, max_sleep
+
+
 def run_forever() -> None:
-    client = SynthesiaClient()
-    interval = int(os.getenv("VIDEO_STATUS_CHECK_INTERVAL", "60"))
+    workers, schedule, webhooks, max_sleep = _loop_settings()
+    metrics = _detection_metrics()
+    client = SynthesiaClient(pool_size=workers)
     while True:
         session = SessionLocal()
         try:
-            check_pending_videos(session, client)
+            check_pending_videos(
+                session, client, max_workers=workers, metrics=metrics, schedule=schedule
+            )
+            wait = None if webhooks else seconds_until_next_check(session, schedule=schedule)
         finally:
             session.close()
-        time.sleep(interval)
+        logger.info("Synthesia client stats: %s", client.stats())
+        logger.info("Detection latency:\n%s", metrics.format_summary())
+        time.sleep(max_sleep if wait is None else min(max_sleep, wait))
+
+
+async def arun_forever() -> None:
+    """:func:`run_forever` on one event loop with the async client and engine."""
+    from utils import AsyncSynthesiaClient
+
+    workers, schedule, webhooks, max_sleep = _loop_settings()
+    metrics = _detection_metrics()
+    try:
+        async with AsyncSynthesiaClient(pool_size=workers, concurrency=workers) as client:
+            while True:
+                async with AsyncSessionLocal() as session:
+                    await acheck_pending_videos(
+                        session, client, metrics=metrics, schedule=schedule
+                    )
+                    wait = (
+                        None
+                        if webhooks
+                        else await aseconds_until_next_check(session, schedule=schedule)
+                    )
+                logger.info("Detection latency:\n%s", metrics.format_summary())
+                await asyncio.sleep(max_sleep if wait is None else min(max_sleep, wait))
+    finally:
+        await dispose_async_engine()
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    run_forever()
\ No newline at end of file
+    if os.getenv("VIDEO_STATUS_ASYNC", "").lower() in ("1", "true", "yes"):
+        asyncio.run(arun_forever())
+    else:
+        run_forever()
@@ -0,0 +1,250 @@
+"""HTTP receiver for Synthesia video status callbacks.
+
+Callbacks are authenticated with an HMAC-SHA256 signature over
+``"<timestamp>.<raw body>"`` using the shared webhook secret, sent in the
+``Synthesia-Signature`` and ``Synthesia-Timestamp`` headers. A verified
+callback updates ``models.Video.status`` immediately; the polling job in
+:mod:`jobs.video_status_updater` then only needs to run as a slow
+reconciliation sweep for videos whose callback was lost.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import requests
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from db import SessionLocal, models
+from utils.metrics import Histogram, percentile, prometheus_histogram
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "Synthesia-Signature"
+TIMESTAMP_HEADER = "Synthesia-Timestamp"
+WEBHOOK_PATH = "/webhooks/synthesia"
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    message = timestamp.encode("utf-8") + b"." + body
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(
+    secret: str,
+    timestamp: str | None,
+    body: bytes,
+    signature: str | None,
+    tolerance: float = 300.0,
+) -> bool:
+    """Check the callback signature and reject stale (replayed) timestamps."""
+    if not timestamp or not signature:
+        return False
+    try:
+        sent_at = float(timestamp)
+    except ValueError:
+        return False
+    if abs(time.time() - sent_at) > tolerance:
+        return False
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature)
+
+
+# Detection latency spans a webhook's seconds to a backed-off poll's minutes.
+DETECTION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+
+class DetectionMetrics:
+    """Latency between a render finishing and us noticing, per source.
+
+    The webhook receiver records ``webhook`` and the status poller records
+    ``polling``; both export the same ``summary()`` JSON and the same
+    ``aiinfluencer_status_detection_seconds`` histogram, so the two sources
+    can be compared side by side.
+    """
+
+    def __init__(self, buckets=DETECTION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.samples: dict[str, list[float]] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def record(self, source: str, latency: float) -> None:
+        latency = max(0.0, latency)
+        with self._lock:
+            self.samples.setdefault(source, []).append(latency)
+            self.histograms.setdefault(source, Histogram(self.buckets)).observe(latency)
+
+    def record_since(self, source: str, updated_at: float | None) -> None:
+        """Record latency relative to Synthesia's ``lastUpdatedAt`` timestamp."""
+        if updated_at is not None:
+            self.record(source, time.time() - updated_at)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                source: {
+                    "count": len(values),
+                    "p50": percentile(values, 50),
+                    "p95": percentile(values, 95),
+                }
+                for source, values in self.samples.items()
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            rows = [({"source": source}, hist) for source, hist in self.histograms.items()]
+            lines = prometheus_histogram(
+                "aiinfluencer_status_detection_seconds",
+                "Delay between a render finishing and the status change being noticed.",
+                rows,
+            )
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self) -> str:
+        lines = [f"{'detected by':<12}{'count':>7}{'p50 s':>9}{'p95 s':>9}"]
+        for source, row in sorted(self.summary().items()):
+            lines.append(f"{source:<12}{row['count']:>7}{row['p50']:>9.1f}{row['p95']:>9.1f}")
+        return "\n".join(lines)
+
+
+def handle_callback(
+    session: Session, payload: dict, metrics: DetectionMetrics | None = None
+) -> bool:
+    """Apply one callback payload. Returns ``True`` if a row was changed.
+
+    Database errors propagate (after a rollback) so the caller can answer
+    with a 5xx and the sender retries the callback.
+    """
+    data = payload.get("data") or {}
+    video_id = data.get("id")
+    status = data.get("status")
+    if not video_id or not status:
+        raise ValueError("callback payload is missing data.id or data.status")
+
+    current = session.get(models.Video, video_id)
+    if current is None:
+        logger.warning("Callback for unknown video %s", video_id)
+        return False
+    if current.status == status:
+        return False
+
+    current.status = status
+    try:
+        session.commit()
+    except SQLAlchemyError:
+        session.rollback()
+        raise
+    logger.info("Webhook updated video %s status to %s", video_id, status)
+    if metrics is not None:
+        metrics.record_since("webhook", data.get("lastUpdatedAt"))
+    return True
+
+
+def make_server(
+    host: str,
+    port: int,
+    secret: str,
+    session_factory: Callable[[], Session] = SessionLocal,
+    metrics: DetectionMetrics | None = None,
+) -> ThreadingHTTPServer:
+    """Build (but don't start) the callback HTTP server."""
+    metrics = metrics or DetectionMetrics()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != WEBHOOK_PATH:
+                self._reply(404, {"error": "not found"})
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if not verify_signature(
+                secret,
+                self.headers.get(TIMESTAMP_HEADER),
+                body,
+                self.headers.get(SIGNATURE_HEADER),
+            ):
+                self._reply(401, {"error": "invalid signature"})
+                return
+            session = session_factory()
+            try:
+                changed = handle_callback(session, json.loads(body), metrics)
+            except (ValueError, AttributeError) as exc:
+                self._reply(400, {"error": str(exc)})
+                return
+            except SQLAlchemyError:
+                logger.exception("Failed to apply status callback")
+                self._reply(503, {"error": "database unavailable"})
+                return
+            finally:
+                session.close()
+            self._reply(200, {"updated": changed})
+
+        def do_GET(self):
+            # Same endpoints and payloads as utils.metrics.serve_metrics.
+            if self.path == "/metrics":
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.path == "/metrics.json":
+                self._reply(200, metrics.summary())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.metrics = metrics
+    return server
+
+
+def send_test_callback(
+    url: str, secret: str, payload: dict, timestamp: str | None = None
+) -> requests.Response:
+    """Local stand-in for Synthesia: POST a correctly signed callback."""
+    body = json.dumps(payload).encode("utf-8")
+    timestamp = timestamp or str(int(time.time()))
+    headers = {
+        "Content-Type": "application/json",
+        TIMESTAMP_HEADER: timestamp,
+        SIGNATURE_HEADER: sign_payload(secret, timestamp, body),
+    }
+    return requests.post(url, data=body, headers=headers, timeout=10)
+
+
+def run_forever() -> None:
+    secret = os.environ.get("SYNTHESIA_WEBHOOK_SECRET")
+    if not secret:
+        raise RuntimeError("SYNTHESIA_WEBHOOK_SECRET must be set")
+    host = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    port = int(os.getenv("WEBHOOK_PORT", "8080"))
+    server = make_server(host, port, secret)
+    logger.info("Listening for Synthesia callbacks on %s:%d%s", host, port, WEBHOOK_PATH)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_forever()
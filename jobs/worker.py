@@ -0,0 +1,513 @@
+"""Distributed job queue: enqueue proverbs and run workers that produce them.
+
+Any number of worker processes, on any number of machines, can share the
+``jobs`` table. A worker claims up to ``concurrency`` jobs at a time with
+``SELECT ... FOR UPDATE SKIP LOCKED``, so workers never block on or claim each
+other's rows, and holds a lease on each claimed job that it renews while the
+job runs. If a worker dies its leases run out and the jobs are claimed again
+elsewhere. Failed attempts are retried with exponential backoff until a job
+reaches its ``max_attempts``.
+
+    python main.py --enqueue --batch quotes.txt
+    JOB_WORKER_CONCURRENCY=4 python -m jobs.worker
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from sqlalchemy import and_, or_, select, update
+
+from db.models import Job
+from db.utils import LOOKUP_CHUNK_SIZE, proverb_hash, store_videos_bulk, utcnow
+from db.writer import BufferedVideoWriter
+from jobs.batch_runner import BatchStats
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_LEASE_SECONDS = 600.0
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_MAX_ATTEMPTS = 5
+ACTIVE_STATUSES = ("queued", "running")
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    proverb: str
+    test: bool
+    attempts: int
+    max_attempts: int
+    # Synthesia video an earlier attempt already submitted, if any.
+    video_id: str | None = None
+
+    @property
+    def run_id(self) -> str:
+        """Checkpoint run ID, shared by every attempt so retries resume."""
+        return f"job-{self.id}"
+
+
+def retry_delay(
+    attempts: int, base: float = 30.0, cap: float = 3600.0, rng: random.Random | None = None
+) -> float:
+    """Seconds to wait after failed attempt number ``attempts``.
+
+    Doubles with each attempt up to ``cap``; the second half of the delay is
+    random so jobs that failed together (e.g. an API outage) spread out.
+    """
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return delay * (0.5 + (rng or random).random() / 2)
+
+
+def enqueue_jobs(
+    session: Session,
+    proverbs: Iterable[str],
+    test: bool = True,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    now: datetime | None = None,
+) -> list[int]:
+    """Queue one job per proverb and return the new job IDs.
+
+    Proverbs that already have a queued or running job, or that repeat an
+    earlier proverb in ``proverbs``, are not queued again.
+    """
+    now = now or utcnow()
+    by_hash: dict[str, str] = {}
+    for proverb in proverbs:
+        by_hash.setdefault(proverb_hash(proverb), proverb)
+
+    hashes = list(by_hash)
+    active: set[str] = set()
+    for start in range(0, len(hashes), LOOKUP_CHUNK_SIZE):
+        chunk = hashes[start : start + LOOKUP_CHUNK_SIZE]
+        active.update(
+            session.scalars(
+                select(Job.proverb_hash).where(
+                    Job.proverb_hash.in_(chunk), Job.status.in_(ACTIVE_STATUSES)
+                )
+            )
+        )
+
+    jobs = [
+        Job(
+            proverb=proverb,
+            proverb_hash=digest,
+            test=test,
+            max_attempts=max_attempts,
+            available_at=now,
+            created_at=now,
+        )
+        for digest, proverb in by_hash.items()
+        if digest not in active
+    ]
+    session.add_all(jobs)
+    session.commit()
+    if active:
+        logger.info("Not queueing %d proverbs that already have an active job", len(active))
+    return [job.id for job in jobs]
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(Job.status == "queued", Job.available_at <= now),
+        and_(Job.status == "running", Job.lease_expires_at <= now),
+    )
+
+
+def claim_jobs(
+    session: Session,
+    worker_id: str,
+    limit: int,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    now: datetime | None = None,
+) -> list[ClaimedJob]:
+    """Claim up to ``limit`` due jobs for ``worker_id``.
+
+    Due jobs are queued jobs whose backoff has passed and running jobs whose
+    lease has expired. Candidates are selected ``FOR UPDATE SKIP LOCKED`` and
+    updated in the same statement, so concurrent workers get disjoint sets
+    (SQLite has no row locks, but serialises the whole statement). Jobs whose
+    lease expired on their last attempt are marked failed instead.
+    """
+    now = now or utcnow()
+    session.execute(
+        update(Job)
+        .where(
+            Job.status == "running",
+            Job.lease_expires_at <= now,
+            Job.attempts >= Job.max_attempts,
+        )
+        .values(
+            status="failed",
+            locked_by=None,
+            lease_expires_at=None,
+            last_error="Lease expired on the final attempt",
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    candidates = (
+        select(Job.id)
+        .where(_claimable(now), Job.attempts < Job.max_attempts)
+        .order_by(Job.available_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = session.execute(
+        update(Job)
+        .where(Job.id.in_(candidates), _claimable(now))
+        .values(
+            status="running",
+            attempts=Job.attempts + 1,
+            locked_by=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            updated_at=now,
+        )
+        .returning(
+            Job.id, Job.proverb, Job.test, Job.attempts, Job.max_attempts, Job.video_id
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    session.commit()
+    return [ClaimedJob(*row) for row in rows]
+
+
+def renew_leases(
+    session: Session,
+    worker_id: str,
+    job_ids: Iterable[int],
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    now: datetime | None = None,
+) -> set[int]:
+    """Extend this worker's leases on ``job_ids``; return the IDs still held."""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return set()
+    now = now or utcnow()
+    held = session.scalars(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.locked_by == worker_id, Job.status == "running")
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+        .returning(Job.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    session.commit()
+    return set(held)
+
+
+class LeaseLost(RuntimeError):
+    """This worker no longer holds the job's lease; another worker owns it now."""
+
+
+def check_lease(
+    session: Session,
+    job: ClaimedJob,
+    worker_id: str,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    now: datetime | None = None,
+) -> str | None:
+    """Renew the lease on ``job`` before a step that must not run twice.
+
+    Returns the Synthesia video ID recorded on the job, if any. Raises
+    :class:`LeaseLost` if another worker has taken the job over.
+    """
+    now = now or utcnow()
+    row = session.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.locked_by == worker_id, Job.status == "running")
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+        .returning(Job.video_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    session.commit()
+    if row is None:
+        raise LeaseLost(f"lost the lease on job {job.id}")
+    return row.video_id
+
+
+def record_submission(session: Session, job: ClaimedJob, video_id: str) -> None:
+    """Store the Synthesia ID of ``job``'s video as soon as it is submitted.
+
+    Not fenced by the lease: even if this worker has just lost the job, the
+    worker that took it over must see the render exists and not submit again.
+    """
+    session.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.video_id.is_(None))
+        .values(video_id=video_id)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+
+
+def _finish(session: Session, job: ClaimedJob, worker_id: str, values: dict) -> bool:
+    # Only the current lease holder may record an outcome: if this worker's
+    # lease expired and another worker took the job over, the update is a no-op.
+    result = session.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.locked_by == worker_id, Job.status == "running")
+        .values(locked_by=None, lease_expires_at=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def complete_job(
+    session: Session,
+    job: ClaimedJob,
+    worker_id: str,
+    video_id: str | None,
+    now: datetime | None = None,
+) -> bool:
+    """Mark ``job`` done; ``False`` if this worker no longer holds its lease."""
+    now = now or utcnow()
+    return _finish(
+        session,
+        job,
+        worker_id,
+        {"status": "done", "video_id": video_id, "last_error": None, "updated_at": now},
+    )
+
+
+def fail_job(
+    session: Session,
+    job: ClaimedJob,
+    worker_id: str,
+    error: str,
+    delay: float,
+    now: datetime | None = None,
+) -> str | None:
+    """Record a failed attempt and return the job's new status.
+
+    The job is queued again after ``delay`` seconds, or marked ``failed`` if
+    that was its last attempt. Returns ``None`` if the lease was lost.
+    """
+    now = now or utcnow()
+    values: dict = {"last_error": error[:2000], "updated_at": now}
+    if job.attempts >= job.max_attempts:
+        values["status"] = "failed"
+    else:
+        values["status"] = "queued"
+        values["available_at"] = now + timedelta(seconds=delay)
+    return values["status"] if _finish(session, job, worker_id, values) else None
+
+
+class JobWorker:
+    """Claim jobs from the queue and run each through the full pipeline.
+
+    At most ``concurrency`` jobs run at once, each on its own thread. Leases
+    are renewed every third of ``lease_seconds`` while jobs run; ``stop()``
+    stops claiming and returns once the jobs in flight have finished. With a
+    ``writer``, jobs finishing together share a bulk insert of their videos.
+
+    The Synthesia submission is the one step that must not repeat: it only
+    runs while the lease is held, and the video ID is written to the job
+    before the metadata, so an attempt that follows a failed metadata write
+    (or a lost lease) stores the existing video instead of rendering again.
+    """
+
+    def __init__(
+        self,
+        orchestrator,
+        session_factory: Callable[[], Session],
+        worker_id: str | None = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        retry_base: float = 30.0,
+        retry_cap: float = 3600.0,
+        writer: BufferedVideoWriter | None = None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.orchestrator = orchestrator
+        self.session_factory = session_factory
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        )
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.writer = writer
+        self.stats = BatchStats()
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _with_session(self, fn, *args, **kwargs):
+        session = self.session_factory()
+        try:
+            return fn(session, *args, **kwargs)
+        finally:
+            session.close()
+
+    def _run_job(self, job: ClaimedJob) -> dict:
+        logger.info(
+            "Job %d attempt %d/%d: %r", job.id, job.attempts, job.max_attempts, job.proverb
+        )
+        start = time.perf_counter()
+        story = self.orchestrator.generate_story(proverb=job.proverb, run_id=job.run_id)
+        self.stats.record_stage("story", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        screenplay = self.orchestrator.generate_screenplay(
+            story=story["story"], proverb=job.proverb, run_id=job.run_id
+        )
+        self.stats.record_stage("screenplay", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        video_id = self._with_session(check_lease, job, self.worker_id, self.lease_seconds)
+        if video_id is None:
+            video = self.orchestrator.submit_video_from_template(
+                screenplay=screenplay["screenplay"],
+                title=job.proverb.replace(" ", "_"),
+                description=job.proverb,
+                test=job.test,
+            )
+            self._with_session(record_submission, job, video["id"])
+        else:
+            logger.info("Job %d resumes with already submitted video %s", job.id, video_id)
+            video = {"id": video_id, "status": "in_progress"}
+        record = (job.proverb, story["story"], screenplay["screenplay"], video)
+        if self.writer is not None:
+            self.writer.add(*record).result()
+        else:
+            # An upsert: the row may exist if an earlier attempt stored it.
+            self._with_session(store_videos_bulk, [record])
+        self.stats.record_stage("video", time.perf_counter() - start)
+        self.orchestrator.discard_run(job.run_id)
+        return video
+
+    def _record(self, job: ClaimedJob, future: Future) -> None:
+        try:
+            video = future.result()
+        except LeaseLost as exc:
+            # The worker that took the job over records its outcome.
+            logger.warning("Job %d abandoned before submitting: %s", job.id, exc)
+            return
+        except Exception as exc:  # any failure is retried; the queue must keep moving
+            delay = retry_delay(job.attempts, self.retry_base, self.retry_cap)
+            status = self._with_session(fail_job, job, self.worker_id, str(exc), delay)
+            logger.error("Job %d failed (%s): %s", job.id, status or "lease lost", exc)
+            self.stats.record_result(False)
+            return
+        video_id = video.get("id") if isinstance(video, dict) else None
+        if not self._with_session(complete_job, job, self.worker_id, video_id):
+            logger.warning("Job %d finished after its lease was taken over", job.id)
+        self.stats.record_result(True)
+
+    def run(self, until_idle: bool = False) -> BatchStats:
+        """Process jobs until :meth:`stop` is called.
+
+        With ``until_idle`` the worker also returns once nothing is running
+        and no job is due, which is how tests and one-off drains use it.
+        """
+        in_flight: dict[Future, ClaimedJob] = {}
+        renew_every = self.lease_seconds / 3
+        last_renewal = time.monotonic()
+        logger.info("Worker %s started, concurrency %d", self.worker_id, self.concurrency)
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="job"
+        ) as pool:
+            while True:
+                claimed: list[ClaimedJob] = []
+                free = self.concurrency - len(in_flight)
+                if free and not self._stop.is_set():
+                    claimed = self._with_session(
+                        claim_jobs, self.worker_id, free, self.lease_seconds
+                    )
+                    for job in claimed:
+                        in_flight[pool.submit(self._run_job, job)] = job
+
+                if not in_flight:
+                    if self._stop.is_set() or (until_idle and not claimed):
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                done, _ = wait(
+                    in_flight,
+                    timeout=min(self.poll_interval, renew_every),
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    self._record(in_flight.pop(future), future)
+
+                if in_flight and time.monotonic() - last_renewal >= renew_every:
+                    ids = {job.id for job in in_flight.values()}
+                    held = self._with_session(
+                        renew_leases, self.worker_id, ids, self.lease_seconds
+                    )
+                    for job_id in ids - held:
+                        logger.warning("Lost the lease on job %d", job_id)
+                    last_renewal = time.monotonic()
+
+        self.stats.finish()
+        return self.stats
+
+
+def run_forever() -> None:
+    from agent_orchestrator import AgentOrchestrator
+    from agents.checkpointing import make_checkpointer
+    from db import SessionLocal
+
+    checkpoint_db = os.getenv("CHECKPOINT_DB")
+    orchestrator = AgentOrchestrator(
+        model_name=os.getenv("JOB_MODEL", "gpt-4o"),
+        checkpointer=None if checkpoint_db == "off" else make_checkpointer(checkpoint_db),
+    )
+    concurrency = int(os.getenv("JOB_WORKER_CONCURRENCY", str(DEFAULT_CONCURRENCY)))
+    # At most ``concurrency`` jobs can be waiting on one flush.
+    writer = BufferedVideoWriter(
+        SessionLocal,
+        max_rows=concurrency,
+        max_delay=float(os.getenv("JOB_DB_FLUSH_SECONDS", "0.05")),
+    )
+    worker = JobWorker(
+        orchestrator,
+        SessionLocal,
+        concurrency=concurrency,
+        lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", str(DEFAULT_LEASE_SECONDS))),
+        poll_interval=float(os.getenv("JOB_POLL_INTERVAL", str(DEFAULT_POLL_INTERVAL))),
+        retry_base=float(os.getenv("JOB_RETRY_BASE_SECONDS", "30")),
+        retry_cap=float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600")),
+        writer=writer,
+    )
+
+    def shutdown(signum, frame):
+        logger.info("Signal %d received; finishing jobs in flight", signum)
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    try:
+        stats = worker.run()
+    finally:
+        writer.close()
+    print(stats.format_summary())
+    print(orchestrator.metrics.format_summary())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_forever()
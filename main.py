@@ -1,10 +1,256 @@
+from __future__ import annotations
+
+import time
+
+_PROCESS_START = time.perf_counter()
+
+import argparse
+import uuid
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from agent_orchestrator import AgentOrchestrator
-import argparse
-from db import SessionLocal
+# Heavy modules (langchain, langgraph, SQLAlchemy, the Synthesia client) are
+# imported inside the functions that need them so that --help and argument
+# errors return immediately.
+if TYPE_CHECKING:
+    from agent_orchestrator import AgentOrchestrator
+
+
+class Timings:
+    """Wall-clock durations of startup and pipeline phases, for --timings."""
+
+    def __init__(self):
+        self.entries: list[tuple[str, float]] = [
+            ("startup", time.perf_counter() - _PROCESS_START)
+        ]
+
+    @contextmanager
+    def measure(self, label: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.entries.append((label, time.perf_counter() - start))
+
+    def report(self) -> str:
+        lines = [f"{label:<16}{seconds:>10.3f}s" for label, seconds in self.entries]
+        lines.append(f"{'total':<16}{time.perf_counter() - _PROCESS_START:>10.3f}s")
+        return "\n".join(lines)
+
+
+def parse_stage_workers(value: str) -> dict[str, int]:
+    """Parse ``story=4,video=2`` into ``{"story": 4, "video": 2}``."""
+    workers = {}
+    for part in value.split(","):
+        name, _, count = part.partition("=")
+        if not count.isdigit() or int(count) < 1:
+            raise argparse.ArgumentTypeError(f"invalid stage worker count: {part!r}")
+        workers[name.strip()] = int(count)
+    return workers
+
+
+def parse_routes(value: str) -> dict[str, str]:
+    """``--models`` value as a routes dict (see :mod:`agents.routing`)."""
+    from agents.routing import parse_model_routes
+
+    try:
+        return parse_model_routes(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+
+
+def run_batch_mode(orchestrator: AgentOrchestrator, args: argparse.Namespace) -> None:
+    """Process every quote in ``args.batch`` with a single orchestrator."""
+    from db import BufferedVideoWriter, SessionLocal
+    from jobs.batch_runner import (
+        ProgressJournal,
+        read_quotes,
+        run_batch,
+        run_batch_pipelined,
+    )
+
+    journal = ProgressJournal(args.journal or f"{args.batch}.journal.jsonl")
+    writer = None
+    if args.db_batch_size > 0:
+        # Without --pipeline no more than --concurrency quotes can share a flush.
+        size = args.db_batch_size if args.pipeline else min(args.db_batch_size, args.concurrency)
+        writer = BufferedVideoWriter(SessionLocal, max_rows=size)
+    try:
+        if args.llm_batch != "off":
+            from jobs.llm_batch import LocalBatchBackend, OpenAIBatchBackend, run_llm_batch
+
+            backend = (
+                LocalBatchBackend(models=orchestrator.model)
+                if args.llm_batch == "local"
+                else OpenAIBatchBackend()
+            )
+            stats, _ = run_llm_batch(
+                orchestrator,
+                read_quotes(args.batch),
+                journal,
+                session_factory=SessionLocal,
+                backend=backend,
+                workdir=args.llm_batch_dir or f"{args.batch}.llm_batch",
+                concurrency=args.concurrency,
+                test=args.istest,
+                dedup=args.dedup,
+                writer=writer,
+                poll_interval=args.llm_batch_poll,
+            )
+        elif args.pipeline:
+            stats, stage_summary = run_batch_pipelined(
+                orchestrator,
+                read_quotes(args.batch),
+                journal,
+                session_factory=SessionLocal,
+                workers=args.stage_workers,
+                queue_size=args.queue_size,
+                test=args.istest,
+                dedup=args.dedup,
+                writer=writer,
+            )
+        else:
+            stats = run_batch(
+                orchestrator,
+                read_quotes(args.batch),
+                journal,
+                session_factory=SessionLocal,
+                concurrency=args.concurrency,
+                test=args.istest,
+                dedup=args.dedup,
+                writer=writer,
+            )
+    finally:
+        if writer is not None:
+            writer.close()
+    print(stats.format_summary())
+    if writer is not None:
+        print(f"DB writes: {writer.stats()}")
+    if args.pipeline:
+        print(f"{'stage':<12}{'workers':>8}{'util':>8}{'max q':>8}{'avg q':>8}")
+        for name, row in stage_summary.items():
+            print(
+                f"{name:<12}{row['workers']:>8}{row['utilisation']:>8.0%}"
+                f"{row['max_queue_depth']:>8}{row['avg_queue_depth']:>8.1f}"
+            )
+
+
+def enqueue_mode(args: argparse.Namespace) -> None:
+    """Queue ``args.moral`` or every quote in ``args.batch`` for the workers."""
+    from db import SessionLocal
+    from jobs.batch_runner import read_quotes
+    from jobs.worker import enqueue_jobs
+
+    proverbs = read_quotes(args.batch) if args.batch else [args.moral]
+    session = SessionLocal()
+    try:
+        ids = enqueue_jobs(session, proverbs, test=args.istest, max_attempts=args.max_attempts)
+    finally:
+        session.close()
+    print(f"Queued {len(ids)} jobs ({len(proverbs) - len(ids)} already queued or repeated)")
+
+
+def consume_stream(events) -> dict:
+    """Echo streamed tokens to stdout as they arrive and return the output.
+
+    Tokens of concurrent speculative drafts (``--drafts``) would interleave,
+    so they are not echoed; the chosen draft is printed once its node ends.
+    """
+    streamed_node = None
+    printed_tokens = False
+    output: dict = {}
+    for event in events:
+        if event["type"] == "token":
+            if "draft" in event:
+                continue
+            if event["node"] != streamed_node:
+                streamed_node = event["node"]
+                print(f"\n--- {streamed_node} ---", flush=True)
+            print(event["content"], end="", flush=True)
+            printed_tokens = True
+        elif event["type"] == "node_end":
+            if not printed_tokens:
+                # Nothing streamed (e.g. an LLM cache hit): show the result.
+                print(f"\n--- {event['node']} ---\n{event['update']}", flush=True)
+            printed_tokens = False
+            streamed_node = None
+        elif event["type"] == "done":
+            output = event["output"]
+    print()
+    return output
+
+
+def run_single(
+    orchestrator: AgentOrchestrator, args: argparse.Namespace, timings: Timings
+) -> None:
+    """Generate the story, screenplay and video for ``args.moral``.
+
+    With checkpointing on, the run ID is printed first; if the run fails,
+    ``--resume <run_id>`` finishes it without repeating completed LLM steps.
+    A run that succeeds deletes its checkpoints.
+    """
+    from db import SessionLocal
+
+    if args.dedup != "off" and not args.resume:
+        session = SessionLocal()
+        try:
+            existing = orchestrator.existing_videos(session, [args.moral]).get(args.moral)
+        finally:
+            session.close()
+        if existing is not None:
+            print(f"A video for this proverb already exists: {existing.id} ({existing.status})")
+            return
+
+    run_id = args.resume or uuid.uuid4().hex[:12]
+    if orchestrator.checkpointer is not None:
+        print(f"Run ID: {run_id}")
+
+    with timings.measure("story"):
+        if args.stream:
+            story = consume_stream(orchestrator.stream_story(proverb=args.moral, run_id=run_id))
+        else:
+            story = orchestrator.generate_story(proverb=args.moral, run_id=run_id)
+    print(story)
+
+    with timings.measure("screenplay"):
+        if args.stream:
+            screenplay = consume_stream(
+                orchestrator.stream_screenplay(
+                    story=story["story"], proverb=args.moral, run_id=run_id
+                )
+            )
+        else:
+            screenplay = orchestrator.generate_screenplay(
+                story=story["story"],
+                proverb=args.moral,
+                run_id=run_id,
+            )
+    print(screenplay)
+
+    session = SessionLocal()
+    try:
+        with timings.measure("video"):
+            video_request = orchestrator.generate_video_from_template(
+                screenplay=screenplay["screenplay"],
+                title=args.moral.replace(" ", "_"),
+                description=args.moral,
+                proverb=args.moral,
+                story=story["story"],
+                session=session,
+                test=args.istest,
+            )
+    finally:
+        session.close()
+    # Stored: nothing left to resume.
+    orchestrator.discard_run(run_id)
+
+    print(video_request)
+    if args.stream:
+        print(f"Streaming metrics: {orchestrator.stream_metrics()}")
 
 
 def main():
@@ -12,7 +258,10 @@ def main():
         description="Generate a short AI-driven story based on a moral or proverb."
     )
     parser.add_argument(
-        "moral", type=str, help="The moral or proverb to illustrate in the story."
+        "moral",
+        type=str,
+        nargs="?",
+        help="The moral or proverb to illustrate in the story.",
     )
     parser.add_argument(
         "--model",
@@ -20,11 +269,29 @@ def main():
         default="gpt-4o",
         help="OpenAI model to use (default: gpt-4o).",
     )
+    parser.add_argument(
+        "--models",
+        type=parse_routes,
+        default=None,
+        help=(
+            "Model per agent node role, overriding --model, e.g. "
+            "critique=gpt-4o-mini,story.edit=gpt-4o (roles: generation, critique, edit)."
+        ),
+    )
+    parser.add_argument(
+        "--models-file",
+        type=str,
+        default=None,
+        help="JSON object of model routes with the same keys as --models; --models wins.",
+    )
     parser.add_argument(
         "--temperature",
         type=float,
-        default=0.1,
-        help="Sampling temperature for the LLM (default: 0.0).",
+        default=0.0,
+        help=(
+            "Sampling temperature for the LLM (default: 0.0). Non-zero temperatures "
+            "bypass --llm-cache auto."
+        ),
     )
     parser.add_argument(
         "--prompts-dir",
@@ -39,42 +306,276 @@ def main():
         default=False,
         help="Run the video generation in test mode with watermark"
     )
+    parser.add_argument(
+        "--batch",
+        type=str,
+        default=None,
+        help="File with one moral per line; process them all in this process.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of quotes processed at once in batch mode (default: 4).",
+    )
+    parser.add_argument(
+        "--journal",
+        type=str,
+        default=None,
+        help="Progress journal for batch mode (default: <batch file>.journal.jsonl).",
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=["off", "skip", "reuse"],
+        default="skip",
+        help=(
+            "Proverbs that already have a video: 'skip' leaves them out, 'reuse' "
+            "records the existing video as the result, 'off' produces them again "
+            "(default: skip)."
+        ),
+    )
+    parser.add_argument(
+        "--db-batch-size",
+        type=int,
+        default=50,
+        help=(
+            "In batch mode, store up to this many videos per bulk insert; 0 commits "
+            "each video on its own (default: 50)."
+        ),
+    )
+    parser.add_argument(
+        "--enqueue",
+        action="store_true",
+        default=False,
+        help="Add the moral (or --batch quotes) to the job queue for jobs.worker instead.",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=5,
+        help="With --enqueue, attempts per job before it is marked failed (default: 5).",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        default=False,
+        help="In batch mode, overlap stages across quotes with per-stage workers.",
+    )
+    parser.add_argument(
+        "--stage-workers",
+        type=parse_stage_workers,
+        default=None,
+        help="Per-stage worker counts for --pipeline, e.g. story=4,screenplay=4,video=2,db=1.",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="Maximum items waiting in front of each pipeline stage (default: 8).",
+    )
+    parser.add_argument(
+        "--llm-batch",
+        choices=["off", "openai", "local"],
+        default="off",
+        help=(
+            "In batch mode, send the story and screenplay LLM calls through the "
+            "OpenAI Batch API, phase by phase, at half price but hours of latency; "
+            "'local' runs the same batch files in-process (default: off)."
+        ),
+    )
+    parser.add_argument(
+        "--llm-batch-dir",
+        type=str,
+        default=None,
+        help=(
+            "Work directory for --llm-batch request and result files "
+            "(default: <batch file>.llm_batch)."
+        ),
+    )
+    parser.add_argument(
+        "--llm-batch-poll",
+        type=float,
+        default=60.0,
+        help="Seconds between status checks of submitted batches (default: 60).",
+    )
+    parser.add_argument(
+        "--drafts",
+        type=int,
+        default=1,
+        help=(
+            "Write this many story and screenplay drafts at once and keep the first "
+            "one the critique accepts; more tokens, shorter tail latency (default: 1)."
+        ),
+    )
+    parser.add_argument(
+        "--pre-critic",
+        choices=["off", "reject", "full"],
+        default="off",
+        help=(
+            "Local checks before the LLM critique: 'reject' sends obviously broken "
+            "drafts straight to editing, 'full' also accepts drafts that pass "
+            "every check (default: off)."
+        ),
+    )
+    parser.add_argument(
+        "--llm-cache",
+        choices=["auto", "on", "off"],
+        default="auto",
+        help=(
+            "Cache LLM responses on disk: 'auto' caches only temperature-0 calls, "
+            "'on' caches every call, 'off' disables the cache (default: auto)."
+        ),
+    )
+    parser.add_argument(
+        "--llm-cache-dir",
+        type=str,
+        default=".llm_cache",
+        help="Directory for the LLM response cache (default: .llm_cache).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=False,
+        help="Print story and screenplay tokens as they are generated.",
+    )
+    parser.add_argument(
+        "--checkpoint-db",
+        type=str,
+        default=None,
+        help=(
+            "Where LangGraph checkpoints are kept: a SQLite path or a postgresql:// "
+            "URL, or 'off' (default: $CHECKPOINT_DB or .checkpoints.sqlite)."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        default=None,
+        metavar="RUN_ID",
+        help="Finish an earlier single run, reusing its checkpointed LLM steps.",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        type=str,
+        default=None,
+        help="Write call metrics here when done: Prometheus text for *.prom, else JSON.",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus metrics on this port (/metrics, /metrics.json) while running.",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        default=False,
+        help="Report import, construction and per-stage wall-clock times.",
+    )
 
     args = parser.parse_args()
+    timings = Timings()
+
+    if not args.moral and not args.batch and not args.resume:
+        parser.error("either a moral, --batch or --resume is required")
+    if args.resume and args.checkpoint_db == "off":
+        parser.error("--resume needs checkpointing")
+
+    if args.drafts < 1:
+        parser.error("--drafts must be at least 1")
+    if args.enqueue and args.resume:
+        parser.error("--enqueue cannot be combined with --resume")
+    if args.llm_batch != "off" and (not args.batch or args.pipeline or args.enqueue):
+        parser.error(
+            "--llm-batch needs --batch and cannot be combined with --pipeline or --enqueue"
+        )
 
     if args.istest:
         print("#### Running in test mode ####")
 
-    orchestrator = AgentOrchestrator(
-        model_name=args.model,
-        temperature=args.temperature,
-        prompts_dir=args.prompts_dir,
-    )
+    if args.enqueue:
+        enqueue_mode(args)
+        return
 
-    story = orchestrator.generate_story(proverb=args.moral)
-    print(story)
+    with timings.measure("import"):
+        from agent_orchestrator import AgentOrchestrator
+        from agents.checkpointing import make_checkpointer
+        from agents.pre_critic import screenplay_pre_critic, story_pre_critic
+        from utils import LLMCache, serve_metrics
 
-    screenplay = orchestrator.generate_screenplay(
-        story=story["story"],
-        proverb=args.moral,
-    )
-    print(screenplay)
+    model_routes = {}
+    if args.models_file:
+        from agents.routing import load_model_routes
 
-    session = SessionLocal()
-    try:        
-        video_request = orchestrator.generate_video_from_template(
-            screenplay=screenplay["screenplay"],
-            title=args.moral.replace(" ", "_"),
-            description=args.moral,
-            proverb=args.moral,
-            story=story["story"],
-            session=session,
-            test=args.istest,
+        try:
+            model_routes = load_model_routes(args.models_file)
+        except (OSError, ValueError) as exc:
+            parser.error(f"--models-file: {exc}")
+    model_routes.update(args.models or {})
+
+    llm_cache = None if args.llm_cache == "off" else LLMCache(args.llm_cache_dir)
+    if args.llm_cache == "auto" and args.temperature != 0:
+        print(
+            f"LLM cache: inactive at --temperature {args.temperature}; "
+            "use --llm-cache on to cache sampled calls."
         )
-    finally:
-        session.close()
+    pre_critics = {}
+    if args.pre_critic != "off":
+        accept = args.pre_critic == "full"
+        pre_critics = {
+            "story_pre_critic": story_pre_critic(accept_when_clean=accept),
+            "screenplay_pre_critic": screenplay_pre_critic(accept_when_clean=accept),
+        }
 
-    print(video_request)
+    with timings.measure("construct"):
+        checkpointer = (
+            None if args.checkpoint_db == "off" else make_checkpointer(args.checkpoint_db)
+        )
+        orchestrator = AgentOrchestrator(
+            model_name=args.model,
+            model_routes=model_routes,
+            drafts=args.drafts,
+            temperature=args.temperature,
+            prompts_dir=args.prompts_dir,
+            llm_cache=llm_cache,
+            cache_sampled=args.llm_cache == "on",
+            checkpointer=checkpointer,
+            **pre_critics,
+        )
+
+    if args.resume:
+        args.moral = orchestrator.checkpointed_proverb(args.resume)
+        if args.moral is None:
+            parser.error(f"no checkpointed run {args.resume!r}")
+
+    if args.metrics_port is not None:
+        serve_metrics(orchestrator.metrics, port=args.metrics_port)
+
+    if args.batch:
+        with timings.measure("batch"):
+            run_batch_mode(orchestrator, args)
+        print(orchestrator.metrics.format_summary())
+    else:
+        run_single(orchestrator, args, timings)
+        if model_routes:
+            # Latency and critique accept rate per model.
+            print(orchestrator.metrics.format_summary())
+
+    if llm_cache is not None:
+        print(f"LLM cache: {llm_cache.stats()}")
+    if pre_critics:
+        print(f"Pre-critic: {orchestrator.pre_critic_stats()}")
+    if args.drafts > 1:
+        print(f"Speculative drafts: {orchestrator.speculation_stats()}")
+    print(orchestrator.format_usage_report())
+    if args.metrics_out:
+        with open(args.metrics_out, "w", encoding="utf-8") as fh:
+            if args.metrics_out.endswith(".prom"):
+                fh.write(orchestrator.metrics.to_prometheus())
+            else:
+                fh.write(orchestrator.metrics.to_json())
+    if args.timings:
+        print(timings.report())
 
 
 if __name__ == "__main__":
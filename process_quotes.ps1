@@ -1,23 +1,15 @@
 # Path to the file containing quotes (one per line)
 $quoteFile = "quotes.txt"
 
+# Number of quotes processed at once
+$concurrency = 4
+
 # Ensure the file exists
 if (-Not (Test-Path $quoteFile)) {
     Write-Error "Quote file not found: $quoteFile"
     exit 1
 }
 
-# Read all quotes
-$quotes = Get-Content $quoteFile
-
-# Loop through each quote
-foreach ($quote in $quotes) {
-    try {
-        Write-Output "Processing: $quote"
-        & python main.py "`"$quote`""
-    }
-    catch {
-        Write-Warning "Failed to process quote: $quote"
-        Write-Warning $_.Exception.Message
-    }
-}
\ No newline at end of file
+# Process every quote in a single run; progress is journaled next to the
+# quote file so an interrupted run picks up where it stopped.
+& python main.py --batch $quoteFile --concurrency $concurrency
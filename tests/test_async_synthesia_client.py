@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from utils import (
+    AsyncSynthesiaClient,
+    CreateVideoFromTemplateRequest,
+    TemplateData,
+)
+
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.posted = []
+
+
+@pytest.fixture
+def synthesia_stub():
+    """A local HTTP server imitating the Synthesia video endpoints."""
+    state = StubState()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _track(self, handler):
+            with state.lock:
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                time.sleep(0.02)
+                handler()
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+        def do_POST(self):
+            def handle():
+                length = int(self.headers["Content-Length"])
+                payload = json.loads(self.rfile.read(length))
+                state.posted.append(payload["title"])
+                if payload["title"] == "bad":
+                    self._reply(400, {"error": "bad title"})
+                else:
+                    self._reply(201, {"id": f"vid-{payload['title']}", "status": "in_progress"})
+
+            self._track(handle)
+
+        def do_GET(self):
+            def handle():
+                video_id = self.path.rsplit("/", 1)[-1]
+                if video_id == "missing":
+                    self._reply(404, {"error": "not found"})
+                else:
+                    self._reply(200, {"id": video_id, "status": "complete"})
+
+            self._track(handle)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", state
+    server.shutdown()
+    server.server_close()
+
+
+def template_request(title):
+    return CreateVideoFromTemplateRequest(
+        test=True,
+        templateData=TemplateData(screenplay="Hi"),
+        visibility="private",
+        templateId="templ",
+        title=title,
+        description="D",
+    )
+
+
+def test_submit_many_preserves_order_and_isolates_errors(synthesia_stub):
+    base_url, state = synthesia_stub
+    titles = ["a", "b", "bad", "c", "d", "e"]
+
+    async def run():
+        async with AsyncSynthesiaClient(api_key="fake", base_url=base_url, concurrency=2) as client:
+            return await client.submit_many([template_request(t) for t in titles])
+
+    results = asyncio.run(run())
+
+    assert [r.ok for r in results] == [True, True, False, True, True, True]
+    assert results[0].result["id"] == "vid-a"
+    assert results[5].result["id"] == "vid-e"
+    assert isinstance(results[2].error, httpx.HTTPStatusError)
+    assert sorted(state.posted) == sorted(titles)
+    assert state.max_in_flight <= 2
+
+
+def test_get_status_many_returns_statuses_in_input_order(synthesia_stub):
+    base_url, state = synthesia_stub
+    ids = [f"v{i}" for i in range(8)] + ["missing"]
+
+    async def run():
+        async with AsyncSynthesiaClient(api_key="fake", base_url=base_url) as client:
+            return await client.get_status_many(ids, concurrency=4)
+
+    results = asyncio.run(run())
+
+    assert [r.result.id for r in results[:-1]] == ids[:-1]
+    assert all(r.result.status == "complete" for r in results[:-1])
+    assert not results[-1].ok
+    assert 1 < state.max_in_flight <= 4
+
+
+def test_async_client_retries_rate_limited_requests():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"id": "v1", "status": "complete"})
+
+    async def run():
+        async with AsyncSynthesiaClient(
+            api_key="fake", transport=httpx.MockTransport(handler)
+        ) as client:
+            status = await client.get_video_status("v1")
+            return status, client.stats()
+
+    status, stats = asyncio.run(run())
+    assert status.status == "complete"
+    assert stats == {"requests": 2, "retries": 1}
@@ -0,0 +1,247 @@
+import json
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from agent_orchestrator import AgentOrchestrator
+from benchmarks.fakes import FakeChatModel
+from db import Base, models
+from db.utils import store_video_metadata
+from jobs.batch_runner import ProgressJournal, run_batch, run_batch_pipelined
+from utils import SynthesiaClient, SynthesiaSimulator
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """A sessionmaker over a file-backed SQLite database shared by worker threads."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'videos.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class DummySession:
+    def close(self):
+        pass
+
+
+class DummyOrchestrator:
+    """Stub orchestrator that records calls and tracks concurrency."""
+
+    def __init__(self, fail_on=None, delay=0.0, fail_store=None):
+        self.fail_on = fail_on or set()
+        self.fail_store = fail_store or set()
+        self.submitted = []
+        self.stored = []
+        self.delay = delay
+        self.stories = []
+        self.discarded = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_story(self, proverb, run_id=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        self.stories.append(proverb)
+        return {"story": f"story for {proverb}"}
+
+    def generate_screenplay(self, story, proverb, run_id=None):
+        if proverb in self.fail_on:
+            with self._lock:
+                self.in_flight -= 1
+            raise RuntimeError("boom")
+        return {"screenplay": f"screenplay for {proverb}"}
+
+    def generate_video_from_template(self, on_submitted=None, **kwargs):
+        with self._lock:
+            self.in_flight -= 1
+        video = {"id": f"vid-{kwargs['proverb']}", "status": "in_progress"}
+        self.submitted.append(kwargs["proverb"])
+        if on_submitted is not None:
+            on_submitted(video)
+        if kwargs["proverb"] in self.fail_store:
+            raise RuntimeError("db down")
+        return video
+
+    def store_video(self, proverb, story, screenplay, video, session=None, writer=None):
+        self.stored.append((proverb, story, screenplay, video["id"]))
+        return video
+
+    def discard_run(self, run_id):
+        self.discarded.append(run_id)
+
+
+def test_run_batch_processes_all_quotes_with_bounded_concurrency(tmp_path):
+    orchestrator = DummyOrchestrator(delay=0.02)
+    journal = ProgressJournal(str(tmp_path / "journal.jsonl"))
+    quotes = [f"q{i}" for i in range(10)]
+
+    stats = run_batch(orchestrator, quotes, journal, DummySession, concurrency=3)
+
+    assert stats.succeeded == 10
+    assert stats.failed == 0
+    assert sorted(orchestrator.stories) == sorted(quotes)
+    assert 1 < orchestrator.max_in_flight <= 3
+    summary = stats.summary()
+    assert summary["stages"]["story"]["count"] == 10
+    assert summary["quotes_per_minute"] > 0
+
+
+def test_run_batch_resumes_from_journal_and_retries_failures(tmp_path):
+    journal = ProgressJournal(str(tmp_path / "journal.jsonl"))
+    quotes = ["a", "b", "c"]
+
+    first = DummyOrchestrator(fail_on={"b"})
+    stats = run_batch(first, quotes, journal, DummySession, concurrency=2)
+    assert stats.succeeded == 2
+    assert stats.failed == 1
+    assert journal.completed() == {"a", "c"}
+    # Only finished quotes drop their checkpoints; "b" keeps its for the retry.
+    assert sorted(first.discarded) == sorted(journal.run_id(q) for q in ("a", "c"))
+
+    second = DummyOrchestrator()
+    stats = run_batch(second, quotes, journal, DummySession, concurrency=2)
+    assert second.stories == ["b"]
+    assert stats.skipped == 2
+    assert journal.completed() == {"a", "b", "c"}
+
+
+def test_run_batch_retry_stores_the_accepted_video_instead_of_resubmitting(tmp_path):
+    journal = ProgressJournal(str(tmp_path / "journal.jsonl"))
+
+    first = DummyOrchestrator(fail_store={"b"})
+    stats = run_batch(first, ["a", "b"], journal, DummySession, concurrency=1)
+    assert stats.failed == 1
+    assert set(journal.submitted()) == {"b"}
+
+    second = DummyOrchestrator()
+    stats = run_batch(second, ["a", "b"], journal, DummySession, concurrency=1)
+
+    assert stats.succeeded == 1
+    assert second.stories == [] and second.submitted == []
+    assert second.stored == [("b", "story for b", "screenplay for b", "vid-b")]
+    assert second.discarded == [journal.run_id("b")]
+    assert journal.completed() == {"a", "b"}
+    assert journal.submitted() == {}
+
+
+def test_progress_journal_ignores_torn_lines(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"quote": "a", "status": "done"}\n{"quote": "b", "sta', encoding="utf-8")
+    assert ProgressJournal(str(path)).completed() == {"a"}
+
+
+class PipelineOrchestrator(DummyOrchestrator):
+    build_pipeline = AgentOrchestrator.build_pipeline
+
+    def submit_video_from_template(self, screenplay, title, description, test=True):
+        self.submitted.append(description)
+        return {"id": f"vid-{description}", "status": "in_progress"}
+
+    def store_video(self, proverb, *args, **kwargs):
+        if proverb in self.fail_store:
+            raise RuntimeError("db down")
+        return AgentOrchestrator.store_video(self, proverb, *args, **kwargs)
+
+
+def test_run_batch_pipelined_stores_every_quote(tmp_path, session_factory):
+    orchestrator = PipelineOrchestrator(fail_on={"q3"})
+    journal = ProgressJournal(str(tmp_path / "journal.jsonl"))
+    quotes = [f"q{i}" for i in range(8)]
+
+    stats, stages = run_batch_pipelined(
+        orchestrator, quotes, journal, session_factory, workers={"story": 2}, queue_size=2
+    )
+
+    assert stats.succeeded == 7
+    assert stats.failed == 1
+    assert journal.completed() == set(quotes) - {"q3"}
+    assert stages["story"]["workers"] == 2
+    assert stages["db"]["processed"] == 7
+    session = session_factory()
+    assert session.query(models.Video).count() == 7
+
+
+def test_run_batch_dedups_against_existing_videos(tmp_path, session_factory):
+    session = session_factory()
+    store_video_metadata(
+        session, "Haste makes waste.", "s", "sp", {"id": "v-old", "status": "complete"}
+    )
+    session.close()
+
+    class DedupOrchestrator(DummyOrchestrator):
+        existing_videos = AgentOrchestrator.existing_videos
+
+    for policy, expected_status in (("skip", "duplicate"), ("reuse", "done")):
+        orchestrator = DedupOrchestrator()
+        journal = ProgressJournal(str(tmp_path / f"{policy}.jsonl"))
+
+        stats = run_batch(
+            orchestrator,
+            ["haste makes  WASTE", "fresh"],
+            journal,
+            session_factory,
+            concurrency=1,
+            dedup=policy,
+        )
+
+        assert orchestrator.stories == ["fresh"]
+        assert stats.deduplicated == 1
+        entries = [json.loads(line) for line in open(journal.path, encoding="utf-8")]
+        duplicate = next(e for e in entries if e["quote"] == "haste makes  WASTE")
+        assert (duplicate["status"], duplicate["video_id"]) == (expected_status, "v-old")
+
+
+def test_run_batch_drops_normalised_repeats_within_batch(tmp_path):
+    orchestrator = DummyOrchestrator()
+    journal = ProgressJournal(str(tmp_path / "journal.jsonl"))
+
+    quotes = ["Look before you leap", "look before you leap!"]
+
+    stats = run_batch(orchestrator, quotes, journal, DummySession)
+
+    assert orchestrator.stories == ["Look before you leap"]
+    assert stats.skipped == 1
+
+
+def test_run_batch_end_to_end_with_offline_fakes(tmp_path, session_factory):
+    journal = ProgressJournal(str(tmp_path / "journal.jsonl"))
+
+    with SynthesiaSimulator() as simulator:
+        orchestrator = AgentOrchestrator(
+            llm=FakeChatModel(latency=0, output_tokens=50, revise_rate=0.5),
+            synthesia_client=SynthesiaClient(api_key="key", base_url=simulator.base_url),
+        )
+        stats = run_batch(orchestrator, ["q1", "q2", "q3"], journal, session_factory, concurrency=2)
+        created = simulator.stats()["created"]
+
+    assert stats.succeeded == 3
+    assert created == 3
+    assert session_factory().query(models.Video).count() == 3
+    nodes = {(row["agent"], row["node"]) for row in orchestrator.metrics.snapshot()["llm"]}
+    assert {("story", "story_node"), ("screenplay", "critique_node")} <= nodes
+
+
+def test_run_batch_pipelined_retry_only_redoes_the_db_write(tmp_path, session_factory):
+    journal = ProgressJournal(str(tmp_path / "journal.jsonl"))
+    quotes = ["q0", "q1"]
+
+    first = PipelineOrchestrator(fail_store={"q1"})
+    stats, _ = run_batch_pipelined(first, quotes, journal, session_factory)
+    assert stats.failed == 1
+    assert journal.submitted()["q1"]["video_id"] == "vid-q1"
+
+    second = PipelineOrchestrator()
+    stats, _ = run_batch_pipelined(second, quotes, journal, session_factory)
+
+    assert stats.succeeded == 1
+    assert second.stories == [] and second.submitted == []
+    assert second.discarded == [journal.run_id("q1")]
+    video = session_factory().get(models.Video, "vid-q1")
+    assert video.screenplay == "screenplay for q1"
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import pytest
+
+from agents.checkpointing import delete_run, make_checkpointer
+from agents.story_agent import StoryAgent
+
+
+class FlakyLLM:
+    """Returns scripted responses; raises when a response is an exception."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def invoke(self, messages):
+        self.calls.append(messages)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return SimpleNamespace(content=response)
+
+
+@pytest.fixture
+def prompt_files(tmp_path):
+    story_template = tmp_path / "story_template.txt"
+    story_template.write_text("Write a story.\nProverb: {proverb}", encoding="utf-8")
+    critique_template = tmp_path / "story_critique.txt"
+    critique_template.write_text("Critique:\n{story}", encoding="utf-8")
+    return str(story_template), str(critique_template)
+
+
+def make_agent(llm, prompt_files, checkpointer):
+    prompt_file, critique_file = prompt_files
+    return StoryAgent(
+        llm=llm,
+        prompt_file=prompt_file,
+        critique_prompt_file=critique_file,
+        checkpointer=checkpointer,
+    )
+
+
+def test_failed_run_resumes_at_failed_node(prompt_files, tmp_path):
+    db = str(tmp_path / "checkpoints.sqlite")
+    llm = FlakyLLM(["draft", RuntimeError("critique service down")])
+    with pytest.raises(RuntimeError):
+        make_agent(llm, prompt_files, make_checkpointer(db)).run("moral", run_id="r1")
+
+    # A fresh process: new agent, new checkpointer on the same database.
+    llm = FlakyLLM(["accept"])
+    output = make_agent(llm, prompt_files, make_checkpointer(db)).run("moral", run_id="r1")
+
+    assert output == {"story": "draft"}
+    assert len(llm.calls) == 1
+    assert llm.calls[0][-1].content == "draft"
+
+
+def test_finished_run_is_returned_without_llm_calls(prompt_files, tmp_path):
+    checkpointer = make_checkpointer(str(tmp_path / "checkpoints.sqlite"))
+    llm = FlakyLLM(["draft", "accept"])
+    agent = make_agent(llm, prompt_files, checkpointer)
+    agent.run("moral", run_id="r2")
+
+    events = list(agent.run_stream("moral", run_id="r2"))
+
+    assert events == [{"type": "done", "output": {"story": "draft"}}]
+    assert len(llm.calls) == 2
+
+
+def test_runs_without_run_id_are_not_checkpointed(prompt_files, tmp_path):
+    llm = FlakyLLM(["one", "accept", "two", "accept"])
+    agent = make_agent(llm, prompt_files, make_checkpointer(str(tmp_path / "c.sqlite")))
+
+    assert agent.run("moral") == {"story": "one"}
+    assert agent.run("moral") == {"story": "two"}
+
+
+def test_deleted_run_leaves_no_checkpoints(prompt_files, tmp_path):
+    checkpointer = make_checkpointer(str(tmp_path / "checkpoints.sqlite"))
+    llm = FlakyLLM(["draft", "accept", "again", "accept"])
+    agent = make_agent(llm, prompt_files, checkpointer)
+    agent.run("moral", run_id="r3")
+
+    delete_run(checkpointer, "r3")
+
+    assert list(checkpointer.list(None)) == []
+    assert agent.run("moral", run_id="r3") == {"story": "again"}
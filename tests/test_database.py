@@ -0,0 +1,46 @@
+from sqlalchemy import text
+
+from db import database
+
+
+def test_async_url_follows_database_url(monkeypatch):
+    monkeypatch.delenv("ASYNC_DATABASE_URL", raising=False)
+    monkeypatch.setenv("DATABASE_URL", "postgresql://ai:secret@db:5432/aiinfluencer")
+    assert database.async_database_url() == "postgresql+asyncpg://ai:secret@db:5432/aiinfluencer"
+
+    monkeypatch.setenv("DATABASE_URL", "postgresql+psycopg2://ai@db/aiinfluencer")
+    assert database.async_database_url() == "postgresql+asyncpg://ai@db/aiinfluencer"
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///./app.db")
+    assert database.async_database_url() == "sqlite+aiosqlite:///./app.db"
+
+    monkeypatch.setenv("ASYNC_DATABASE_URL", "sqlite+aiosqlite:///other.db")
+    assert database.async_database_url() == "sqlite+aiosqlite:///other.db"
+
+
+def test_engine_options_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "0")
+    monkeypatch.setenv("DB_POOL_RECYCLE", "1800")
+
+    assert database.engine_options("postgresql://db/x") == {
+        "pool_pre_ping": False,
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_recycle": 1800,
+    }
+    # SQLite has no server-side pool to size.
+    assert database.engine_options("sqlite:///x.db") == {"pool_pre_ping": False}
+
+
+def test_sqlite_wal_mode_is_opt_in(monkeypatch, tmp_path):
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'wal.db'}")
+    monkeypatch.setenv("SQLITE_WAL", "1")
+
+    engine = database.get_engine()
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    finally:
+        engine.dispose()
@@ -0,0 +1,40 @@
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def run_python(code):
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_main_help_does_not_import_llm_or_db_stack():
+    result = run_python(
+        "import sys\n"
+        "sys.argv = ['main.py', '--help']\n"
+        "import main\n"
+        "try:\n"
+        "    main.main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "heavy = [m for m in ('langchain_openai', 'langgraph', 'sqlalchemy', 'requests') if m in sys.modules]\n"
+        "print(heavy)\n"
+    )
+    assert result.stdout.strip().endswith("[]")
+
+
+def test_importing_db_does_not_create_engine():
+    result = run_python(
+        "import db, db.database\n"
+        "print(db.database._engine is None)\n"
+        "db.engine\n"
+        "print(db.database._engine is not None)\n"
+    )
+    assert result.stdout.split() == ["True", "True"]
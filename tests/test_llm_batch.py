@@ -0,0 +1,247 @@
+import json
+
+from langchain_core.messages import AIMessage
+
+from agent_orchestrator import AgentOrchestrator
+from jobs.batch_runner import ProgressJournal
+from jobs.llm_batch import LLMBatchRunner, LocalBatchBackend, quote_key, run_llm_batch
+
+TEMPLATES = {
+    "story_generation.txt": "Write a story.\n{proverb}",
+    "story_critique.txt": "Critique this story.\n{story}",
+    "screenplay_generation.txt": "Write a screenplay.\n{story}\n{proverb}",
+    "screenplay_critique.txt": "Critique this screenplay.\n{screenplay}",
+}
+
+
+class ScriptedLLM:
+    """Answers each kind of prompt from its content; raises on ``boom``."""
+
+    temperature = 0.0
+
+    def __init__(self, broken=("boom",), model_name="gpt-4o-mini"):
+        self.broken = broken
+        self.model_name = model_name
+        self.calls = []
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append(kwargs)
+        instructions, draft = messages[0].content, messages[1].content
+        if any(word in draft for word in self.broken):
+            raise RuntimeError("model error")
+        if len(messages) > 2:
+            content = f"revised {messages[2].content}"
+        elif instructions.startswith("Critique"):
+            content = "revise: needs work" if "bad" in draft else "accept"
+        elif instructions.startswith("Write a story"):
+            content = f"story: {draft}"
+        else:
+            content = f"screenplay: {draft.splitlines()[0]}"
+        return AIMessage(
+            content=content,
+            usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+        )
+
+
+def make_orchestrator(tmp_path, **kwargs):
+    prompts = tmp_path / "prompts"
+    prompts.mkdir(exist_ok=True)
+    for name, text in TEMPLATES.items():
+        (prompts / name).write_text(text, encoding="utf-8")
+    return AgentOrchestrator(
+        llm=ScriptedLLM(), prompts_dir=str(prompts), synthesia_client=object(), **kwargs
+    )
+
+
+def submitted_phases(backend):
+    return [path.rsplit("/", 1)[-1].split(".")[0] for path in backend.submitted]
+
+
+def test_runner_batches_each_phase_and_retries_only_failed_requests(tmp_path):
+    orchestrator = make_orchestrator(tmp_path)
+    workdir = tmp_path / "work"
+    backend = LocalBatchBackend(ScriptedLLM())
+
+    outputs, errors = LLMBatchRunner(orchestrator, backend, str(workdir)).run(
+        ["good one", "bad one", "boom"]
+    )
+
+    assert outputs == {
+        "good one": {"story": "story: good one", "screenplay": "screenplay: story: good one"},
+        "bad one": {
+            "story": "revised story: bad one",
+            "screenplay": "revised screenplay: revised story: bad one",
+        },
+    }
+    assert errors == {"boom": "model error"}
+    assert submitted_phases(backend) == [
+        "story",
+        "story_critique",
+        "story_edit",
+        "screenplay",
+        "screenplay_critique",
+        "screenplay_edit",
+    ]
+    request = json.loads((workdir / "story_edit.000.requests.jsonl").read_text())
+    assert request["custom_id"] == quote_key("bad one")
+    assert request["url"] == "/v1/chat/completions"
+    assert request["body"]["model"] == "gpt-4o-mini"
+    assert [m["role"] for m in request["body"]["messages"]] == [
+        "system",
+        "user",
+        "assistant",
+        "user",
+    ]
+    usage = orchestrator.usage_report()
+    assert usage["story"]["story_node"]["calls"] == 2
+    assert usage["story"]["edit_node"]["calls"] == 1
+
+    # A second run only sends the request that failed, then what follows it.
+    retry = LocalBatchBackend(ScriptedLLM(broken=()))
+    outputs, errors = LLMBatchRunner(orchestrator, retry, str(workdir)).run(
+        ["good one", "bad one", "boom"]
+    )
+    assert errors == {}
+    assert outputs["boom"]["story"] == "story: boom"
+    assert [path.rsplit("/", 1)[-1] for path in retry.submitted] == [
+        "story.001.requests.jsonl",
+        "story_critique.001.requests.jsonl",
+        "screenplay.001.requests.jsonl",
+        "screenplay_critique.001.requests.jsonl",
+    ]
+
+
+class SlowBackend(LocalBatchBackend):
+    """Reports each batch in progress for a few polls; can drop one request."""
+
+    def __init__(self, llm, polls=2, drop=None):
+        super().__init__(llm)
+        self.polls = polls
+        self.drop = drop
+        self.status_calls = 0
+
+    def status(self, batch_id):
+        self.status_calls += 1
+        if self.status_calls % (self.polls + 1):
+            return "in_progress"
+        return "expired" if self.drop else super().status(batch_id)
+
+    def download(self, batch_id, results_path):
+        self._results[batch_id] = [
+            line for line in self._results[batch_id] if line["custom_id"] != self.drop
+        ]
+        super().download(batch_id, results_path)
+
+
+def test_runner_polls_pending_batches_and_reports_missing_results(tmp_path):
+    orchestrator = make_orchestrator(tmp_path)
+    backend = SlowBackend(ScriptedLLM(), drop=quote_key("late"))
+    runner = LLMBatchRunner(orchestrator, backend, str(tmp_path / "work"), poll_interval=0)
+
+    outputs, errors = runner.run(["on time", "late"])
+
+    assert list(outputs) == ["on time"]
+    assert errors == {"late": "no result returned by the batch"}
+    assert backend.status_calls == 3 * 4
+    assert set(runner.phase_seconds) == {
+        "story",
+        "story_critique",
+        "screenplay",
+        "screenplay_critique",
+    }
+
+
+class FailingBackend(LocalBatchBackend):
+    """Fails every batch of one phase outright."""
+
+    def __init__(self, llm, phase):
+        super().__init__(llm)
+        self.phase = phase
+        self.failed = set()
+
+    def submit(self, requests_path):
+        batch_id = super().submit(requests_path)
+        if requests_path.rsplit("/", 1)[-1].startswith(f"{self.phase}."):
+            self.failed.add(batch_id)
+        return batch_id
+
+    def status(self, batch_id):
+        return "failed" if batch_id in self.failed else super().status(batch_id)
+
+
+def test_local_backend_runs_each_request_on_its_routed_model(tmp_path):
+    models = {}
+
+    def factory(name):
+        return models.setdefault(name, ScriptedLLM(model_name=name))
+
+    orchestrator = make_orchestrator(
+        tmp_path, model_routes={"critique": "gpt-4.1-mini"}, llm_factory=factory
+    )
+    backend = LocalBatchBackend(models=orchestrator.model)
+
+    LLMBatchRunner(orchestrator, backend, str(tmp_path / "work")).run(["good one"])
+
+    assert models["gpt-4.1-mini"].calls == [{"temperature": 0.0}, {"temperature": 0.0}]
+    verdicts = orchestrator.metrics.snapshot()["critiques"]
+    assert {(row["agent"], row["model"]) for row in verdicts} == {
+        ("story", "gpt-4.1-mini"),
+        ("screenplay", "gpt-4.1-mini"),
+    }
+
+
+def test_run_llm_batch_submits_and_stores_videos(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from db import Base, models
+    from utils import SynthesiaClient, SynthesiaSimulator
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'videos.db'}")
+    Base.metadata.create_all(bind=engine)
+    TestingSession = sessionmaker(bind=engine)
+    journal = ProgressJournal(str(tmp_path / "journal.jsonl"))
+    # Accepted by Synthesia last run, but its metadata write failed.
+    journal.record_submission("q3", {"id": "v-q3", "status": "in_progress"}, "s3", "sp3")
+
+    with SynthesiaSimulator() as simulator:
+        orchestrator = make_orchestrator(tmp_path)
+        orchestrator.synthesia_client = SynthesiaClient(
+            api_key="key", base_url=simulator.base_url
+        )
+        stats, runner = run_llm_batch(
+            orchestrator,
+            ["q1", "q2", "q3", "boom"],
+            journal,
+            TestingSession,
+            backend=LocalBatchBackend(orchestrator.llm),
+            workdir=str(tmp_path / "work"),
+            concurrency=2,
+        )
+        created = simulator.stats()["created"]
+
+    assert (stats.succeeded, stats.failed) == (3, 1)
+    assert created == 2
+    assert journal.completed() == {"q1", "q2", "q3"}
+    stored = {video.proverb: video for video in TestingSession().query(models.Video)}
+    assert stored["q1"].screenplay == "screenplay: story: q1"
+    assert (stored["q3"].id, stored["q3"].screenplay) == ("v-q3", "sp3")
+    assert "story" in stats.summary()["stages"]
+
+
+def test_run_llm_batch_journals_the_quotes_of_a_failed_batch(tmp_path):
+    journal = ProgressJournal(str(tmp_path / "journal.jsonl"))
+    orchestrator = make_orchestrator(tmp_path)
+
+    stats, _ = run_llm_batch(
+        orchestrator,
+        ["q1", "q2"],
+        journal,
+        session_factory=None,
+        backend=FailingBackend(ScriptedLLM(), phase="screenplay"),
+        workdir=str(tmp_path / "work"),
+    )
+
+    assert (stats.succeeded, stats.failed) == (0, 2)
+    assert journal.completed() == set()
+    assert not list((tmp_path / "work").glob("screenplay.*.batch_id"))
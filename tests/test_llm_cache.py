@@ -0,0 +1,86 @@
+import os
+import time
+from types import SimpleNamespace
+
+from langchain_core.messages import SystemMessage
+
+from utils import CachedLLM, LLMCache
+
+
+class CountingLLM:
+    """A stub LLM that echoes the prompt and counts calls."""
+
+    def __init__(self, temperature=0.0, model_name="gpt-test"):
+        self.temperature = temperature
+        self.model_name = model_name
+        self.calls = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(content=f"reply {self.calls}: {messages[0].content}")
+
+
+def test_cached_llm_serves_repeat_prompts_from_disk(tmp_path):
+    cache = LLMCache(str(tmp_path))
+    llm = CountingLLM()
+    cached = CachedLLM(llm, cache, template_version="v1")
+
+    first = cached.invoke([SystemMessage(content="hello")])
+    second = cached.invoke([SystemMessage(content="hello")])
+
+    assert llm.calls == 1
+    assert second.content == first.content
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    # A fresh cache over the same directory still hits.
+    reopened = CachedLLM(llm, LLMCache(str(tmp_path)), template_version="v1")
+    assert reopened.invoke([SystemMessage(content="hello")]).content == first.content
+    assert llm.calls == 1
+
+
+def test_cache_key_includes_template_version_and_settings():
+    msgs = [SystemMessage(content="p")]
+    base = LLMCache.make_key(msgs, "gpt-4o", 0.0, "v1")
+    assert base == LLMCache.make_key(msgs, "gpt-4o", 0.0, "v1")
+    assert base != LLMCache.make_key(msgs, "gpt-4o", 0.0, "v2")
+    assert base != LLMCache.make_key(msgs, "gpt-4o-mini", 0.0, "v1")
+    assert base != LLMCache.make_key(msgs, "gpt-4o", 0.5, "v1")
+    assert base != LLMCache.make_key(msgs, "gpt-4o", 0.0, "v1", seed=1)
+
+
+def test_sampled_calls_bypass_cache_unless_enabled(tmp_path):
+    llm = CountingLLM(temperature=0.7)
+    cached = CachedLLM(llm, LLMCache(str(tmp_path)))
+    cached.invoke([SystemMessage(content="x")])
+    cached.invoke([SystemMessage(content="x")])
+    assert llm.calls == 2
+
+    forced = CachedLLM(llm, LLMCache(str(tmp_path)), cache_sampled=True)
+    forced.invoke([SystemMessage(content="x")])
+    forced.invoke([SystemMessage(content="x")])
+    assert llm.calls == 3
+
+    # A sampling temperature passed per call also bypasses the cache.
+    deterministic = CountingLLM()
+    cached = CachedLLM(deterministic, LLMCache(str(tmp_path / "per-call")))
+    cached.invoke([SystemMessage(content="x")], temperature=0.8, seed=1)
+    cached.invoke([SystemMessage(content="x")], temperature=0.8, seed=1)
+    assert deterministic.calls == 2
+
+
+def test_cache_evicts_expired_and_oversized_entries(tmp_path):
+    cache = LLMCache(str(tmp_path), max_age_seconds=60)
+    cache.set("aa01", "old")
+    old_path = cache._path("aa01")
+    past = time.time() - 120
+    os.utime(old_path, (past, past))
+    assert cache.get("aa01") is None
+    assert not os.path.exists(old_path)
+
+    small = LLMCache(str(tmp_path), max_bytes=200)
+    for i in range(5):
+        small.set(f"bb{i:02d}", "x" * 50)
+    assert small.stats()["size_bytes"] <= 200
+    assert small.evictions > 0
+    assert small.get("bb04") == "x" * 50
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from agents.usage import UsageLedger
+from utils import MetricsRegistry, SynthesiaClient
+from utils.metrics import Histogram, estimate_cost, percentile
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    hist = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        hist.observe(value)
+
+    assert hist.count == 4
+    assert hist.quantile(0.5) == pytest.approx(1.5)
+    assert hist.snapshot()["buckets"] == {"1.0": 1, "2.0": 3, "4.0": 4, "+Inf": 4}
+
+
+def test_estimate_cost_uses_longest_price_prefix_and_cached_rate():
+    mini = estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0)
+    assert mini == pytest.approx(0.15)
+    # Half the prompt served from the provider cache at the cached rate.
+    assert estimate_cost("gpt-4o", 1_000_000, 0, cached_tokens=500_000) == pytest.approx(1.875)
+    assert estimate_cost("some-local-model", 1000, 1000) == 0.0
+    # Batch API calls are billed at half price.
+    assert estimate_cost("gpt-4o", 1_000_000, 0, batch=True) == pytest.approx(1.25)
+
+
+def test_usage_ledger_reports_calls_to_registry():
+    registry = MetricsRegistry()
+    ledger = UsageLedger(registry, agent="story")
+    llm = MagicMock(model_name="gpt-4o")
+    llm.invoke.return_value = SimpleNamespace(
+        content="draft",
+        usage_metadata={"input_tokens": 1000, "output_tokens": 200},
+        response_metadata={"model_name": "gpt-4o-2024-08-06"},
+    )
+
+    ledger.invoke(llm, "story_node", ["prompt"])
+
+    (row,) = registry.snapshot()["llm"]
+    assert (row["agent"], row["node"], row["model"]) == ("story", "story_node", "gpt-4o-2024-08-06")
+    assert row["calls"] == 1
+    assert row["estimated_calls"] == 0
+    assert row["cost_usd"] == pytest.approx(0.0045)
+
+
+def test_usage_ledger_counts_tokens_when_usage_is_missing():
+    registry = MetricsRegistry()
+    ledger = UsageLedger(registry, agent="screenplay")
+    llm = MagicMock(model_name="gpt-4o")
+    llm.invoke.return_value = SimpleNamespace(content="a short reply")
+
+    ledger.invoke(llm, "critique_node", [SimpleNamespace(content="please review this")])
+
+    (row,) = registry.snapshot()["llm"]
+    assert row["estimated_calls"] == 1
+    assert row["input_tokens"] > 0
+    assert row["output_tokens"] > 0
+
+
+def test_prometheus_export_has_histograms_and_counters():
+    registry = MetricsRegistry(buckets=(1.0,))
+    registry.observe_llm("story", "critique_node", "gpt-4o", 0.4, 10, 2, cached_tokens=4)
+    registry.observe_http("GET /videos/{id}", 0.2, 200)
+
+    text = registry.to_prometheus()
+
+    labels = 'agent="story",node="critique_node",model="gpt-4o"'
+    assert f'aiinfluencer_llm_latency_seconds_bucket{{{labels},le="1.0"}} 1' in text
+    assert f'aiinfluencer_llm_tokens_total{{{labels},kind="cached"}} 4' in text
+    assert 'aiinfluencer_http_requests_total{endpoint="GET /videos/{id}",status="200"} 1' in text
+
+
+def test_synthesia_client_records_endpoint_latency_and_status():
+    registry = MetricsRegistry()
+    client = SynthesiaClient(api_key="key", metrics=registry, max_retries=0)
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"id": "v1", "status": "complete"}
+    failed = requests.Response()
+    failed.status_code = 404
+
+    with patch.object(requests.Session, "request", side_effect=[ok, failed]):
+        client.get_video_status("v1")
+        with pytest.raises(requests.HTTPError):
+            client.get_video_status("missing")
+
+    (row,) = registry.snapshot()["http"]
+    assert row["endpoint"] == "GET /videos/{id}"
+    assert row["statuses"] == {"200": 1, "404": 1}
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 50) == 0.0
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile(range(1, 101), 95) == 95
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from agent_orchestrator import AgentOrchestrator
+from agents.routing import load_model_routes, parse_model_routes, route_model
+from benchmarks.fakes import FakeChatModel
+
+
+def test_routes_parse_validate_and_prefer_the_agent_specific_entry(tmp_path):
+    routes = parse_model_routes("critique=gpt-4o-mini, story.critique=gpt-4.1-nano")
+
+    assert route_model(routes, "story", "critique", "gpt-4o") == "gpt-4.1-nano"
+    assert route_model(routes, "screenplay", "critique", "gpt-4o") == "gpt-4o-mini"
+    assert route_model(routes, "story", "edit", "gpt-4o") == "gpt-4o"
+    with pytest.raises(ValueError):
+        parse_model_routes("review=gpt-4o-mini")
+    with pytest.raises(ValueError):
+        parse_model_routes("video.edit=gpt-4o")
+
+    path = tmp_path / "models.json"
+    path.write_text(json.dumps({"screenplay.edit": "gpt-4.1"}), encoding="utf-8")
+    assert load_model_routes(str(path)) == {"screenplay.edit": "gpt-4.1"}
+
+
+def test_orchestrator_routes_nodes_and_records_accept_rate_per_model():
+    built = []
+
+    def factory(name):
+        built.append(name)
+        return FakeChatModel(latency=0, output_tokens=20, revise_rate=0.5, model_name=name)
+
+    orchestrator = AgentOrchestrator(
+        model_name="gpt-4o",
+        model_routes={"critique": "gpt-4o-mini"},
+        llm_factory=factory,
+        synthesia_client=object(),
+    )
+    assert sorted(built) == ["gpt-4o", "gpt-4o-mini"]
+    assert orchestrator.story_agent.critique_llm is orchestrator.screenplay_agent.critique_llm
+    assert orchestrator.story_agent.edit_llm is orchestrator.llm
+
+    for i in range(8):
+        orchestrator.generate_story(f"proverb {i}")
+
+    snapshot = orchestrator.metrics.snapshot()
+    models = {(row["node"], row["model"]) for row in snapshot["llm"]}
+    assert ("story_node", "gpt-4o") in models
+    assert ("critique_node", "gpt-4o-mini") in models
+    assert ("critique_node", "gpt-4o") not in models
+    [critiques] = snapshot["critiques"]
+    assert (critiques["agent"], critiques["model"], critiques["critiques"]) == (
+        "story",
+        "gpt-4o-mini",
+        8,
+    )
+    edits = sum(row["calls"] for row in snapshot["llm"] if row["node"] == "edit_node")
+    assert critiques["accept_rate"] == pytest.approx(1 - edits / 8)
+    assert "accept %" in orchestrator.metrics.format_summary()
+    assert 'verdict="accept"' in orchestrator.metrics.to_prometheus()
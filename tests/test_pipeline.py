@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from utils import PipelineStage, StagedPipeline
+
+
+def test_pipeline_returns_results_in_input_order():
+    pipeline = StagedPipeline(
+        [
+            PipelineStage("double", lambda x: x * 2, workers=3),
+            PipelineStage("inc", lambda x: x + 1, workers=2),
+        ]
+    )
+    results = pipeline.run(range(20))
+
+    assert [r.result for r in results] == [x * 2 + 1 for x in range(20)]
+    summary = pipeline.summary()
+    assert summary["double"]["processed"] == 20
+    assert summary["inc"]["processed"] == 20
+
+
+def test_pipeline_isolates_failures_and_reports_failed_stage():
+    def check(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    finished = []
+    pipeline = StagedPipeline(
+        [PipelineStage("check", check, workers=2), PipelineStage("echo", lambda x: x)]
+    )
+    results = pipeline.run(range(5), on_result=finished.append)
+
+    assert [r.ok for r in results] == [True, True, True, False, True]
+    assert results[3].failed_stage == "check"
+    assert isinstance(results[3].error, ValueError)
+    assert len(finished) == 5
+    assert pipeline.summary()["echo"]["processed"] == 4
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_pipeline_finishes_when_a_worker_dies_on_a_base_exception():
+    class Abort(BaseException):
+        pass
+
+    def check(x):
+        if x == 3:
+            raise Abort()
+        return x
+
+    pipeline = StagedPipeline(
+        [PipelineStage("check", check, workers=2), PipelineStage("echo", lambda x: x)]
+    )
+    results = []
+    runner = threading.Thread(target=lambda: results.extend(pipeline.run(range(5))), daemon=True)
+    runner.start()
+    runner.join(timeout=5)
+
+    assert not runner.is_alive()
+    # The surviving worker processed the rest; the next stage was still stopped.
+    assert results[3] is None
+    assert sorted(r.result for r in results if r is not None) == [0, 1, 2, 4]
+
+
+def test_pipeline_applies_backpressure_to_slow_stages():
+    lock = threading.Lock()
+    in_flight = {"fast": 0, "max_ahead": 0}
+
+    def fast(x):
+        with lock:
+            in_flight["fast"] += 1
+            in_flight["max_ahead"] = max(in_flight["max_ahead"], in_flight["fast"])
+        return x
+
+    def slow(x):
+        time.sleep(0.01)
+        with lock:
+            in_flight["fast"] -= 1
+        return x
+
+    pipeline = StagedPipeline(
+        [
+            PipelineStage("fast", fast, workers=2, queue_size=2),
+            PipelineStage("slow", slow, workers=1, queue_size=2),
+        ],
+        sample_interval=0.005,
+    )
+    pipeline.run(range(30))
+
+    # fast can only get ahead by the slow stage's queue, its worker and the
+    # fast workers blocked on a full queue.
+    assert in_flight["max_ahead"] <= 2 + 1 + 2
+    summary = pipeline.summary()
+    assert summary["slow"]["max_queue_depth"] <= 2
+    assert summary["slow"]["utilisation"] > summary["fast"]["utilisation"]
+
+
+def test_pipeline_requires_a_stage():
+    with pytest.raises(ValueError):
+        StagedPipeline([])
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import pytest
+
+from agents.pre_critic import PreCritic, screenplay_pre_critic
+from agents.story_agent import StoryAgent
+
+
+class DummyLLM:
+    """A stub LLM that yields predetermined responses."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def invoke(self, messages):
+        self.calls.append(messages)
+        idx = len(self.calls) - 1
+        return SimpleNamespace(content=self.responses[idx])
+
+
+@pytest.fixture
+def prompt_files(tmp_path):
+    story_template = tmp_path / "story_template.txt"
+    story_template.write_text('Write a short story illustrating the proverb: "{proverb}"', encoding="utf-8")
+    critique_template = tmp_path / "story_critique.txt"
+    critique_template.write_text("Critique: {story}", encoding="utf-8")
+    return str(story_template), str(critique_template)
+
+
+def test_pre_critic_rejects_broken_drafts_with_a_critique():
+    critic = PreCritic(min_words=3, max_words=5, required_phrases=("moral: {proverb}",))
+
+    assert critic.review("", "p")[0] == "reject"
+    assert critic.review("too short", "p") == (
+        "reject",
+        "revise: The draft is only 2 words; expand it to at least 3 words.",
+    )
+    assert critic.review("one two three four five six", "p")[0] == "reject"
+    verdict, critique = critic.review("a b c moral: other", "haste")
+    assert verdict == "reject"
+    assert 'moral: haste' in critique
+    assert critic.review("a b Moral: Haste!", "haste") == ("defer", "")
+
+
+def test_screenplay_rules_match_required_closing_lines():
+    critic = screenplay_pre_critic(accept_when_clean=True)
+    body = "word " * 60
+    ending = (
+        "The moral of the story is: Haste makes waste.\n"
+        "If you like such fun stories, subscribe to Proverb Panda."
+    )
+    assert critic.review(body + ending, "Haste makes waste.")[0] == "accept"
+    assert critic.review(body, "Haste makes waste.")[0] == "reject"
+
+
+def test_story_agent_skips_llm_critique_when_pre_critic_decides(prompt_files):
+    prompt_file, critique_file = prompt_files
+    critic = PreCritic(min_words=3, accept_when_clean=True)
+
+    llm = DummyLLM(responses=["a fine long story"])
+    agent = StoryAgent(llm, prompt_file, critique_file, pre_critic=critic)
+    assert agent.run("moral")["story"] == "a fine long story"
+    assert len(llm.calls) == 1
+
+    llm = DummyLLM(responses=["short", "a much better story"])
+    agent = StoryAgent(llm, prompt_file, critique_file, pre_critic=critic)
+    assert agent.run("moral")["story"] == "a much better story"
+    assert len(llm.calls) == 2
+    assert "expand it to at least 3 words" in llm.calls[1][-1].content
+
+    stats = critic.stats()
+    assert stats["accept"] == 1
+    assert stats["reject"] == 1
+    assert stats["llm_calls_saved"] == 2
+
+
+def test_story_agent_defers_to_llm_critique(prompt_files):
+    prompt_file, critique_file = prompt_files
+    critic = PreCritic(min_words=1)
+    llm = DummyLLM(responses=["draft story", "revise: more", "final"])
+    agent = StoryAgent(llm, prompt_file, critique_file, pre_critic=critic)
+
+    assert agent.run("moral")["story"] == "final"
+    assert len(llm.calls) == 3
+    assert critic.stats()["defer"] == 1
+    assert critic.stats()["llm_calls_saved"] == 0
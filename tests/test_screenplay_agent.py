@@ -50,13 +50,18 @@ def test_screenplay_agent_replaces_placeholders_and_returns_screenplay(prompt_fi
     assert output["screenplay"] == dummy_output
 
     # Assert prompt correctness
-    sent_system_msg = llm.calls[0][0].content
+    sent_messages = llm.calls[0]
+    sent_prompt = "".join(m.content for m in sent_messages)
     expected_prompt = (
         f"Convert the following story into a screenplay format.\n\n"
         f"Proverb: {proverb}\n\n"
         f"Story: {story}"
     )
-    assert sent_system_msg == expected_prompt
+    assert sent_prompt == expected_prompt
+    # The fixed instructions go first so repeat calls share a cacheable prefix.
+    assert sent_messages[0].content == (
+        "Convert the following story into a screenplay format.\n\n"
+    )
 
 
 def test_screenplay_agent_applies_revision_when_requested(prompt_files):
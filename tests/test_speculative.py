@@ -0,0 +1,90 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents.speculative import SpeculationStats, speculate
+from agents.story_agent import StoryAgent
+
+
+def test_speculate_returns_first_accepted_draft_without_waiting():
+    stats = SpeculationStats()
+    delays = {0: 1.0, 1: 0.05, 2: 0.0}
+
+    def make_draft(index):
+        time.sleep(delays[index])
+        return f"draft {index}"
+
+    def review(draft):
+        return ("accept", "accept") if draft == "draft 1" else ("revise", "revise: more")
+
+    started = time.perf_counter()
+    result = speculate(3, make_draft, review, stats)
+
+    assert time.perf_counter() - started < 0.5
+    assert (result.draft, result.verdict) == ("draft 1", "accept")
+    time.sleep(1.1)
+    summary = stats.summary()
+    assert (summary["rounds"], summary["accepted"], summary["critiques"]) == (1, 1, 2)
+    assert summary["wasted"] == 1
+
+
+def test_speculate_falls_back_to_the_best_reviewed_draft():
+    critiques = {
+        "draft 0": ("reject", "revise: too short"),
+        "draft 1": ("revise", "revise: tighten the ending and rename the fox"),
+        "draft 2": ("revise", "revise: tighten the ending"),
+    }
+    result = speculate(3, lambda index: f"draft {index}", critiques.__getitem__)
+    assert result.draft == "draft 2"
+
+    def broken(index):
+        raise RuntimeError(f"draft {index} failed")
+
+    with pytest.raises(RuntimeError):
+        speculate(2, broken, critiques.__getitem__)
+
+
+class SeededLLM:
+    """Draft text depends on the seed; critiques accept only ``good`` drafts."""
+
+    def __init__(self, good_seeds):
+        self.good_seeds = good_seeds
+        self.calls = []
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append(kwargs)
+        prompt = messages[-1].content
+        if prompt.startswith("Critique"):
+            return SimpleNamespace(content="accept" if "good" in prompt else "revise: more")
+        if len(messages) > 2:
+            return SimpleNamespace(content="edited")
+        seed = kwargs.get("seed", 0)
+        return SimpleNamespace(content=f"{'good' if seed in self.good_seeds else 'weak'} {seed}")
+
+
+@pytest.fixture
+def prompt_files(tmp_path):
+    story_template = tmp_path / "story_template.txt"
+    story_template.write_text("Write a story.\n{proverb}", encoding="utf-8")
+    critique_template = tmp_path / "story_critique.txt"
+    critique_template.write_text("Critique: {story}", encoding="utf-8")
+    return str(story_template), str(critique_template)
+
+
+def test_story_agent_keeps_an_accepted_sampled_draft(prompt_files):
+    llm = SeededLLM(good_seeds={2})
+    agent = StoryAgent(llm, *prompt_files, drafts=3, draft_temperature=0.9)
+
+    assert agent.run("moral") == {"story": "good 2"}
+    assert {"temperature": 0.9, "seed": 2} in llm.calls
+    assert agent.speculation.summary()["accepted"] == 1
+
+
+def test_story_agent_edits_when_no_draft_is_accepted(prompt_files):
+    llm = SeededLLM(good_seeds=set())
+    agent = StoryAgent(llm, *prompt_files, drafts=2)
+
+    assert agent.run("moral") == {"story": "edited"}
+    assert agent.speculation.summary()["edited"] == 1
+    assert agent.usage.summary()["edit_node"]["calls"] == 1
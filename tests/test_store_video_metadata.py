@@ -1,4 +1,6 @@
 from datetime import datetime
+
+import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -28,4 +30,111 @@ def test_store_video_metadata_inserts_row():
     assert saved.story == "story"
     assert saved.screenplay == "screenplay"
     assert saved.status == "in_progress"
-    assert saved.created_at == datetime.fromtimestamp(resp["createdAt"])
+    # Stored as naive UTC whatever the host's timezone.
+    assert saved.created_at == datetime(2023, 11, 14, 22, 13, 20)
+
+
+def test_find_videos_by_proverb_matches_normalised_text():
+    from db.utils import find_videos_by_proverb, proverb_hash
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    for proverb, response in (
+        ("Slow and steady.", {"id": "v1", "status": "in_progress", "createdAt": 1}),
+        ("slow and steady", {"id": "v2", "status": "complete", "createdAt": 2}),
+        ("Measure twice", {"id": "v3", "status": "failed"}),
+    ):
+        store_video_metadata(session, proverb, None, None, response)
+
+    found = find_videos_by_proverb(session, ["SLOW and  steady!", "Measure twice", "new"])
+
+    assert session.get(models.Video, "v1").proverb_hash == proverb_hash("slow and steady")
+    # The completed render wins; failed videos do not count as existing.
+    assert {p: v.id for p, v in found.items()} == {"SLOW and  steady!": "v2"}
+
+
+def test_store_videos_bulk_upserts_on_synthesia_id(tmp_path):
+    from db.utils import store_videos_bulk
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'videos.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    records = [
+        (f"p{i}", "story", "screenplay", {"id": f"v{i}", "status": "in_progress"})
+        for i in range(250)
+    ]
+
+    assert store_videos_bulk(session, records, chunk_size=100) == 250
+    session.get(models.Video, "v0").status = "complete"
+    session.commit()
+    # A replayed write refreshes the text but keeps the advanced status.
+    store_videos_bulk(session, [("p0", "new story", None, {"id": "v0", "status": "in_progress"})])
+
+    session.expire_all()
+    video = session.get(models.Video, "v0")
+    assert session.query(models.Video).count() == 250
+    assert (video.story, video.status) == ("new story", "complete")
+
+
+def test_buffered_writer_groups_concurrent_writes(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from db import BufferedVideoWriter
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'videos.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with BufferedVideoWriter(Session, max_rows=10, max_delay=5) as writer:
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            ids = list(
+                pool.map(
+                    lambda i: writer.add(f"p{i}", "s", "sp", {"id": f"v{i}"}).result(),
+                    range(30),
+                )
+            )
+        with pytest.raises(ValueError):
+            writer.add("bad", "s", "sp", {"status": "in_progress"})
+        writer.add("late", "s", "sp", {"id": "late"})
+        writer.flush()
+
+    assert ids == [f"v{i}" for i in range(30)]
+    assert writer.stats()["rows_written"] == 31
+    assert writer.flushes == 4
+    assert Session().query(models.Video).count() == 31
+
+
+def test_async_store_functions(tmp_path):
+    import asyncio
+
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import selectinload
+
+    from db import astore_video_metadata, astore_videos_bulk
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'videos.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await astore_video_metadata(
+                session, "p", "s", "sp", {"id": "one", "status": "complete"}
+            )
+            written = await astore_videos_bulk(
+                session,
+                [(f"p{i}", "s", "sp", {"id": f"v{i}"}) for i in range(5)]
+                + [("p", "new", "sp", {"id": "one", "status": "in_progress"})],
+                chunk_size=2,
+            )
+            # Async sessions can't lazy-load the text; load it with the row.
+            video = await session.get(
+                models.Video,
+                "one",
+                options=[selectinload(models.Video.content)],
+                populate_existing=True,
+            )
+        await engine.dispose()
+        return written, video.status, video.story
+
+    assert asyncio.run(run()) == (6, "complete", "new")
@@ -15,7 +15,10 @@ class DummyLLM:
     def invoke(self, messages):
         self.calls.append(messages)
         idx = len(self.calls) - 1
-        return SimpleNamespace(content=self.responses[idx])
+        response = self.responses[idx]
+        if isinstance(response, str):
+            response = SimpleNamespace(content=response)
+        return response
 
 
 @pytest.fixture
@@ -55,3 +58,33 @@ def test_story_agent_applies_revision_when_requested(prompt_files):
     output = agent.run("moral")
     # Third response should be returned after applying critique
     assert output["story"] == "Better story"
+
+
+def test_story_agent_revision_reuses_generation_prefix_and_records_usage(prompt_files):
+    prompt_file, critique_file = prompt_files
+    first = SimpleNamespace(
+        content="Bad story",
+        usage_metadata={
+            "input_tokens": 120,
+            "output_tokens": 40,
+            "input_token_details": {"cache_read": 96},
+        },
+    )
+    llm = DummyLLM(responses=[first, "Needs more drama", "Better story"])
+    agent = StoryAgent(llm=llm, prompt_file=prompt_file, critique_prompt_file=critique_file)
+
+    agent.run("moral")
+
+    generation, _, revision = llm.calls
+    assert [m.content for m in revision[: len(generation)]] == [
+        m.content for m in generation
+    ]
+    assert [m.content for m in revision[len(generation):]] == [
+        "Bad story",
+        "Needs more drama",
+    ]
+
+    usage = agent.usage.summary()
+    assert usage["story_node"]["cached_tokens"] == 96
+    assert usage["story_node"]["uncached_tokens"] == 24
+    assert usage["edit_node"]["calls"] == 1
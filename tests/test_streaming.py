@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from agents.screenplay_agent import ScreenplayAgent
+from agents.story_agent import StoryAgent
+from main import consume_stream
+
+
+def fake_llm(*replies):
+    return GenericFakeChatModel(messages=iter([AIMessage(content=r) for r in replies]))
+
+
+@pytest.fixture
+def story_prompts(tmp_path):
+    story = tmp_path / "story.txt"
+    story.write_text("Write about {proverb}", encoding="utf-8")
+    critique = tmp_path / "critique.txt"
+    critique.write_text("Critique: {story}", encoding="utf-8")
+    return str(story), str(critique)
+
+
+def test_story_run_stream_yields_tokens_before_node_end(story_prompts):
+    agent = StoryAgent(fake_llm("once upon a time", "accept"), *story_prompts)
+
+    events = list(agent.run_stream("haste makes waste"))
+
+    kinds = [(e["type"], e.get("node")) for e in events]
+    first_end = kinds.index(("node_end", "story_node"))
+    assert ("token", "story_node") in kinds[:first_end]
+    story_tokens = "".join(
+        e["content"] for e in events if e["type"] == "token" and e["node"] == "story_node"
+    )
+    assert story_tokens == "once upon a time"
+    assert events[-1] == {"type": "done", "output": {"story": "once upon a time"}}
+
+    summary = agent.stream_metrics.summary()
+    assert summary["story_node/unknown"]["calls"] == 1
+    assert summary["story_node/unknown"]["tokens_per_sec"] > 0
+    assert summary["critique_node/unknown"]["avg_ttft"] >= 0
+
+
+def test_story_stream_output_follows_revision(story_prompts):
+    agent = StoryAgent(fake_llm("draft", "revise: more", "final story"), *story_prompts)
+    events = list(agent.run_stream("p"))
+    assert events[-1]["output"] == {"story": "final story"}
+
+
+def test_screenplay_astream_yields_tokens(tmp_path):
+    template = tmp_path / "sp.txt"
+    template.write_text("Screenplay for {story} / {proverb}", encoding="utf-8")
+    critique = tmp_path / "spc.txt"
+    critique.write_text("Critique: {screenplay}", encoding="utf-8")
+    agent = ScreenplayAgent(fake_llm("INT. DAY", "accept"), str(template), str(critique))
+
+    async def collect():
+        return [event async for event in agent.astream("story", "proverb")]
+
+    events = asyncio.run(collect())
+    assert any(e["type"] == "token" and e["node"] == "screenplay_node" for e in events)
+    assert events[-1]["output"] == {"screenplay": "INT. DAY"}
+
+
+
+def test_story_stream_reaches_speculative_draft_calls(story_prompts):
+    # Drafts race for the fake's replies, so every reply works as either.
+    agent = StoryAgent(fake_llm(*["accept"] * 4), *story_prompts, drafts=2)
+
+    events = list(agent.run_stream("haste makes waste"))
+
+    drafts = [e for e in events if e["type"] == "token" and e["node"] == "speculative_node"]
+    assert drafts
+    # Each draft's tokens are tagged so interleaved streams can be told apart.
+    assert {e["draft"] for e in drafts} <= {0, 1}
+    assert events[-1] == {"type": "done", "output": {"story": "accept"}}
+    assert agent.stream_metrics.summary()["speculative_node/unknown"]["calls"] >= 1
+
+
+def test_consume_stream_prints_the_chosen_draft_not_interleaved_tokens(capsys):
+    events = [
+        {"type": "token", "node": "speculative_node", "content": "ab", "draft": 0},
+        {"type": "token", "node": "speculative_node", "content": "cd", "draft": 1},
+        {"type": "node_end", "node": "speculative_node", "update": {"story": "cd"}},
+        {"type": "done", "output": {"story": "cd"}},
+    ]
+
+    assert consume_stream(events) == {"story": "cd"}
+    out = capsys.readouterr().out
+    assert "ab" not in out
+    assert "--- speculative_node ---\n{'story': 'cd'}" in out
@@ -1,4 +1,8 @@
+import json
 import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 import requests
 from pydantic import ValidationError
@@ -11,6 +15,7 @@ from utils import (
     TemplateData,
     CreateVideoFromTemplateRequest,
 )
+from utils.synthesia_client import backoff_delay, should_retry_status
 
 
 def test_create_video_request_valid():
@@ -66,7 +71,7 @@ def test_create_video_request_invalid_nested_input():
         )
 
 
-@patch("utils.requests.post")
+@patch("requests.Session.request")
 def test_synthesia_client_create_video_success(mock_post):
     # Arrange: fake a successful 201 response
     mock_resp = MagicMock()
@@ -93,17 +98,20 @@ def test_synthesia_client_create_video_success(mock_post):
 
     # Assert HTTP call was made correctly
     mock_post.assert_called_once_with(
+        "POST",
         "https://api.synthesia.io/v2/videos",
         headers=client.headers,
         json=params.model_dump(by_alias=True),
+        timeout=client.timeout,
     )
     assert result == {"id": "vid_123"}
 
 
-@patch("utils.requests.post")
+@patch("requests.Session.request")
 def test_synthesia_client_create_video_http_error(mock_post):
     # Arrange: simulate an HTTP 400
     mock_resp = MagicMock()
+    mock_resp.status_code = 400
     mock_resp.raise_for_status.side_effect = requests.exceptions.HTTPError("Bad Request")
     mock_post.return_value = mock_resp
 
@@ -142,7 +150,7 @@ def test_create_video_from_template_request_valid():
     assert payload["templateData"]["screenplay"] == "Hello"
 
 
-@patch("utils.requests.post")
+@patch("requests.Session.request")
 def test_synthesia_client_create_video_from_template_success(mock_post):
     mock_resp = MagicMock()
     mock_resp.status_code = 201
@@ -162,16 +170,19 @@ def test_synthesia_client_create_video_from_template_success(mock_post):
 
     result = client.create_video_from_template(req)
     mock_post.assert_called_once_with(
+        "POST",
         "https://api.synthesia.io/v2/videos/fromTemplate",
         headers=client.headers,
         json=req.model_dump(by_alias=True),
+        timeout=client.timeout,
     )
     assert result == {"id": "vid_temp"}
 
 
-@patch("utils.requests.post")
+@patch("requests.Session.request")
 def test_synthesia_client_create_video_from_template_http_error(mock_post):
     mock_resp = MagicMock()
+    mock_resp.status_code = 400
     mock_resp.raise_for_status.side_effect = requests.exceptions.HTTPError("Bad")
     mock_post.return_value = mock_resp
 
@@ -187,3 +198,121 @@ def test_synthesia_client_create_video_from_template_http_error(mock_post):
 
     with pytest.raises(requests.exceptions.HTTPError):
         client.create_video_from_template(req)
+
+
+@patch("utils.synthesia_client.time.sleep")
+@patch("requests.Session.request")
+def test_synthesia_client_retries_rate_limit_honouring_retry_after(mock_request, mock_sleep):
+    limited = MagicMock()
+    limited.status_code = 429
+    limited.headers = {"Retry-After": "7"}
+    ok = MagicMock()
+    ok.status_code = 200
+    ok.json.return_value = {"id": "vid1", "status": "complete"}
+    mock_request.side_effect = [limited, ok]
+
+    client = SynthesiaClient(api_key="fakekey")
+    status = client.get_video_status("vid1")
+
+    assert status.status == "complete"
+    mock_sleep.assert_called_once_with(7.0)
+    assert client.stats()["retries"] == 1
+
+
+@patch("utils.synthesia_client.time.sleep")
+@patch("requests.Session.request")
+def test_synthesia_client_gives_up_after_max_retries(mock_request, mock_sleep):
+    failing = MagicMock()
+    failing.status_code = 503
+    failing.headers = {}
+    failing.raise_for_status.side_effect = requests.exceptions.HTTPError("Unavailable")
+    mock_request.return_value = failing
+
+    client = SynthesiaClient(api_key="fakekey", max_retries=2)
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_video_status("vid1")
+
+    assert mock_request.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+@patch("utils.synthesia_client.time.sleep")
+@patch("requests.Session.request")
+def test_synthesia_client_retries_refused_post_but_not_dropped_post(mock_request, mock_sleep):
+    from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+    refused = requests.ConnectionError(
+        MaxRetryError(None, "/videos", NewConnectionError(None, "Connection refused"))
+    )
+    ok = MagicMock()
+    ok.status_code = 201
+    ok.json.return_value = {"id": "vid1"}
+    mock_request.side_effect = [refused, ok]
+    client = SynthesiaClient(api_key="fakekey")
+    req = CreateVideoFromTemplateRequest(
+        test=True,
+        templateData=TemplateData(screenplay="Hi"),
+        visibility="private",
+        templateId="t",
+        title="T",
+        description="D",
+    )
+
+    assert client.create_video_from_template(req) == {"id": "vid1"}
+    assert client.stats()["retries"] == 1
+
+    # Dropped after sending: the server may have created the video.
+    mock_request.side_effect = [requests.ConnectionError(ProtocolError("aborted")), ok]
+    with pytest.raises(requests.ConnectionError):
+        client.create_video_from_template(req)
+
+
+def test_post_is_only_retried_when_the_server_did_not_act():
+    for status in (500, 502, 503, 504):
+        assert should_retry_status("GET", status, None)
+    # A gateway error may hide a render that was created upstream.
+    assert not should_retry_status("POST", 502, "1")
+    assert not should_retry_status("POST", 504, None)
+    assert not should_retry_status("POST", 503, None)
+    assert should_retry_status("POST", 503, "1")
+    assert should_retry_status("POST", 429, None)
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    for attempt in range(10):
+        delay = backoff_delay(attempt, None, backoff_factor=0.5, max_backoff=4.0)
+        assert 0 <= delay <= 4.0
+    assert backoff_delay(0, "3") == 3.0
+
+
+def test_synthesia_client_reuses_pooled_connections():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = json.dumps({"id": self.path.rsplit("/", 1)[-1], "status": "complete"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        with SynthesiaClient(api_key="fakekey", base_url=base_url) as client:
+            for i in range(5):
+                assert client.get_video_status(f"vid{i}").id == f"vid{i}"
+            stats = client.stats()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 4
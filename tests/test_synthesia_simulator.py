@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import pytest
+import requests
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db import Base, models
+from db.utils import store_video_metadata
+from jobs.video_status_updater import check_pending_videos
+from utils import (
+    CreateVideoFromTemplateRequest,
+    SimulatorConfig,
+    SynthesiaClient,
+    SynthesiaSimulator,
+    TemplateData,
+)
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def template_request(title="t"):
+    return CreateVideoFromTemplateRequest(
+        test=True,
+        templateData=TemplateData(screenplay="Once upon a time"),
+        visibility="private",
+        templateId="tmpl",
+        title=title,
+        description="d",
+    )
+
+
+def test_videos_render_over_time():
+    clock = Clock()
+    config = SimulatorConfig(render_seconds=(10, 10), seed=1)
+    with SynthesiaSimulator(config, clock=clock) as sim:
+        client = SynthesiaClient(api_key="key", base_url=sim.base_url)
+        created = client.create_video_from_template(template_request())
+
+        assert created["status"] == "in_progress"
+        assert client.get_video_status(created["id"]).status == "in_progress"
+        clock.now += 10
+        status = client.get_video_status(created["id"])
+        assert (status.status, status.lastUpdatedAt) == ("complete", clock.now)
+
+        # Other API keys cannot see the video.
+        other = SynthesiaClient(api_key="other", base_url=sim.base_url)
+        with pytest.raises(requests.HTTPError):
+            other.get_video_status(created["id"])
+
+
+def test_invalid_payloads_and_quota_are_rejected():
+    sim = SynthesiaSimulator(SimulatorConfig(quota=1))
+    try:
+        code, body, _ = sim.handle("POST", "/videos", "key", b'{"title": "x"}')
+        assert code == 400 and body["details"]
+
+        payload = template_request().model_dump_json(by_alias=True).encode()
+        assert sim.handle("POST", "/videos/fromTemplate", "key", payload)[0] == 201
+        assert sim.handle("POST", "/videos/fromTemplate", "key", payload)[0] == 403
+        assert sim.handle("POST", "/videos/fromTemplate", "", payload)[0] == 401
+    finally:
+        sim.server.server_close()
+
+
+def test_rate_limits_and_error_bursts_are_retried_by_the_client():
+    config = SimulatorConfig(
+        rate_limit=50, rate_burst=1, error_burst_rate=0.2, error_burst_seconds=0.0, seed=3
+    )
+    with SynthesiaSimulator(config) as sim:
+        client = SynthesiaClient(
+            api_key="key", base_url=sim.base_url, max_retries=10, backoff_factor=0.001
+        )
+        ids = [
+            client.create_video_from_template(template_request(f"v{i}"))["id"] for i in range(5)
+        ]
+        statuses = [client.get_video_status(video_id).status for video_id in ids]
+
+        stats = sim.stats()
+        assert statuses == ["in_progress"] * 5
+        assert stats["created"] == 5
+        assert stats["rate_limited"] > 0
+        assert stats["server_errors"] > 0
+        assert client.stats()["retries"] == stats["rate_limited"] + stats["server_errors"]
+
+
+def test_status_job_picks_up_renders_from_the_simulator():
+    clock = Clock()
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    config = SimulatorConfig(render_seconds=(5, 50), failure_rate=0.2, seed=7)
+
+    with SynthesiaSimulator(config, clock=clock) as sim:
+        client = SynthesiaClient(api_key="key", base_url=sim.base_url)
+        for i in range(40):
+            response = client.create_video_from_template(template_request(f"v{i}"))
+            store_video_metadata(session, f"proverb {i}", None, None, response)
+
+        clock.now += 60
+        updated = check_pending_videos(session, client, max_workers=4, now=datetime.max)
+
+        expected = sim.stats()["videos"]
+    counts = {}
+    for video in session.query(models.Video):
+        counts[video.status] = counts.get(video.status, 0) + 1
+    assert updated == 40
+    assert counts == expected
+    assert set(counts) == {"complete", "failed"}
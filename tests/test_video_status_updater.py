@@ -1,36 +1,48 @@
-from sqlalchemy import create_engine
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+import requests
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from unittest.mock import patch
 
 from db import Base, models
-from jobs.video_status_updater import check_pending_videos
-from utils import SynthesiaClient
+from jobs.video_status_updater import (
+    PollSchedule,
+    acheck_pending_videos,
+    aseconds_until_next_check,
+    check_pending_videos,
+    seconds_until_next_check,
+)
+from utils import AsyncSynthesiaClient, SynthesiaClient, VideoStatus
 
 
-def setup_in_memory_db():
+@pytest.fixture
+def session():
     engine = create_engine("sqlite:///:memory:")
-    TestingSession = sessionmaker(bind=engine)
     Base.metadata.create_all(bind=engine)
-    return engine, TestingSession
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
 
 
 @patch.object(SynthesiaClient, "get_video_status")
-def test_check_pending_videos_updates_status(mock_get_status):
-    engine, TestingSession = setup_in_memory_db()
-    session = TestingSession()
-
+def test_check_pending_videos_updates_status(mock_get_status, session):
     video = models.Video(
         id="vid1",
         proverb="p",
         story=None,
         screenplay=None,
         status="in_progress",
+        created_at=datetime(2024, 1, 1),
     )
     session.add(video)
     session.commit()
 
-    from utils import VideoStatus
-
     mock_get_status.return_value = VideoStatus(id="vid1", status="complete")
 
     client = SynthesiaClient(api_key="fake")
@@ -38,4 +50,155 @@ def test_check_pending_videos_updates_status(mock_get_status):
 
     assert updated == 1
     session.refresh(video)
-    assert video.status == "complete"
\ No newline at end of file
+    assert video.status == "complete"
+
+
+def test_check_pending_videos_fetches_concurrently_and_bulk_updates(session):
+    for i in range(6):
+        session.add(
+            models.Video(
+                id=f"v{i}", proverb="p", status="in_progress", created_at=datetime(2024, 1, 1)
+            )
+        )
+    session.add(models.Video(id="done", proverb="p", status="complete"))
+    session.commit()
+
+    def fake_status(video_id):
+        if video_id == "v0":
+            raise requests.ConnectionError("down")
+        if video_id == "v1":
+            return VideoStatus(id=video_id, status="in_progress")
+        return VideoStatus(id=video_id, status="complete")
+
+    client = MagicMock()
+    client.get_video_status.side_effect = fake_status
+
+    updated = check_pending_videos(session, client, max_workers=3, chunk_size=2)
+
+    assert updated == 4
+    assert client.get_video_status.call_count == 6
+    statuses = dict(session.query(models.Video.id, models.Video.status).all())
+    assert statuses == {
+        "v0": "in_progress",
+        "v1": "in_progress",
+        "v2": "complete",
+        "v3": "complete",
+        "v4": "complete",
+        "v5": "complete",
+        "done": "complete",
+    }
+
+
+def test_check_pending_videos_survives_malformed_status_payloads(session):
+    for video_id in ("bad", "missing", "ok"):
+        session.add(models.Video(
+            id=video_id, proverb="p", status="in_progress", created_at=datetime(2024, 1, 1),
+        ))
+    session.commit()
+
+    def fake_status(video_id):
+        if video_id == "bad":
+            return VideoStatus.model_validate({"status": "complete"})  # ValidationError: no id
+        if video_id == "missing":
+            raise KeyError("status")
+        return VideoStatus(id=video_id, status="complete")
+
+    client = MagicMock()
+    client.get_video_status.side_effect = fake_status
+
+    assert check_pending_videos(session, client, max_workers=2) == 1
+    statuses = dict(session.query(models.Video.id, models.Video.status).all())
+    assert statuses == {"bad": "in_progress", "missing": "in_progress", "ok": "complete"}
+
+
+def test_poll_schedule_is_dense_near_expected_completion_and_backs_off():
+    schedule = PollSchedule(expected_render=300, min_interval=15, max_interval=1800)
+
+    assert schedule.next_delay(10) == 140
+    assert schedule.next_delay(200) == 15
+    assert schedule.next_delay(460) == 15
+    assert schedule.next_delay(1450) == 1000
+    assert schedule.next_delay(10_000) == 1800
+
+
+def test_check_pending_videos_only_polls_due_videos_and_reschedules(session):
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    session.add(models.Video(
+        id="due", proverb="p", status="in_progress",
+        created_at=now - timedelta(seconds=60), next_check_at=now - timedelta(seconds=1),
+    ))
+    session.add(models.Video(
+        id="later", proverb="p", status="in_progress",
+        created_at=now - timedelta(seconds=60), next_check_at=now + timedelta(seconds=90),
+    ))
+    session.commit()
+
+    client = MagicMock()
+    client.get_video_status.side_effect = lambda vid: VideoStatus(id=vid, status="in_progress")
+    schedule = PollSchedule(expected_render=300, min_interval=15)
+
+    updated = check_pending_videos(session, client, schedule=schedule, now=now)
+
+    assert updated == 0
+    client.get_video_status.assert_called_once_with("due")
+    due = session.get(models.Video, "due")
+    assert due.next_check_at == now + timedelta(seconds=90)
+    assert seconds_until_next_check(session, now=now) == 90
+
+
+def test_new_videos_wait_for_the_first_interval_before_their_first_check(session):
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    session.add(models.Video(
+        id="new", proverb="p", status="in_progress", created_at=now - timedelta(seconds=30),
+    ))
+    session.commit()
+    client = MagicMock()
+    schedule = PollSchedule(expected_render=300, min_interval=15)
+
+    assert check_pending_videos(session, client, schedule=schedule, now=now) == 0
+    client.get_video_status.assert_not_called()
+    # First check at half the expected render time after submission.
+    assert seconds_until_next_check(session, now=now, schedule=schedule) == 120
+
+
+def test_acheck_pending_videos_updates_through_async_session(tmp_path):
+    class FakeAsyncClient(AsyncSynthesiaClient):
+        def __init__(self):
+            super().__init__(api_key="fake", concurrency=2)
+
+        async def get_video_status(self, video_id):
+            if video_id == "v0":
+                raise httpx.ConnectError("down")
+            return VideoStatus(id=video_id, status="complete")
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'videos.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            for i in range(5):
+                session.add(
+                    models.Video(
+                        id=f"v{i}",
+                        proverb="p",
+                        status="in_progress",
+                        created_at=now - timedelta(hours=1),
+                    )
+                )
+            await session.commit()
+            async with FakeAsyncClient() as client:
+                updated = await acheck_pending_videos(session, client, chunk_size=2, now=now)
+            wait = await aseconds_until_next_check(session, now=now)
+            rows = await session.execute(select(models.Video.id, models.Video.status))
+            statuses = dict(rows.all())
+        await engine.dispose()
+        return updated, wait, statuses
+
+    updated, wait, statuses = asyncio.run(run())
+
+    assert updated == 4
+    assert statuses == {"v0": "in_progress", **{f"v{i}": "complete" for i in range(1, 5)}}
+    # The failed fetch is retried after the minimum interval.
+    assert wait == 15
@@ -0,0 +1,105 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from db import Base, models
+from jobs.webhook_receiver import (
+    WEBHOOK_PATH,
+    make_server,
+    send_test_callback,
+    sign_payload,
+    verify_signature,
+)
+
+SECRET = "s3cret"
+
+
+@pytest.fixture
+def receiver():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSession = sessionmaker(bind=engine)
+    session = TestingSession()
+    session.add(models.Video(id="vid1", proverb="p", status="in_progress"))
+    session.commit()
+    session.close()
+
+    server = make_server("127.0.0.1", 0, SECRET, session_factory=TestingSession)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}{WEBHOOK_PATH}", TestingSession, server
+    server.shutdown()
+    server.server_close()
+
+
+def test_signed_callback_updates_status_and_records_latency(receiver):
+    url, TestingSession, server = receiver
+    payload = {
+        "type": "video.completed",
+        "data": {"id": "vid1", "status": "complete", "lastUpdatedAt": time.time() - 2},
+    }
+
+    resp = send_test_callback(url, SECRET, payload)
+
+    assert resp.status_code == 200
+    assert resp.json() == {"updated": True}
+    session = TestingSession()
+    assert session.get(models.Video, "vid1").status == "complete"
+    summary = server.metrics.summary()
+    assert summary["webhook"]["count"] == 1
+    assert summary["webhook"]["p50"] >= 2
+
+
+def test_callback_with_bad_signature_is_rejected(receiver):
+    url, TestingSession, _server = receiver
+    payload = {"data": {"id": "vid1", "status": "complete"}}
+
+    resp = send_test_callback(url, "wrong-secret", payload)
+
+    assert resp.status_code == 401
+    assert TestingSession().get(models.Video, "vid1").status == "in_progress"
+
+
+def test_database_error_answers_503_so_the_sender_retries(receiver):
+    url, TestingSession, _server = receiver
+    payload = {"data": {"id": "vid1", "status": "complete"}}
+
+    with patch.object(Session, "commit", side_effect=OperationalError("UPDATE", {}, None)):
+        resp = send_test_callback(url, SECRET, payload)
+
+    assert resp.status_code == 503
+    assert TestingSession().get(models.Video, "vid1").status == "in_progress"
+    # The redelivered callback goes through.
+    assert send_test_callback(url, SECRET, payload).json() == {"updated": True}
+
+
+def test_verify_signature_rejects_stale_timestamps():
+    body = b"{}"
+    old = str(int(time.time()) - 3600)
+    assert not verify_signature(SECRET, old, body, sign_payload(SECRET, old, body))
+    now = str(int(time.time()))
+    assert verify_signature(SECRET, now, body, sign_payload(SECRET, now, body))
+
+
+def test_detection_metrics_export_webhook_and_polling_side_by_side(receiver):
+    url, _TestingSession, server = receiver
+    server.metrics.record("webhook", 2.0)
+    server.metrics.record("polling", 40.0)
+
+    prometheus = requests.get(url.replace(WEBHOOK_PATH, "/metrics"), timeout=10).text
+    summary = requests.get(url.replace(WEBHOOK_PATH, "/metrics.json"), timeout=10).json()
+
+    assert 'aiinfluencer_status_detection_seconds_count{source="webhook"} 1' in prometheus
+    assert 'aiinfluencer_status_detection_seconds_count{source="polling"} 1' in prometheus
+    assert summary["polling"]["p50"] == 40.0
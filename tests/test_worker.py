@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db import Base, models
+from jobs.worker import (
+    JobWorker,
+    LeaseLost,
+    check_lease,
+    claim_jobs,
+    complete_job,
+    enqueue_jobs,
+    fail_job,
+    record_submission,
+    retry_delay,
+)
+
+
+def make_session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+class FlakyOrchestrator:
+    """Fails each proverb the given number of times, then succeeds."""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.run_ids = []
+        self.submitted = []
+        self.discarded = []
+
+    def generate_story(self, proverb, run_id=None):
+        self.run_ids.append(run_id)
+        if self.failures.get(proverb, 0) > 0:
+            self.failures[proverb] -= 1
+            raise RuntimeError(f"story failed for {proverb}")
+        return {"story": f"story for {proverb}"}
+
+    def generate_screenplay(self, story, proverb, run_id=None):
+        return {"screenplay": f"screenplay for {proverb}"}
+
+    def discard_run(self, run_id):
+        self.discarded.append(run_id)
+
+    def submit_video_from_template(self, **kwargs):
+        self.submitted.append(kwargs["description"])
+        return {"id": f"vid-{kwargs['description']}", "status": "in_progress"}
+
+
+def test_enqueue_skips_repeats_and_active_jobs(tmp_path):
+    Session = make_session_factory(tmp_path)
+    session = Session()
+
+    first = enqueue_jobs(session, ["A stitch in time", "a stitch in time!", "Haste makes waste"])
+    second = enqueue_jobs(session, ["haste makes waste", "Look before you leap"])
+
+    assert len(first) == 2
+    assert len(second) == 1
+    assert session.query(models.Job).count() == 3
+
+
+def test_claims_are_disjoint_and_expired_leases_are_reclaimed(tmp_path):
+    Session = make_session_factory(tmp_path)
+    now = datetime(2024, 1, 1)
+    enqueue_jobs(Session(), [f"p{i}" for i in range(5)], max_attempts=2, now=now)
+
+    a = claim_jobs(Session(), "a", 3, lease_seconds=60, now=now)
+    b = claim_jobs(Session(), "b", 3, lease_seconds=60, now=now)
+    assert len(a) == 3 and len(b) == 2
+    assert not {job.id for job in a} & {job.id for job in b}
+    assert claim_jobs(Session(), "c", 5, now=now + timedelta(seconds=30)) == []
+
+    # Worker "a" died: its jobs come back once the lease runs out.
+    later = now + timedelta(seconds=61)
+    assert complete_job(Session(), b[0], "b", "vid", now=later)
+    reclaimed = claim_jobs(Session(), "c", 5, lease_seconds=60, now=later)
+    assert sorted(job.id for job in reclaimed) == sorted(job.id for job in a + b[1:])
+    assert {job.attempts for job in reclaimed} == {2}
+
+    # The old holder can no longer record an outcome.
+    assert not complete_job(Session(), a[0], "a", "vid", now=later)
+
+    # Expired on the final attempt: failed rather than claimed a third time.
+    assert claim_jobs(Session(), "d", 5, now=later + timedelta(seconds=61)) == []
+    statuses = {job.status for job in Session().query(models.Job) if job.id != b[0].id}
+    assert statuses == {"failed"}
+
+
+def test_failed_attempts_back_off_then_give_up(tmp_path):
+    Session = make_session_factory(tmp_path)
+    now = datetime(2024, 1, 1)
+    enqueue_jobs(Session(), ["p"], max_attempts=2, now=now)
+
+    job = claim_jobs(Session(), "w", 1, now=now)[0]
+    assert fail_job(Session(), job, "w", "boom", delay=30, now=now) == "queued"
+    assert claim_jobs(Session(), "w", 1, now=now + timedelta(seconds=29)) == []
+
+    job = claim_jobs(Session(), "w", 1, now=now + timedelta(seconds=30))[0]
+    assert fail_job(Session(), job, "w", "boom again", delay=30, now=now) == "failed"
+    assert Session().get(models.Job, job.id).last_error == "boom again"
+
+
+def test_retry_delay_grows_and_is_capped():
+    assert 15 <= retry_delay(1, base=30) <= 30
+    assert 60 <= retry_delay(3, base=30) <= 120
+    assert 50 <= retry_delay(10, base=30, cap=100) <= 100
+
+
+def test_worker_runs_jobs_and_retries_failures(tmp_path):
+    Session = make_session_factory(tmp_path)
+    ids = enqueue_jobs(Session(), ["ok", "flaky", "broken"], max_attempts=3)
+    orchestrator = FlakyOrchestrator({"flaky": 1, "broken": 10})
+
+    worker = JobWorker(orchestrator, Session, worker_id="w1", concurrency=2, retry_base=0)
+    stats = worker.run(until_idle=True)
+
+    jobs = {job.proverb: job for job in Session().query(models.Job)}
+    assert (jobs["ok"].status, jobs["ok"].video_id) == ("done", "vid-ok")
+    assert (jobs["flaky"].status, jobs["flaky"].attempts) == ("done", 2)
+    assert (jobs["broken"].status, jobs["broken"].attempts) == ("failed", 3)
+    assert (stats.succeeded, stats.failed) == (2, 4)
+    # Every attempt of a job shares one checkpoint run ID.
+    assert orchestrator.run_ids.count(f"job-{ids[1]}") == 2
+
+
+def test_lost_lease_is_detected_before_submitting(tmp_path):
+    Session = make_session_factory(tmp_path)
+    now = datetime(2024, 1, 1)
+    enqueue_jobs(Session(), ["p"], now=now)
+    stale = claim_jobs(Session(), "a", 1, lease_seconds=60, now=now)[0]
+    later = now + timedelta(seconds=61)
+    current = claim_jobs(Session(), "b", 1, lease_seconds=60, now=later)[0]
+
+    with pytest.raises(LeaseLost):
+        check_lease(Session(), stale, "a", now=later)
+    assert check_lease(Session(), current, "b", now=later) is None
+
+    # The old holder's submission is still recorded, so "b" won't render again.
+    record_submission(Session(), stale, "vid-from-a")
+    assert check_lease(Session(), current, "b", now=later) == "vid-from-a"
+
+
+def test_retry_after_a_failed_db_write_does_not_submit_again(tmp_path, monkeypatch):
+    import jobs.worker
+
+    Session = make_session_factory(tmp_path)
+    enqueue_jobs(Session(), ["p"], max_attempts=2)
+    orchestrator = FlakyOrchestrator()
+    real_store = jobs.worker.store_videos_bulk
+    calls = []
+
+    def flaky_store(session, records):
+        calls.append(records)
+        if len(calls) == 1:
+            raise RuntimeError("Failed to store video metadata")
+        return real_store(session, records)
+
+    monkeypatch.setattr(jobs.worker, "store_videos_bulk", flaky_store)
+    worker = JobWorker(orchestrator, Session, worker_id="w", retry_base=0)
+    stats = worker.run(until_idle=True)
+
+    job = Session().query(models.Job).one()
+    assert (job.status, job.attempts, job.video_id) == ("done", 2, "vid-p")
+    assert orchestrator.submitted == ["p"]
+    assert Session().get(models.Video, "vid-p").screenplay == "screenplay for p"
+    assert (stats.succeeded, stats.failed) == (1, 1)
@@ -1,19 +1,39 @@
-from .synthesia_models import (
-    CreateVideoRequest,
-    CreateVideoInput,
-    TemplateData,
-    CreateVideoFromTemplateRequest,
-    VideoStatus,
-)
-from .synthesia_client import SynthesiaClient
-import requests
+"""Synthesia API client, request models and shared helpers.
 
-__all__ = [
-    'SynthesiaClient',
-    'CreateVideoRequest',
-    'CreateVideoInput',
-    'TemplateData',
-    'CreateVideoFromTemplateRequest',
-    'VideoStatus',
-    'requests',
-]
+Names are imported from their submodules on first access so that importing
+``utils`` (or any one helper) doesn't pull in ``requests``, ``httpx`` and
+``pydantic`` up front.
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    'CreateVideoRequest': '.synthesia_models',
+    'CreateVideoInput': '.synthesia_models',
+    'TemplateData': '.synthesia_models',
+    'CreateVideoFromTemplateRequest': '.synthesia_models',
+    'VideoStatus': '.synthesia_models',
+    'SynthesiaClient': '.synthesia_client',
+    'AsyncSynthesiaClient': '.async_synthesia_client',
+    'BulkItemResult': '.async_synthesia_client',
+    'LLMCache': '.llm_cache',
+    'CachedLLM': '.llm_cache',
+    'StagedPipeline': '.pipeline',
+    'PipelineStage': '.pipeline',
+    'PipelineResult': '.pipeline',
+    'SynthesiaSimulator': '.synthesia_simulator',
+    'SimulatorConfig': '.synthesia_simulator',
+    'MetricsRegistry': '.metrics',
+    'serve_metrics': '.metrics',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
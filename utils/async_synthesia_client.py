@@ -0,0 +1,192 @@
+import os
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Sequence
+
+import httpx
+
+from .synthesia_client import (
+    DEFAULT_BASE_URL,
+    backoff_delay,
+    should_retry_status,
+)
+from .synthesia_models import (
+    CreateVideoRequest,
+    CreateVideoFromTemplateRequest,
+    VideoStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkItemResult:
+    """Outcome of one item in a bulk call: either ``result`` or ``error``."""
+
+    result: Any = None
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class AsyncSynthesiaClient:
+    """
+    Asynchronous counterpart of :class:`SynthesiaClient`.
+
+    All calls share one ``httpx.AsyncClient`` connection pool. ``submit_many``
+    and ``get_status_many`` fan out over that pool with at most
+    ``concurrency`` requests in flight and return results in input order.
+    """
+
+    def __init__(
+        self,
+        api_key: str = None,
+        base_url: str | None = None,
+        pool_size: int = 20,
+        concurrency: int = 10,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.api_key = api_key or os.environ.get("SYNTHESIA_API_KEY")
+        if not self.api_key:
+            raise RuntimeError("SYNTHESIA_API_KEY must be set in env or passed explicitly")
+
+        self.base_url = (
+            base_url or os.environ.get("SYNTHESIA_BASE_URL") or DEFAULT_BASE_URL
+        ).rstrip("/")
+        self.headers = {
+            "Authorization": f"{self.api_key}",
+            "accept": "application/json",
+            "content-type": "application/json",
+        }
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+            transport=transport,
+        )
+
+        self.requests_sent = 0
+        self.retries = 0
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncSynthesiaClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request with the same retry policy as the sync client."""
+        retry_errors = (
+            (httpx.TransportError,) if method == "GET" else (httpx.ConnectError, httpx.ConnectTimeout)
+        )
+
+        attempt = 0
+        while True:
+            self.requests_sent += 1
+            try:
+                resp = await self.client.request(method, url, **kwargs)
+            except retry_errors as exc:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, None, self.backoff_factor, self.max_backoff)
+                logger.warning("%s %s failed (%s); retrying in %.2fs", method, url, exc, delay)
+            else:
+                retry_after = resp.headers.get("Retry-After")
+                if attempt >= self.max_retries or not should_retry_status(
+                    method, resp.status_code, retry_after
+                ):
+                    resp.raise_for_status()
+                    return resp
+                delay = backoff_delay(
+                    attempt, retry_after, self.backoff_factor, self.max_backoff
+                )
+                logger.warning(
+                    "%s %s returned %s; retrying in %.2fs", method, url, resp.status_code, delay
+                )
+            self.retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {"requests": self.requests_sent, "retries": self.retries}
+
+    async def create_video(self, request: CreateVideoRequest) -> Any:
+        """Create a Synthesia video from a fully-validated CreateVideoRequest."""
+        url = f"{self.base_url}/videos"
+        resp = await self._request("POST", url, json=request.model_dump(by_alias=True))
+        return resp.json()
+
+    async def create_video_from_template(
+        self, request: CreateVideoFromTemplateRequest
+    ) -> Any:
+        """Create a Synthesia video based on an existing template."""
+        url = f"{self.base_url}/videos/fromTemplate"
+        resp = await self._request("POST", url, json=request.model_dump(by_alias=True))
+        return resp.json()
+
+    async def get_video_status(self, video_id: str) -> VideoStatus:
+        """Retrieve status information for a Synthesia video."""
+        url = f"{self.base_url}/videos/{video_id}"
+        resp = await self._request("GET", url)
+        return VideoStatus.model_validate(resp.json())
+
+    async def _run_bounded(
+        self,
+        calls: Sequence[Callable[[], Awaitable[Any]]],
+        concurrency: int | None,
+    ) -> list[BulkItemResult]:
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def run_one(call: Callable[[], Awaitable[Any]]) -> BulkItemResult:
+            async with semaphore:
+                try:
+                    return BulkItemResult(result=await call())
+                except Exception as exc:  # captured per item, never fails the gather
+                    return BulkItemResult(error=exc)
+
+        return list(await asyncio.gather(*(run_one(call) for call in calls)))
+
+    async def submit_many(
+        self,
+        requests: Sequence[CreateVideoRequest | CreateVideoFromTemplateRequest],
+        concurrency: int | None = None,
+    ) -> list[BulkItemResult]:
+        """Submit many video requests concurrently.
+
+        Each request is routed to ``/videos`` or ``/videos/fromTemplate``
+        according to its type. Failures are captured per item.
+        """
+
+        def call_for(request):
+            if isinstance(request, CreateVideoFromTemplateRequest):
+                return lambda: self.create_video_from_template(request)
+            return lambda: self.create_video(request)
+
+        return await self._run_bounded([call_for(r) for r in requests], concurrency)
+
+    async def get_status_many(
+        self, video_ids: Sequence[str], concurrency: int | None = None
+    ) -> list[BulkItemResult]:
+        """Fetch the status of many videos concurrently."""
+        return await self._run_bounded(
+            [lambda video_id=video_id: self.get_video_status(video_id) for video_id in video_ids],
+            concurrency,
+        )
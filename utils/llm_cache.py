@@ -0,0 +1,198 @@
+"""On-disk, content-addressed cache for chat model responses."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """Persistent cache of LLM completions keyed by a hash of the request.
+
+    Entries live as small JSON files under ``directory``, sharded by the first
+    two hex digits of the key. Entries older than ``max_age_seconds`` are
+    treated as misses and removed; once the cache grows past ``max_bytes`` the
+    least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: str = ".llm_cache",
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age_seconds: float = 30 * 24 * 3600,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._entries())
+
+    @staticmethod
+    def make_key(
+        messages: Sequence[Any],
+        model_name: str | None,
+        temperature: float | None,
+        template_version: str = "",
+        seed: int | None = None,
+    ) -> str:
+        """Hash the rendered prompt together with the generation settings."""
+        payload = {
+            "messages": [
+                [getattr(m, "type", type(m).__name__), getattr(m, "content", str(m))]
+                for m in messages
+            ],
+            "model": model_name,
+            "temperature": temperature,
+            "template_version": template_version,
+        }
+        if seed is not None:
+            payload["seed"] = seed
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _entries(self) -> list[str]:
+        paths = []
+        for root, _dirs, files in os.walk(self.directory):
+            paths.extend(os.path.join(root, f) for f in files if f.endswith(".json"))
+        return paths
+
+    def _remove(self, path: str) -> None:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        self._size -= size
+        self.evictions += 1
+
+    def get(self, key: str) -> str | None:
+        """Return the cached completion for ``key`` or ``None`` on a miss."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                age = time.time() - os.path.getmtime(path)
+                if age > self.max_age_seconds:
+                    self._remove(path)
+                    raise FileNotFoundError(path)
+                with open(path, encoding="utf-8") as fh:
+                    content = json.load(fh)["content"]
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                self.misses += 1
+                return None
+            # Refresh the access time so size-based eviction is LRU.
+            os.utime(path)
+            self.hits += 1
+            return content
+
+    def set(self, key: str, content: str) -> None:
+        """Store ``content`` under ``key`` and evict if over the size budget."""
+        path = self._path(key)
+        data = json.dumps({"content": content, "stored_at": time.time()}, ensure_ascii=False)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                fh.write(data)
+            os.replace(tmp_path, path)
+            self._size += os.path.getsize(path) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        now = time.time()
+        entries = []
+        for path in self._entries():
+            mtime = os.path.getmtime(path)
+            if now - mtime > self.max_age_seconds:
+                self._remove(path)
+            else:
+                entries.append((mtime, path))
+        entries.sort()
+        for _mtime, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            self._remove(path)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size_bytes": self._size,
+        }
+
+
+class CachedLLM:
+    """Wrap a chat model so ``invoke`` is served from an :class:`LLMCache`.
+
+    Calls are only cached when the model is deterministic (temperature 0)
+    unless ``cache_sampled`` is set. ``temperature`` and ``seed`` passed to
+    :meth:`invoke` override the model's and are part of the key. Any other
+    attribute access is delegated to the wrapped model.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        cache: LLMCache,
+        template_version: str = "",
+        cache_sampled: bool = False,
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.template_version = template_version
+        self.cache_sampled = cache_sampled
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    @property
+    def model_name(self) -> str | None:
+        return getattr(self.llm, "model_name", None)
+
+    @property
+    def temperature(self) -> float | None:
+        return getattr(self.llm, "temperature", None)
+
+    def _cacheable(self, temperature: float | None) -> bool:
+        return self.cache_sampled or temperature == 0
+
+    def invoke(self, messages: Sequence[Any], *args, **kwargs) -> Any:
+        temperature = kwargs.get("temperature", self.temperature)
+        if not self._cacheable(temperature):
+            return self.llm.invoke(messages, *args, **kwargs)
+
+        from langchain_core.messages import AIMessage
+
+        key = LLMCache.make_key(
+            messages,
+            self.model_name,
+            temperature,
+            self.template_version,
+            seed=kwargs.get("seed"),
+        )
+        content = self.cache.get(key)
+        if content is not None:
+            logger.debug("LLM cache hit %s", key)
+            return AIMessage(content=content, response_metadata={"cache_hit": True})
+
+        response = self.llm.invoke(messages, *args, **kwargs)
+        self.cache.set(key, response.content)
+        return response
@@ -0,0 +1,404 @@
+"""Latency, token and cost metrics for LLM and Synthesia calls.
+
+A :class:`MetricsRegistry` aggregates observations into histograms keyed by
+agent node and model (LLM calls) or by endpoint (HTTP calls). It can be
+exported as a JSON snapshot or in the Prometheus text format, and served over
+HTTP with :func:`serve_metrics`.
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import json
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterable, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# USD per million tokens: (input, cached input, output). Model names that
+# are not listed fall back to the longest listed prefix, so dated snapshots
+# such as "gpt-4o-2024-08-06" price like "gpt-4o".
+MODEL_PRICES: dict[str, tuple[float, float, float]] = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+
+# Batch API requests are billed at this fraction of the synchronous price.
+BATCH_PRICE_FACTOR = 0.5
+
+
+def model_prices(model: str | None) -> tuple[float, float, float] | None:
+    if not model:
+        return None
+    if model in MODEL_PRICES:
+        return MODEL_PRICES[model]
+    matches = [name for name in MODEL_PRICES if model.startswith(name)]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(
+    model: str | None,
+    input_tokens: int,
+    output_tokens: int,
+    cached_tokens: int = 0,
+    batch: bool = False,
+) -> float:
+    """Estimated USD cost of one call; 0.0 for models without a price."""
+    prices = model_prices(model)
+    if prices is None:
+        return 0.0
+    input_price, cached_price, output_price = prices
+    uncached = max(0, input_tokens - cached_tokens)
+    cost = (
+        uncached * input_price + cached_tokens * cached_price + output_tokens * output_price
+    ) / 1_000_000
+    return cost * BATCH_PRICE_FACTOR if batch else cost
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model: str | None) -> Any:
+    """tiktoken encoding for ``model``, or None when it cannot be loaded."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model or "")
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:  # encoding files are fetched on first use and may be unreachable
+        logger.debug("tiktoken encoding unavailable; estimating token counts")
+        return None
+
+
+def count_tokens(text: str, model: str | None = None) -> int:
+    """Count tokens with tiktoken, or estimate ~4 characters per token without it."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 4) if text else 0
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: Iterable[Any], model: str | None = None) -> int:
+    """Approximate prompt tokens for chat messages, including per-message overhead."""
+    total = 3
+    for message in messages:
+        content = getattr(message, "content", message)
+        total += 4 + count_tokens(content if isinstance(content, str) else str(content), model)
+    return total
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0.0 for an empty sequence)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+def _labels(**labels: str) -> str:
+    body = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in labels.items()
+    )
+    return "{" + body + "}"
+
+
+def prometheus_histogram(
+    name: str, help_text: str, rows: Iterable[tuple[dict, Histogram]]
+) -> list[str]:
+    """Prometheus text lines for one histogram family, one series per row."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, hist in rows:
+        cumulative = 0
+        for bound, count in zip(hist.buckets, hist.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**labels, le=str(bound))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {hist.count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {hist.sum}")
+        lines.append(f"{name}_count{_labels(**labels)} {hist.count}")
+    return lines
+
+
+class MetricsRegistry:
+    """Thread-safe store of LLM and HTTP call metrics."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.llm: dict[tuple[str, str, str], dict] = {}
+        self.http: dict[str, dict] = {}
+        self.verdicts: dict[tuple[str, str], dict[str, int]] = {}
+
+    def observe_llm(
+        self,
+        agent: str,
+        node: str,
+        model: str,
+        seconds: float,
+        input_tokens: int,
+        output_tokens: int,
+        cached_tokens: int = 0,
+        estimated: bool = False,
+        batch: bool = False,
+    ) -> None:
+        """Record one LLM call.
+
+        ``estimated`` marks tiktoken-counted usage; ``batch`` calls are priced
+        at :data:`BATCH_PRICE_FACTOR` of the listed price.
+        """
+        cost = estimate_cost(model, input_tokens, output_tokens, cached_tokens, batch=batch)
+        with self._lock:
+            series = self.llm.setdefault(
+                (agent, node, model),
+                {
+                    "latency": Histogram(self.buckets),
+                    "input_tokens": 0,
+                    "cached_tokens": 0,
+                    "output_tokens": 0,
+                    "cost_usd": 0.0,
+                    "estimated_calls": 0,
+                },
+            )
+            series["latency"].observe(seconds)
+            series["input_tokens"] += input_tokens
+            series["cached_tokens"] += cached_tokens
+            series["output_tokens"] += output_tokens
+            series["cost_usd"] += cost
+            series["estimated_calls"] += int(estimated)
+
+    def observe_verdict(self, agent: str, model: str, accepted: bool) -> None:
+        """Record one LLM critique by ``model`` and whether it accepted the draft."""
+        with self._lock:
+            counts = self.verdicts.setdefault((agent, model), {"accept": 0, "revise": 0})
+            counts["accept" if accepted else "revise"] += 1
+
+    def observe_http(self, endpoint: str, seconds: float, status: int | str) -> None:
+        """Record one API call; ``status`` is the final status code or ``"error"``."""
+        with self._lock:
+            series = self.http.setdefault(
+                endpoint, {"latency": Histogram(self.buckets), "statuses": {}}
+            )
+            series["latency"].observe(seconds)
+            key = str(status)
+            series["statuses"][key] = series["statuses"].get(key, 0) + 1
+
+    def snapshot(self) -> dict:
+        """JSON-serialisable view of every series."""
+        with self._lock:
+            llm = [
+                {
+                    "agent": agent,
+                    "node": node,
+                    "model": model,
+                    "calls": series["latency"].count,
+                    "latency": series["latency"].snapshot(),
+                    "input_tokens": series["input_tokens"],
+                    "cached_tokens": series["cached_tokens"],
+                    "output_tokens": series["output_tokens"],
+                    "cost_usd": series["cost_usd"],
+                    "estimated_calls": series["estimated_calls"],
+                }
+                for (agent, node, model), series in self.llm.items()
+            ]
+            http = [
+                {
+                    "endpoint": endpoint,
+                    "calls": series["latency"].count,
+                    "latency": series["latency"].snapshot(),
+                    "statuses": dict(series["statuses"]),
+                }
+                for endpoint, series in self.http.items()
+            ]
+            critiques = [
+                {
+                    "agent": agent,
+                    "model": model,
+                    "critiques": counts["accept"] + counts["revise"],
+                    "accepted": counts["accept"],
+                    "accept_rate": counts["accept"] / (counts["accept"] + counts["revise"]),
+                }
+                for (agent, model), counts in self.verdicts.items()
+            ]
+        return {
+            "llm": llm,
+            "http": http,
+            "critiques": critiques,
+            "total_cost_usd": sum(row["cost_usd"] for row in llm),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+
+        def histogram(name: str, help_text: str, rows: list[tuple[dict, Histogram]]) -> None:
+            lines.extend(prometheus_histogram(name, help_text, rows))
+
+        with self._lock:
+            llm = [
+                ({"agent": a, "node": n, "model": m}, series)
+                for (a, n, m), series in self.llm.items()
+            ]
+            http = [({"endpoint": e}, series) for e, series in self.http.items()]
+
+            histogram(
+                "aiinfluencer_llm_latency_seconds",
+                "LLM call latency per agent node and model.",
+                [(labels, series["latency"]) for labels, series in llm],
+            )
+            lines.append("# HELP aiinfluencer_llm_tokens_total LLM tokens by kind.")
+            lines.append("# TYPE aiinfluencer_llm_tokens_total counter")
+            for labels, series in llm:
+                for kind in ("input", "cached", "output"):
+                    lines.append(
+                        f"aiinfluencer_llm_tokens_total{_labels(**labels, kind=kind)} "
+                        f"{series[kind + '_tokens']}"
+                    )
+            lines.append("# HELP aiinfluencer_llm_cost_usd_total Estimated LLM spend.")
+            lines.append("# TYPE aiinfluencer_llm_cost_usd_total counter")
+            for labels, series in llm:
+                lines.append(
+                    f"aiinfluencer_llm_cost_usd_total{_labels(**labels)} {series['cost_usd']}"
+                )
+            lines.append(
+                "# HELP aiinfluencer_llm_critique_verdicts_total LLM critique verdicts per model."
+            )
+            lines.append("# TYPE aiinfluencer_llm_critique_verdicts_total counter")
+            for (agent, model), counts in self.verdicts.items():
+                for verdict, count in counts.items():
+                    labels = _labels(agent=agent, model=model, verdict=verdict)
+                    lines.append(f"aiinfluencer_llm_critique_verdicts_total{labels} {count}")
+            histogram(
+                "aiinfluencer_http_latency_seconds",
+                "Synthesia API call latency per endpoint, including retries.",
+                [(labels, series["latency"]) for labels, series in http],
+            )
+            lines.append("# HELP aiinfluencer_http_requests_total Synthesia API calls by final status.")
+            lines.append("# TYPE aiinfluencer_http_requests_total counter")
+            for labels, series in http:
+                for status, count in series["statuses"].items():
+                    lines.append(
+                        f"aiinfluencer_http_requests_total{_labels(**labels, status=status)} {count}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self) -> str:
+        """Human-readable table of the LLM and HTTP series."""
+        data = self.snapshot()
+        lines = [
+            f"{'llm node':<32}{'model':<16}{'calls':>6}{'p50 s':>8}{'p95 s':>8}"
+            f"{'in tok':>9}{'out tok':>9}{'cost $':>9}"
+        ]
+        for row in data["llm"]:
+            lines.append(
+                f"{row['agent'] + '/' + row['node']:<32}{row['model']:<16}{row['calls']:>6}"
+                f"{row['latency']['p50']:>8.2f}{row['latency']['p95']:>8.2f}"
+                f"{row['input_tokens']:>9}{row['output_tokens']:>9}{row['cost_usd']:>9.4f}"
+            )
+        if data["critiques"]:
+            lines.append(f"{'critique':<32}{'model':<16}{'calls':>6}{'accept %':>10}")
+            for row in data["critiques"]:
+                lines.append(
+                    f"{row['agent'] + '/critique_node':<32}{row['model']:<16}"
+                    f"{row['critiques']:>6}{row['accept_rate'] * 100:>10.1f}"
+                )
+        lines.append(f"{'endpoint':<32}{'':<16}{'calls':>6}{'p50 s':>8}{'p95 s':>8}  statuses")
+        for row in data["http"]:
+            statuses = ", ".join(f"{k}: {v}" for k, v in sorted(row["statuses"].items()))
+            lines.append(
+                f"{row['endpoint']:<32}{'':<16}{row['calls']:>6}"
+                f"{row['latency']['p50']:>8.2f}{row['latency']['p95']:>8.2f}  {statuses}"
+            )
+        lines.append(f"Estimated LLM cost: ${data['total_cost_usd']:.4f}")
+        return "\n".join(lines)
+
+
+def serve_metrics(registry, host: str = "0.0.0.0", port: int = 9100) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` from a daemon thread.
+
+    ``registry`` is a :class:`MetricsRegistry` or anything else with
+    ``to_prometheus()`` and ``to_json()``.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body = registry.to_prometheus().encode("utf-8")
+                content_type = "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body = registry.to_json().encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,201 @@
+"""Thread-based staged pipeline with bounded queues between stages."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Sequence
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class PipelineStage:
+    """One step of a :class:`StagedPipeline`.
+
+    ``fn`` receives the previous stage's output and returns this stage's
+    output. ``workers`` threads run it, reading from a queue that holds at
+    most ``queue_size`` pending items.
+    """
+
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    queue_size: int = 8
+
+
+@dataclass
+class StageMetrics:
+    """Counters and timings collected for one stage during a run."""
+
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    queue_depth_total: int = 0
+    queue_depth_samples: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+    def summary(self, wall_seconds: float) -> dict:
+        capacity = self.workers * wall_seconds
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "utilisation": self.busy_seconds / capacity if capacity else 0.0,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_queue_depth": (
+                self.queue_depth_total / self.queue_depth_samples
+                if self.queue_depth_samples
+                else 0.0
+            ),
+        }
+
+
+@dataclass
+class PipelineResult:
+    """Final outcome for one input item."""
+
+    item: Any
+    result: Any = None
+    error: BaseException | None = None
+    failed_stage: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class StagedPipeline:
+    """Run items through a sequence of stages, each with its own worker pool.
+
+    Stages are connected by bounded queues, so a slow stage applies
+    backpressure upstream instead of letting work pile up in memory. An item
+    that raises in any stage is reported with its error and skips the
+    remaining stages; the rest of the run carries on.
+    """
+
+    def __init__(self, stages: Sequence[PipelineStage], sample_interval: float = 0.1):
+        if not stages:
+            raise ValueError("a pipeline needs at least one stage")
+        self.stages = list(stages)
+        self.sample_interval = sample_interval
+        self.metrics: dict[str, StageMetrics] = {}
+        self.wall_seconds = 0.0
+
+    def run(
+        self,
+        items: Iterable[Any],
+        on_result: Callable[[PipelineResult], None] | None = None,
+    ) -> list[PipelineResult]:
+        """Process ``items`` and return their results in input order.
+
+        ``on_result`` is called from a worker thread as each item finishes
+        (successfully or not), e.g. to journal progress.
+        """
+        items = list(items)
+        results: list[PipelineResult | None] = [None] * len(items)
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        self.metrics = {stage.name: StageMetrics(stage.workers) for stage in self.stages}
+        lock = threading.Lock()
+        remaining = [stage.workers for stage in self.stages]
+        done = threading.Event()
+
+        def finish(index: int, result: PipelineResult) -> None:
+            results[index] = result
+            if on_result is not None:
+                try:
+                    on_result(result)
+                except Exception:  # a bad callback must not kill the worker
+                    logger.exception("Pipeline result callback failed")
+
+        def worker(position: int) -> None:
+            stage = self.stages[position]
+            metrics = self.metrics[stage.name]
+            inbox = queues[position]
+            outbox = queues[position + 1] if position + 1 < len(queues) else None
+            try:
+                while True:
+                    entry = inbox.get()
+                    if entry is _STOP:
+                        break
+                    index, value = entry
+                    started = time.perf_counter()
+                    try:
+                        output = stage.fn(value)
+                    except Exception as exc:
+                        elapsed = time.perf_counter() - started
+                        with lock:
+                            metrics.failed += 1
+                            metrics.busy_seconds += elapsed
+                        logger.error("Stage %s failed for item %d: %s", stage.name, index, exc)
+                        finish(
+                            index, PipelineResult(items[index], error=exc, failed_stage=stage.name)
+                        )
+                        continue
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        metrics.processed += 1
+                        metrics.busy_seconds += elapsed
+                        metrics.latencies.append(elapsed)
+                    if outbox is None:
+                        finish(index, PipelineResult(items[index], result=output))
+                    else:
+                        outbox.put((index, output))
+            finally:
+                # Also on a BaseException escaping stage.fn: the next stage must
+                # still see _STOP from its last upstream worker, or run() hangs.
+                with lock:
+                    remaining[position] -= 1
+                    last_out = remaining[position] == 0
+                if last_out and outbox is not None:
+                    for _ in range(self.stages[position + 1].workers):
+                        outbox.put(_STOP)
+
+        def sample_depths() -> None:
+            while not done.wait(self.sample_interval):
+                with lock:
+                    for stage, q in zip(self.stages, queues):
+                        depth = q.qsize()
+                        metrics = self.metrics[stage.name]
+                        metrics.max_queue_depth = max(metrics.max_queue_depth, depth)
+                        metrics.queue_depth_total += depth
+                        metrics.queue_depth_samples += 1
+
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(
+                target=worker, args=(position,), name=f"{stage.name}-{n}", daemon=True
+            )
+            for position, stage in enumerate(self.stages)
+            for n in range(stage.workers)
+        ]
+        sampler = threading.Thread(target=sample_depths, name="pipeline-sampler", daemon=True)
+        for thread in threads:
+            thread.start()
+        sampler.start()
+
+        # Blocks whenever the first stage's queue is full.
+        for index, item in enumerate(items):
+            queues[0].put((index, item))
+        for _ in range(self.stages[0].workers):
+            queues[0].put(_STOP)
+
+        for thread in threads:
+            thread.join()
+        done.set()
+        sampler.join()
+        self.wall_seconds = time.perf_counter() - started
+        return results
+
+    def summary(self) -> dict:
+        """Per-stage throughput, utilisation and queue-depth figures."""
+        return {
+            name: metrics.summary(self.wall_seconds) for name, metrics in self.metrics.items()
+        }
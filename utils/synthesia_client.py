@@ -1,44 +1,243 @@
 import os
+import random
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Any
+
 import requests
-from typing import Any
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
 from .synthesia_models import (
     CreateVideoRequest,
     CreateVideoFromTemplateRequest,
     VideoStatus,
 )
 
+if TYPE_CHECKING:
+    from .metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying. POSTs are not idempotent and we send no
+# idempotency key, so they are only retried when the server clearly did not
+# act on the request: a rate limit, or a 503 that carries ``Retry-After``.
+# A 502/504 from a gateway says nothing about whether the render was created.
+RETRY_STATUSES_GET = frozenset({429, 500, 502, 503, 504})
+RETRY_STATUSES_POST = frozenset({429, 503})
+
+# Overridable with SYNTHESIA_BASE_URL, e.g. to target utils.synthesia_simulator.
+DEFAULT_BASE_URL = "https://api.synthesia.io/v2"
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a ``Retry-After`` header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def should_retry_status(method: str, status: int, retry_after: str | None) -> bool:
+    """Whether a response with ``status`` may be retried for ``method``."""
+    if method == "GET":
+        return status in RETRY_STATUSES_GET
+    if status == 503:
+        return retry_after is not None
+    return status in RETRY_STATUSES_POST
+
+
+def is_connect_error(exc: BaseException) -> bool:
+    """Whether ``exc`` failed while connecting, before any request bytes were sent.
+
+    Covers connect timeouts and refused or unresolvable connections
+    (``NewConnectionError`` under requests' ``ConnectionError``), but not a
+    connection dropped mid-request, where the server may have acted on it.
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.ConnectionError) or not exc.args:
+        return False
+    reason = getattr(exc.args[0], "reason", exc.args[0])
+    return isinstance(reason, NewConnectionError)
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: str | None = None,
+    backoff_factor: float = 0.5,
+    max_backoff: float = 30.0,
+) -> float:
+    """Seconds to wait before retry number ``attempt`` (0-based).
+
+    A server-supplied ``Retry-After`` wins; otherwise use exponential backoff
+    with full jitter so concurrent callers don't retry in lockstep.
+    """
+    server_delay = parse_retry_after(retry_after)
+    if server_delay is not None:
+        return server_delay
+    return random.uniform(0, min(max_backoff, backoff_factor * (2 ** attempt)))
+
+
 class SynthesiaClient:
     """
     Minimal Synthesia API client.
     Relies on Pydantic's CreateVideoRequest to produce a valid payload.
+
+    Requests go through a shared keep-alive connection pool and are retried
+    with jittered exponential backoff on rate limits and transient failures.
     """
 
-    def __init__(self, api_key: str = None, base_url: str = "https://api.synthesia.io/v2"):
+    def __init__(
+        self,
+        api_key: str = None,
+        base_url: str | None = None,
+        pool_size: int = 10,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        metrics: "MetricsRegistry | None" = None,
+    ):
         # Allow override or auto-pickup from env
         self.api_key = api_key or os.environ.get("SYNTHESIA_API_KEY")
         if not self.api_key:
             raise RuntimeError("SYNTHESIA_API_KEY must be set in env or passed explicitly")
-        
-        self.base_url = base_url.rstrip("/")
+
+        self.base_url = (
+            base_url or os.environ.get("SYNTHESIA_BASE_URL") or DEFAULT_BASE_URL
+        ).rstrip("/")
         self.headers = {
             "Authorization": f"{self.api_key}",
             "accept": "application/json",
             "content-type": "application/json",
         }
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0
+        )
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        # The client is shared across poller threads; guard the counters.
+        self._counter_lock = threading.Lock()
+        self.requests_sent = 0
+        self.retries = 0
+        self.metrics = metrics
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "SynthesiaClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _request(
+        self, method: str, url: str, endpoint: str | None = None, **kwargs
+    ) -> requests.Response:
+        """Send a request, retrying transient failures, and raise on errors.
+
+        When the client has a metrics registry, the call's total latency
+        (retries included) and final status are recorded under ``endpoint``.
+        """
+        if self.metrics is None:
+            return self._send(method, url, **kwargs)
+        started = time.perf_counter()
+        status: int | str = "error"
+        try:
+            resp = self._send(method, url, **kwargs)
+            status = resp.status_code
+            return resp
+        except requests.HTTPError as exc:
+            if exc.response is not None:
+                status = exc.response.status_code
+            raise
+        finally:
+            self.metrics.observe_http(
+                endpoint or f"{method} {url}", time.perf_counter() - started, status
+            )
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            with self._counter_lock:
+                self.requests_sent += 1
+            try:
+                resp = self.session.request(
+                    method, url, headers=self.headers, timeout=self.timeout, **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                # A connect failure means nothing reached the server, so it is
+                # always safe to retry; other network errors only for GETs.
+                if attempt >= self.max_retries or not (
+                    method == "GET" or is_connect_error(exc)
+                ):
+                    raise
+                delay = backoff_delay(attempt, None, self.backoff_factor, self.max_backoff)
+                logger.warning("%s %s failed (%s); retrying in %.2fs", method, url, exc, delay)
+            else:
+                retry_after = resp.headers.get("Retry-After")
+                if attempt >= self.max_retries or not should_retry_status(
+                    method, resp.status_code, retry_after
+                ):
+                    resp.raise_for_status()
+                    return resp
+                delay = backoff_delay(
+                    attempt, retry_after, self.backoff_factor, self.max_backoff
+                )
+                logger.warning(
+                    "%s %s returned %s; retrying in %.2fs", method, url, resp.status_code, delay
+                )
+            with self._counter_lock:
+                self.retries += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        """Request, retry and connection reuse counters for this client."""
+        pools = self._adapter.poolmanager.pools
+        opened = sum(pools[key].num_connections for key in pools.keys())
+        with self._counter_lock:
+            sent, retries = self.requests_sent, self.retries
+        return {
+            "requests": sent,
+            "retries": retries,
+            "connections_opened": opened,
+            "connections_reused": max(0, sent - opened),
+        }
 
     def create_video(self, request: CreateVideoRequest) -> Any:
         """
         Create a Synthesia video from a fully-validated CreateVideoRequest.
-        
+
         :param request: Pydantic model capturing test, title, aspectRatio, description & input scenes.
         :return: Parsed JSON response from Synthesia.
         :raises: requests.HTTPError on bad status codes.
         """
         url = f"{self.base_url}/videos"
         payload = request.model_dump(by_alias=True)
-        
-        resp = requests.post(url, headers=self.headers, json=payload)
-        resp.raise_for_status()
+
+        resp = self._request("POST", url, endpoint="POST /videos", json=payload)
         return resp.json()
 
     def create_video_from_template(
@@ -49,15 +248,13 @@ class SynthesiaClient:
         url = f"{self.base_url}/videos/fromTemplate"
         payload = request.model_dump(by_alias=True)
 
-        resp = requests.post(url, headers=self.headers, json=payload)
-        resp.raise_for_status()
+        resp = self._request("POST", url, endpoint="POST /videos/fromTemplate", json=payload)
         return resp.json()
-    
+
     def get_video_status(self, video_id: str) -> VideoStatus:
         """Retrieve status information for a Synthesia video."""
 
         url = f"{self.base_url}/videos/{video_id}"
-        
-        resp = requests.get(url, headers=self.headers)
-        resp.raise_for_status()
-        return VideoStatus.model_validate(resp.json())
\ No newline at end of file
+
+        resp = self._request("GET", url, endpoint="GET /videos/{id}")
+        return VideoStatus.model_validate(resp.json())
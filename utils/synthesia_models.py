@@ -63,5 +63,6 @@ class VideoStatus(BaseModel):
 
     id: str
     status: str
+    lastUpdatedAt: float | None = None
 
     model_config = ConfigDict(extra="ignore", populate_by_name=True)
\ No newline at end of file
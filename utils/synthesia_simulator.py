@@ -0,0 +1,349 @@
+"""Local stand-in for the Synthesia API, for load and failure testing.
+
+Serves ``POST /videos``, ``POST /videos/fromTemplate`` and
+``GET /videos/{id}`` with the same request and response shapes as
+:mod:`utils.synthesia_models`. Videos move from ``in_progress`` to
+``complete`` (or ``failed``) once their simulated render time has passed.
+Status is computed on read, so no timers run per video and tens of thousands
+of them cost only a small record each.
+
+Optional misbehaviour: per-request latency, a per-key token-bucket rate limit
+answered with 429 and ``Retry-After``, bursts of 5xx responses, and a cap on
+videos per API key.
+
+    python -m utils.synthesia_simulator --port 8089 --render-seconds 5,20 \\
+        --rate-limit 20 --error-burst-rate 0.01
+    SYNTHESIA_BASE_URL=http://127.0.0.1:8089 SYNTHESIA_API_KEY=anything \\
+        python -m jobs.video_status_updater
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from pydantic import ValidationError
+
+from .synthesia_models import CreateVideoFromTemplateRequest, CreateVideoRequest, VideoStatus
+
+logger = logging.getLogger(__name__)
+
+_VIDEO_PATH = re.compile(r"^/videos/([\w-]+)$")
+
+
+@dataclass
+class SimulatorConfig:
+    """Behaviour of a :class:`SynthesiaSimulator`.
+
+    ``rate_limit`` is requests per second per API key (``None`` for no
+    limit), with bursts of up to ``rate_burst`` requests. Each request starts
+    a run of ``error_burst_seconds`` of ``error_status`` responses with
+    probability ``error_burst_rate``. ``quota`` caps the videos one API key
+    may create.
+    """
+
+    render_seconds: tuple[float, float] = (30.0, 120.0)
+    failure_rate: float = 0.0
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    rate_limit: float | None = None
+    rate_burst: int | None = None
+    error_burst_rate: float = 0.0
+    error_burst_seconds: float = 2.0
+    error_status: int = 503
+    quota: int | None = None
+    seed: int | None = None
+
+
+class _Video:
+    __slots__ = ("id", "owner", "created_at", "done_at", "failed")
+
+    def __init__(
+        self, video_id: str, owner: str, created_at: float, done_at: float, failed: bool
+    ):
+        self.id = video_id
+        self.owner = owner
+        self.created_at = created_at
+        self.done_at = done_at
+        self.failed = failed
+
+    def status(self, now: float) -> VideoStatus:
+        if now < self.done_at:
+            return VideoStatus(id=self.id, status="in_progress", lastUpdatedAt=self.created_at)
+        return VideoStatus(
+            id=self.id, status="failed" if self.failed else "complete", lastUpdatedAt=self.done_at
+        )
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token; return 0.0, or the seconds until one is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class SynthesiaSimulator:
+    """In-memory fake of the Synthesia video API served over HTTP.
+
+    Use as a context manager (or call :meth:`start`/:meth:`stop`) to run it
+    on a background thread, then point a client at :attr:`base_url`.
+    ``clock`` can be replaced to drive render progress from tests.
+    """
+
+    def __init__(
+        self,
+        config: SimulatorConfig | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.config = config or SimulatorConfig()
+        self.clock = clock
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.videos: dict[str, _Video] = {}
+        self._created_by_key: dict[str, int] = {}
+        self._buckets: dict[str, _TokenBucket] = {}
+        self._burst_until = 0.0
+        self.counters = {
+            "requests": 0,
+            "created": 0,
+            "status_reads": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "quota_rejected": 0,
+            "bad_requests": 0,
+        }
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SynthesiaSimulator":
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="synthesia-simulator", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "SynthesiaSimulator":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> dict:
+        now = self.clock()
+        with self._lock:
+            statuses: dict[str, int] = {}
+            for video in self.videos.values():
+                status = video.status(now).status
+                statuses[status] = statuses.get(status, 0) + 1
+            return {**self.counters, "videos": statuses}
+
+    # Request handling. Each method returns (status code, JSON body, headers).
+
+    def _admit(self, api_key: str) -> tuple[int, dict, dict] | None:
+        """Apply the rate limit and error bursts; return a rejection or None."""
+        config = self.config
+        now = self.clock()
+        with self._lock:
+            self.counters["requests"] += 1
+            if config.rate_limit:
+                bucket = self._buckets.get(api_key)
+                if bucket is None:
+                    burst = config.rate_burst or max(1.0, config.rate_limit)
+                    bucket = self._buckets[api_key] = _TokenBucket(config.rate_limit, burst, now)
+                wait = bucket.take(now)
+                if wait:
+                    self.counters["rate_limited"] += 1
+                    # Fractional seconds, so short simulations don't stall on
+                    # the whole-second values the real API sends.
+                    return 429, {"error": "Too many requests"}, {"Retry-After": f"{wait:.3f}"}
+            if now < self._burst_until or (
+                config.error_burst_rate and self._rng.random() < config.error_burst_rate
+            ):
+                if now >= self._burst_until:
+                    self._burst_until = now + config.error_burst_seconds
+                self.counters["server_errors"] += 1
+                # Like a real outage page, say when to come back; clients only
+                # retry a POST on 503 when the server says so.
+                retry_after = {"Retry-After": f"{self._burst_until - now:.3f}"}
+                return config.error_status, {"error": "Simulated server error"}, retry_after
+        return None
+
+    def _create(self, api_key: str, payload: dict, model) -> tuple[int, dict, dict]:
+        try:
+            request = model.model_validate(payload)
+        except ValidationError as exc:
+            with self._lock:
+                self.counters["bad_requests"] += 1
+            details = json.loads(exc.json(include_url=False))
+            return 400, {"error": "Invalid request", "details": details}, {}
+
+        now = self.clock()
+        with self._lock:
+            created = self._created_by_key.get(api_key, 0)
+            if self.config.quota is not None and created >= self.config.quota:
+                self.counters["quota_rejected"] += 1
+                return 403, {"error": "Video quota exceeded"}, {}
+            low, high = self.config.render_seconds
+            video = _Video(
+                str(uuid.UUID(int=self._rng.getrandbits(128), version=4)),
+                api_key,
+                now,
+                now + self._rng.uniform(low, high),
+                self._rng.random() < self.config.failure_rate,
+            )
+            self.videos[video.id] = video
+            self._created_by_key[api_key] = created + 1
+            self.counters["created"] += 1
+
+        body = {
+            "id": video.id,
+            "status": "in_progress",
+            "createdAt": int(now),
+            "title": request.title,
+            "description": request.description,
+        }
+        return 201, body, {}
+
+    def _get(self, api_key: str, video_id: str) -> tuple[int, dict, dict]:
+        with self._lock:
+            video = self.videos.get(video_id)
+            self.counters["status_reads"] += 1
+        if video is None or video.owner != api_key:
+            return 404, {"error": "Video not found"}, {}
+        return 200, video.status(self.clock()).model_dump(), {}
+
+    def handle(self, method: str, path: str, api_key: str, body: bytes) -> tuple[int, dict, dict]:
+        """Route one request; usable without HTTP for in-process tests."""
+        if not api_key:
+            return 401, {"error": "Missing Authorization header"}, {}
+        rejection = self._admit(api_key)
+        if rejection is not None:
+            return rejection
+
+        if method == "POST" and path in ("/videos", "/videos/fromTemplate"):
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                return 400, {"error": "Body is not JSON"}, {}
+            model = CreateVideoRequest if path == "/videos" else CreateVideoFromTemplateRequest
+            return self._create(api_key, payload, model)
+        match = _VIDEO_PATH.match(path)
+        if method == "GET" and match and match.group(1) != "fromTemplate":
+            return self._get(api_key, match.group(1))
+        return 404, {"error": "Not found"}, {}
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this each
+            # keep-alive response waits on the client's delayed ACK.
+            disable_nagle_algorithm = True
+
+            def _serve(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                config = simulator.config
+                if config.latency or config.latency_jitter:
+                    time.sleep(
+                        max(0.0, config.latency + random.uniform(-1, 1) * config.latency_jitter)
+                    )
+                code, payload, headers = simulator.handle(
+                    method,
+                    self.path.split("?", 1)[0].rstrip("/"),
+                    self.headers.get("Authorization", ""),
+                    body,
+                )
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def log_message(self, format, *args):
+                logger.debug("simulator: " + format, *args)
+
+        return Handler
+
+
+def _pair(value: str) -> tuple[float, float]:
+    low, _, high = value.partition(",")
+    return float(low), float(high or low)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local Synthesia API simulator.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--render-seconds", type=_pair, default=(30.0, 120.0), help="min,max")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests/sec per key.")
+    parser.add_argument("--rate-burst", type=int, default=None)
+    parser.add_argument("--error-burst-rate", type=float, default=0.0)
+    parser.add_argument("--error-burst-seconds", type=float, default=2.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--quota", type=int, default=None, help="Max videos per API key.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    options = vars(args)
+    host, port = options.pop("host"), options.pop("port")
+    simulator = SynthesiaSimulator(SimulatorConfig(**options), host=host, port=port)
+    logger.info("Synthesia simulator listening on %s", simulator.base_url)
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.server.server_close()
+        logger.info("Simulator stats: %s", simulator.stats())
+
+
+if __name__ == "__main__":
+    main()